@@ -0,0 +1,49 @@
+"""add_price_alert_events
+
+Revision ID: 0f8b6c2d4e17
+Revises: d5c3f81a6b29
+Create Date: 2026-10-18 19:03:12.208461
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0f8b6c2d4e17'
+down_revision: Union[str, Sequence[str], None] = 'd5c3f81a6b29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('price_alert_events',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('alert_id', sa.String(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('card_id', sa.String(), nullable=False),
+        sa.Column('vendor_id', sa.String(), nullable=False),
+        sa.Column('alert_type', sa.String(), nullable=False),
+        sa.Column('target_price', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('previous_price', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('currency', sa.String(), nullable=False),
+        sa.Column('recorded_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('delivered_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['alert_id'], ['price_alerts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_price_alert_events_user_id', 'price_alert_events', ['user_id', 'id'])
+    op.create_index('idx_price_alert_events_pending', 'price_alert_events', ['id'],
+                    postgresql_where=sa.text('delivered_at IS NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_price_alert_events_pending', table_name='price_alert_events')
+    op.drop_index('idx_price_alert_events_user_id', table_name='price_alert_events')
+    op.drop_table('price_alert_events')
@@ -0,0 +1,103 @@
+"""partition_price_history_by_month
+
+Revision ID: 2b9e5f7c1d46
+Revises: 4a7d2e9f0b35
+Create Date: 2026-10-18 21:18:06.334871
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b9e5f7c1d46'
+down_revision: Union[str, Sequence[str], None] = '4a7d2e9f0b35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Monthly partitions created past the current month; later ones come from
+# partitions.ensure_partitions
+FUTURE_MONTHS = 3
+
+COLUMNS = 'id, card_id, vendor_id, price, currency, condition, rarity, set_code, recorded_at, created_at'
+
+
+def price_history_columns():
+    return [
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('card_id', sa.String(), nullable=False),
+        sa.Column('vendor_id', sa.String(), nullable=False),
+        sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('currency', sa.String(), nullable=False),
+        sa.Column('condition', sa.String(), nullable=True),
+        sa.Column('rarity', sa.String(), nullable=True),
+        sa.Column('set_code', sa.String(), nullable=True),
+        sa.Column('recorded_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['card_id'], ['cards.id'], ),
+        sa.ForeignKeyConstraint(['vendor_id'], ['vendors.id'], ),
+    ]
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    op.rename_table('price_history', 'price_history_legacy')
+    op.execute("ALTER INDEX price_history_pkey RENAME TO price_history_legacy_pkey")
+    op.drop_index('uq_price_history_natural_key', table_name='price_history_legacy')
+    op.drop_index('idx_price_history_recorded_at', table_name='price_history_legacy')
+    op.drop_index('idx_price_history_card_vendor', table_name='price_history_legacy')
+
+    # The partition key has to be part of the primary key
+    op.create_table('price_history',
+        *price_history_columns(),
+        sa.PrimaryKeyConstraint('id', 'recorded_at'),
+        postgresql_partition_by='RANGE (recorded_at)'
+    )
+    op.execute("CREATE TABLE price_history_default PARTITION OF price_history DEFAULT")
+    current = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    months = {add_months(current, offset) for offset in range(FUTURE_MONTHS + 1)}
+    months.update(bind.execute(sa.text(
+        "SELECT DISTINCT date_trunc('month', recorded_at) FROM price_history_legacy"
+    )).scalars())
+    for month in sorted(months):
+        op.execute(
+            f"CREATE TABLE price_history_y{month.year}m{month.month:02d} PARTITION OF price_history "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        )
+
+    op.execute(f"INSERT INTO price_history ({COLUMNS}) SELECT {COLUMNS} FROM price_history_legacy")
+    op.drop_table('price_history_legacy')
+
+    # Time ranges are served by partition pruning, so the standalone
+    # recorded_at index goes; per-card history reads use this one
+    op.create_index('idx_price_history_card_vendor_recorded', 'price_history', ['card_id', 'vendor_id', 'recorded_at'])
+    op.create_index('uq_price_history_natural_key', 'price_history',
+                    ['card_id', 'vendor_id', sa.text("coalesce(condition, '')"), 'recorded_at'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table('price_history', 'price_history_partitioned')
+    op.execute("ALTER INDEX price_history_pkey RENAME TO price_history_partitioned_pkey")
+    op.drop_index('uq_price_history_natural_key', table_name='price_history_partitioned')
+    op.drop_index('idx_price_history_card_vendor_recorded', table_name='price_history_partitioned')
+    op.create_table('price_history',
+        *price_history_columns(),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(f"INSERT INTO price_history ({COLUMNS}) SELECT {COLUMNS} FROM price_history_partitioned")
+    # Dropping the parent drops every partition with it
+    op.drop_table('price_history_partitioned')
+    op.create_index('idx_price_history_card_vendor', 'price_history', ['card_id', 'vendor_id'])
+    op.create_index('idx_price_history_recorded_at', 'price_history', ['recorded_at'])
+    op.create_index('uq_price_history_natural_key', 'price_history',
+                    ['card_id', 'vendor_id', sa.text("coalesce(condition, '')"), 'recorded_at'], unique=True)
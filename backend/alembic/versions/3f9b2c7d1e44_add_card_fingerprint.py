@@ -0,0 +1,28 @@
+"""add_card_fingerprint
+
+Revision ID: 3f9b2c7d1e44
+Revises: ea40976b5547
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9b2c7d1e44'
+down_revision: Union[str, Sequence[str], None] = 'ea40976b5547'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('cards', sa.Column('fingerprint', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('cards', 'fingerprint')
@@ -0,0 +1,28 @@
+"""add_price_rollups_daily_bucket_index
+
+Revision ID: 4a7d2e9f0b35
+Revises: 9c4e7b1a3f62
+Create Date: 2026-10-18 20:31:48.770152
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a7d2e9f0b35'
+down_revision: Union[str, Sequence[str], None] = '9c4e7b1a3f62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_price_rollups_daily_bucket', 'price_rollups_daily', ['bucket'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_price_rollups_daily_bucket', table_name='price_rollups_daily')
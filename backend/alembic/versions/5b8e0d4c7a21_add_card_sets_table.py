@@ -0,0 +1,57 @@
+"""add_card_sets_table
+
+Revision ID: 5b8e0d4c7a21
+Revises: c27a5f3e9b10
+Create Date: 2026-10-18 12:41:09.274415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e0d4c7a21'
+down_revision: Union[str, Sequence[str], None] = 'c27a5f3e9b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('card_sets',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('card_id', sa.String(), nullable=False),
+        sa.Column('set_name', sa.String(), nullable=False),
+        sa.Column('set_code', sa.String(), nullable=False),
+        sa.Column('rarity', sa.String(), nullable=True),
+        sa.Column('set_price', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.ForeignKeyConstraint(['card_id'], ['cards.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('card_id', 'set_code', 'rarity', name='uq_card_sets_card_code_rarity')
+    )
+    op.create_index('idx_card_sets_rarity_card', 'card_sets', ['rarity', 'card_id'])
+    op.create_index('idx_card_sets_set_name_card', 'card_sets', ['set_name', 'card_id'])
+    op.create_index('idx_card_sets_set_code', 'card_sets', ['set_code'])
+
+    # Backfill from the comma-joined columns written by earlier loaders. Set
+    # prices are not available there; the next catalog sync fills them in.
+    op.execute("""
+        INSERT INTO card_sets (card_id, set_name, set_code, rarity)
+        SELECT c.id, s.set_name, s.set_code, NULLIF(s.rarity, '')
+        FROM cards c,
+             unnest(string_to_array(c."set", ', '),
+                    string_to_array(c."setCode", ', '),
+                    string_to_array(c.rarity, ', ')) AS s(set_name, set_code, rarity)
+        WHERE coalesce(c."setCode", '') <> '' AND s.set_code IS NOT NULL
+        ON CONFLICT DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_card_sets_set_code', table_name='card_sets')
+    op.drop_index('idx_card_sets_set_name_card', table_name='card_sets')
+    op.drop_index('idx_card_sets_rarity_card', table_name='card_sets')
+    op.drop_table('card_sets')
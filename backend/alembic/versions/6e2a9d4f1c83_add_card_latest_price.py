@@ -0,0 +1,43 @@
+"""add_card_latest_price
+
+Revision ID: 6e2a9d4f1c83
+Revises: b4f17c2e8d03
+Create Date: 2026-10-18 17:05:41.902316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e2a9d4f1c83'
+down_revision: Union[str, Sequence[str], None] = 'b4f17c2e8d03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('card_latest_price',
+        sa.Column('card_id', sa.String(), nullable=False),
+        sa.Column('vendor_id', sa.String(), nullable=False),
+        sa.Column('condition', sa.String(), nullable=True),
+        sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('currency', sa.String(), nullable=False),
+        sa.Column('recorded_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('card_id', 'vendor_id')
+    )
+    # Backfill from existing raw history
+    op.execute("""
+        INSERT INTO card_latest_price (card_id, vendor_id, condition, price, currency, recorded_at)
+        SELECT DISTINCT ON (card_id, vendor_id) card_id, vendor_id, condition, price, currency, recorded_at
+        FROM price_history
+        ORDER BY card_id, vendor_id, recorded_at DESC
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('card_latest_price')
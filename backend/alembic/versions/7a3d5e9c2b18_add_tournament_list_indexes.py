@@ -0,0 +1,35 @@
+"""add_tournament_list_indexes
+
+Revision ID: 7a3d5e9c2b18
+Revises: e1c94a6b3d57
+Create Date: 2026-10-18 15:06:42.830157
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3d5e9c2b18'
+down_revision: Union[str, Sequence[str], None] = 'e1c94a6b3d57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_tournaments_date', 'tournaments', ['date'])
+    op.create_index('idx_tournaments_format_date', 'tournaments', ['format', 'date'])
+    op.create_index('idx_tournaments_region_date', 'tournaments', ['region', 'date'])
+    # Postgres does not index foreign keys on its own
+    op.create_index('idx_decklists_tournament_id', 'decklists', ['tournamentId'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_decklists_tournament_id', table_name='decklists')
+    op.drop_index('idx_tournaments_region_date', table_name='tournaments')
+    op.drop_index('idx_tournaments_format_date', table_name='tournaments')
+    op.drop_index('idx_tournaments_date', table_name='tournaments')
@@ -0,0 +1,49 @@
+"""add_card_search_indexes
+
+Revision ID: 8d41e6a0b2f9
+Revises: 3f9b2c7d1e44
+Create Date: 2026-10-18 10:03:17.552091
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41e6a0b2f9'
+down_revision: Union[str, Sequence[str], None] = '3f9b2c7d1e44'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # Full-text vector kept up to date by Postgres; name weighted above description
+    op.add_column('cards', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    op.create_index('idx_cards_search_vector', 'cards', ['search_vector'], postgresql_using='gin')
+
+    # Trigram indexes for fuzzy name matching and substring (ILIKE) fallbacks
+    op.create_index('idx_cards_name_trgm', 'cards', ['name'], postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('idx_cards_description_trgm', 'cards', ['description'], postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_cards_description_trgm', table_name='cards')
+    op.drop_index('idx_cards_name_trgm', table_name='cards')
+    op.drop_index('idx_cards_search_vector', table_name='cards')
+    op.drop_column('cards', 'search_vector')
@@ -0,0 +1,38 @@
+"""add_meta_archetype_stats
+
+Revision ID: 8e5a1c3f7d20
+Revises: 2b9e5f7c1d46
+Create Date: 2026-10-18 23:12:05.417830
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e5a1c3f7d20'
+down_revision: Union[str, Sequence[str], None] = '2b9e5f7c1d46'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('meta_archetype_stats',
+        sa.Column('format', sa.String(), nullable=False),
+        sa.Column('region', sa.String(), nullable=False),
+        sa.Column('week', sa.String(), nullable=False),
+        sa.Column('archetype', sa.String(), nullable=False),
+        sa.Column('decklists', sa.Integer(), nullable=False),
+        sa.Column('placed', sa.Integer(), nullable=False),
+        sa.Column('top_cut', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('format', 'region', 'week', 'archetype')
+    )
+    # Existing decklists are folded in by scripts/rebuild_meta_stats.py
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('meta_archetype_stats')
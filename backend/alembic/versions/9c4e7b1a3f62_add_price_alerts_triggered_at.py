@@ -0,0 +1,28 @@
+"""add_price_alerts_triggered_at
+
+Revision ID: 9c4e7b1a3f62
+Revises: 0f8b6c2d4e17
+Create Date: 2026-10-18 19:47:55.126093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e7b1a3f62'
+down_revision: Union[str, Sequence[str], None] = '0f8b6c2d4e17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('price_alerts', sa.Column('triggered_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('price_alerts', 'triggered_at')
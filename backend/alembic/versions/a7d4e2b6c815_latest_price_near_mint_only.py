@@ -0,0 +1,42 @@
+"""latest_price_near_mint_only
+
+Revision ID: a7d4e2b6c815
+Revises: f3a9c5e1d274
+Create Date: 2026-10-19 14:03:27.381942
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d4e2b6c815'
+down_revision: Union[str, Sequence[str], None] = 'f3a9c5e1d274'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rows may hold a lower condition's tick; rebuild from near-mint ticks only
+    op.execute("TRUNCATE card_latest_price")
+    op.execute("""
+        INSERT INTO card_latest_price (card_id, vendor_id, condition, price, currency, recorded_at)
+        SELECT DISTINCT ON (card_id, vendor_id) card_id, vendor_id, condition, price, currency, recorded_at
+        FROM price_history
+        WHERE condition IS NULL OR condition = 'NM'
+        ORDER BY card_id, vendor_id, recorded_at DESC
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("TRUNCATE card_latest_price")
+    op.execute("""
+        INSERT INTO card_latest_price (card_id, vendor_id, condition, price, currency, recorded_at)
+        SELECT DISTINCT ON (card_id, vendor_id) card_id, vendor_id, condition, price, currency, recorded_at
+        FROM price_history
+        ORDER BY card_id, vendor_id, recorded_at DESC
+    """)
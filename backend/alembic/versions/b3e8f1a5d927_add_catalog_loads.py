@@ -0,0 +1,40 @@
+"""add_catalog_loads
+
+Revision ID: b3e8f1a5d927
+Revises: a7d4e2b6c815
+Create Date: 2026-10-20 10:21:06.417382
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e8f1a5d927'
+down_revision: Union[str, Sequence[str], None] = 'a7d4e2b6c815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'catalog_loads',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    # Catalogs loaded before loads were recorded are taken as complete; a
+    # partial one is brought up to date by scripts/sync_catalog.py
+    op.execute("""
+        INSERT INTO catalog_loads (started_at, finished_at)
+        SELECT now(), now() WHERE EXISTS (SELECT 1 FROM cards)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('catalog_loads')
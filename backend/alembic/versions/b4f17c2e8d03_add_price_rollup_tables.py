@@ -0,0 +1,61 @@
+"""add_price_rollup_tables
+
+Revision ID: b4f17c2e8d03
+Revises: 7a3d5e9c2b18
+Create Date: 2026-10-18 16:22:05.417728
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4f17c2e8d03'
+down_revision: Union[str, Sequence[str], None] = '7a3d5e9c2b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ROLLUP_TABLES = {
+    'price_rollups_daily': 'day',
+    'price_rollups_weekly': 'week',
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, unit in ROLLUP_TABLES.items():
+        op.create_table(table,
+            sa.Column('card_id', sa.String(), nullable=False),
+            sa.Column('vendor_id', sa.String(), nullable=False),
+            sa.Column('bucket', sa.DateTime(), nullable=False),
+            sa.Column('currency', sa.String(), nullable=False),
+            sa.Column('open', sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column('high', sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column('low', sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column('close', sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column('volume', sa.Integer(), nullable=False),
+            sa.Column('open_at', sa.DateTime(), nullable=False),
+            sa.Column('close_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('card_id', 'vendor_id', 'bucket')
+        )
+        # Backfill from existing raw history
+        op.execute(f"""
+            INSERT INTO {table} (card_id, vendor_id, bucket, currency, open, high, low, close, volume, open_at, close_at)
+            SELECT card_id, vendor_id, date_trunc('{unit}', recorded_at),
+                   (array_agg(currency ORDER BY recorded_at))[1],
+                   (array_agg(price ORDER BY recorded_at))[1],
+                   max(price), min(price),
+                   (array_agg(price ORDER BY recorded_at DESC))[1],
+                   count(*), min(recorded_at), max(recorded_at)
+            FROM price_history
+            GROUP BY card_id, vendor_id, date_trunc('{unit}', recorded_at)
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(list(ROLLUP_TABLES)):
+        op.drop_table(table)
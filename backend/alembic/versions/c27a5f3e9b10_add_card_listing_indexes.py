@@ -0,0 +1,36 @@
+"""add_card_listing_indexes
+
+Revision ID: c27a5f3e9b10
+Revises: 8d41e6a0b2f9
+Create Date: 2026-10-18 11:20:54.903317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c27a5f3e9b10'
+down_revision: Union[str, Sequence[str], None] = '8d41e6a0b2f9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Sort key for keyset pagination on /cards
+    op.create_index('idx_cards_name_id', 'cards', ['name', 'id'])
+    # Equality filters used by the card browser
+    op.create_index('idx_cards_type', 'cards', ['type'])
+    op.create_index('idx_cards_attribute', 'cards', ['attribute'])
+    op.create_index('idx_cards_race', 'cards', ['race'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_cards_race', table_name='cards')
+    op.drop_index('idx_cards_attribute', table_name='cards')
+    op.drop_index('idx_cards_type', table_name='cards')
+    op.drop_index('idx_cards_name_id', table_name='cards')
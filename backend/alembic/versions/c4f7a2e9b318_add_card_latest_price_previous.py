@@ -0,0 +1,46 @@
+"""add_card_latest_price_previous
+
+Revision ID: c4f7a2e9b318
+Revises: b3e8f1a5d927
+Create Date: 2026-10-20 11:47:52.093614
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f7a2e9b318'
+down_revision: Union[str, Sequence[str], None] = 'b3e8f1a5d927'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('card_latest_price', sa.Column('previous_price', sa.Numeric(precision=10, scale=2), nullable=True))
+    op.add_column('card_latest_price', sa.Column('previous_recorded_at', sa.DateTime(), nullable=True))
+    # Backfill the tick before each latest price
+    op.execute("""
+        UPDATE card_latest_price l
+        SET previous_price = p.price, previous_recorded_at = p.recorded_at
+        FROM (
+            SELECT DISTINCT ON (card_id, vendor_id) card_id, vendor_id, price, recorded_at
+            FROM price_history h
+            WHERE (condition IS NULL OR condition = 'NM')
+              AND recorded_at < (
+                  SELECT recorded_at FROM card_latest_price c
+                  WHERE c.card_id = h.card_id AND c.vendor_id = h.vendor_id
+              )
+            ORDER BY card_id, vendor_id, recorded_at DESC
+        ) p
+        WHERE p.card_id = l.card_id AND p.vendor_id = l.vendor_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('card_latest_price', 'previous_recorded_at')
+    op.drop_column('card_latest_price', 'previous_price')
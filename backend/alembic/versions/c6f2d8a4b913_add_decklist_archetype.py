@@ -0,0 +1,31 @@
+"""add_decklist_archetype
+
+Revision ID: c6f2d8a4b913
+Revises: 8e5a1c3f7d20
+Create Date: 2026-10-19 00:04:37.281559
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6f2d8a4b913'
+down_revision: Union[str, Sequence[str], None] = '8e5a1c3f7d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('decklists', sa.Column('archetype', sa.String(), nullable=True))
+    op.add_column('decklists', sa.Column('archetype_similarity', sa.Float(), nullable=True))
+    # Existing decklists are labelled by scripts/classify_archetypes.py
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('decklists', 'archetype_similarity')
+    op.drop_column('decklists', 'archetype')
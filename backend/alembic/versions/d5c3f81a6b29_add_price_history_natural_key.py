@@ -0,0 +1,61 @@
+"""add_price_history_natural_key
+
+Revision ID: d5c3f81a6b29
+Revises: 6e2a9d4f1c83
+Create Date: 2026-10-18 18:12:37.550914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5c3f81a6b29'
+down_revision: Union[str, Sequence[str], None] = '6e2a9d4f1c83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Drop duplicate ticks left by earlier re-runs, keeping the lowest id
+    removed = op.get_bind().execute(sa.text("""
+        DELETE FROM price_history p
+        USING price_history q
+        WHERE p.card_id = q.card_id
+          AND p.vendor_id = q.vendor_id
+          AND coalesce(p.condition, '') = coalesce(q.condition, '')
+          AND p.recorded_at = q.recorded_at
+          AND p.id > q.id
+    """)).rowcount
+    if removed:
+        # Duplicates were counted in the rollup volumes; regenerate the derived tables
+        for table, unit in (('price_rollups_daily', 'day'), ('price_rollups_weekly', 'week')):
+            op.execute(f"TRUNCATE {table}")
+            op.execute(f"""
+                INSERT INTO {table} (card_id, vendor_id, bucket, currency, open, high, low, close, volume, open_at, close_at)
+                SELECT card_id, vendor_id, date_trunc('{unit}', recorded_at),
+                       (array_agg(currency ORDER BY recorded_at))[1],
+                       (array_agg(price ORDER BY recorded_at))[1],
+                       max(price), min(price),
+                       (array_agg(price ORDER BY recorded_at DESC))[1],
+                       count(*), min(recorded_at), max(recorded_at)
+                FROM price_history
+                GROUP BY card_id, vendor_id, date_trunc('{unit}', recorded_at)
+            """)
+        op.execute("TRUNCATE card_latest_price")
+        op.execute("""
+            INSERT INTO card_latest_price (card_id, vendor_id, condition, price, currency, recorded_at)
+            SELECT DISTINCT ON (card_id, vendor_id) card_id, vendor_id, condition, price, currency, recorded_at
+            FROM price_history
+            ORDER BY card_id, vendor_id, recorded_at DESC
+        """)
+    op.create_index('uq_price_history_natural_key', 'price_history',
+                    ['card_id', 'vendor_id', sa.text("coalesce(condition, '')"), 'recorded_at'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_price_history_natural_key', table_name='price_history')
@@ -0,0 +1,36 @@
+"""price_alerts_active_target_index
+
+Revision ID: d8b2e6f4a193
+Revises: c4f7a2e9b318
+Create Date: 2026-10-20 14:32:18.660251
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8b2e6f4a193'
+down_revision: Union[str, Sequence[str], None] = 'c4f7a2e9b318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'idx_price_alerts_active_card_type_target', 'price_alerts', ['card_id', 'alert_type', 'target_price'],
+        postgresql_where=sa.text('is_active'),
+    )
+    op.drop_index('idx_price_alerts_active_card', table_name='price_alerts')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        'idx_price_alerts_active_card', 'price_alerts', ['card_id'],
+        postgresql_where=sa.text('is_active'),
+    )
+    op.drop_index('idx_price_alerts_active_card_type_target', table_name='price_alerts')
@@ -0,0 +1,51 @@
+"""add_deck_cards_table
+
+Revision ID: e1c94a6b3d57
+Revises: 5b8e0d4c7a21
+Create Date: 2026-10-18 13:58:31.640972
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1c94a6b3d57'
+down_revision: Union[str, Sequence[str], None] = '5b8e0d4c7a21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('deck_cards',
+        sa.Column('decklist_id', sa.String(), nullable=False),
+        sa.Column('zone', sa.String(), nullable=False),
+        sa.Column('card_id', sa.String(), nullable=False),
+        sa.Column('tournament_id', sa.String(), nullable=True),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['decklist_id'], ['decklists.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('decklist_id', 'zone', 'card_id')
+    )
+    op.create_index('idx_deck_cards_card_id', 'deck_cards', ['card_id'])
+    op.create_index('idx_deck_cards_tournament_card', 'deck_cards', ['tournament_id', 'card_id'])
+
+    # Backfill from the existing JSONB zones
+    op.execute("""
+        INSERT INTO deck_cards (decklist_id, tournament_id, zone, card_id, quantity)
+        SELECT d.id, d."tournamentId", z.zone, e->>'cardId', sum(coalesce((e->>'quantity')::int, 1))
+        FROM decklists d
+        CROSS JOIN LATERAL (VALUES ('main', d."mainDeck"), ('extra', d."extraDeck"), ('side', d."sideDeck")) AS z(zone, cards)
+        CROSS JOIN LATERAL jsonb_array_elements(coalesce(z.cards, '[]'::jsonb)) AS e
+        WHERE e->>'cardId' IS NOT NULL
+        GROUP BY d.id, d."tournamentId", z.zone, e->>'cardId'
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_deck_cards_tournament_card', table_name='deck_cards')
+    op.drop_index('idx_deck_cards_card_id', table_name='deck_cards')
+    op.drop_table('deck_cards')
@@ -0,0 +1,41 @@
+"""card_sets_unique_null_rarity
+
+Revision ID: e6a3c9f2d584
+Revises: d8b2e6f4a193
+Create Date: 2026-10-20 16:08:41.327915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a3c9f2d584'
+down_revision: Union[str, Sequence[str], None] = 'd8b2e6f4a193'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # NULL rarities never conflicted, so printings without one may be stored twice
+    op.execute("""
+        DELETE FROM card_sets p
+        USING card_sets q
+        WHERE p.card_id = q.card_id
+          AND p.set_code = q.set_code
+          AND p.rarity IS NULL
+          AND q.rarity IS NULL
+          AND p.id > q.id
+    """)
+    op.drop_constraint('uq_card_sets_card_code_rarity', 'card_sets', type_='unique')
+    op.create_index('uq_card_sets_card_code_rarity', 'card_sets',
+                    ['card_id', 'set_code', sa.text("coalesce(rarity, '')")], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_card_sets_card_code_rarity', table_name='card_sets')
+    op.create_unique_constraint('uq_card_sets_card_code_rarity', 'card_sets', ['card_id', 'set_code', 'rarity'])
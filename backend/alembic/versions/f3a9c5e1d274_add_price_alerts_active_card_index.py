@@ -0,0 +1,31 @@
+"""add_price_alerts_active_card_index
+
+Revision ID: f3a9c5e1d274
+Revises: c6f2d8a4b913
+Create Date: 2026-10-19 09:12:44.506118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9c5e1d274'
+down_revision: Union[str, Sequence[str], None] = 'c6f2d8a4b913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'idx_price_alerts_active_card', 'price_alerts', ['card_id'],
+        postgresql_where=sa.text('is_active'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_price_alerts_active_card', table_name='price_alerts')
@@ -0,0 +1,227 @@
+"""
+Event-driven evaluation of price alerts.
+
+When a batch of prices is written, ``prices`` calls ``evaluate_price_alerts``
+in the same transaction. Each tick is compared with the vendor's previous
+price, which gives the range of thresholds it crossed per alert type. One
+query over the ``(card_id, alert_type, target_price)`` index of active
+alerts loads only the alerts inside those ranges into an ``AlertIndex``
+(per card, one sorted threshold array per alert type), which picks out the
+exact alerts each tick crossed. The work done per batch is proportional to
+the alerts it triggers, not to the number of alerts on its cards.
+
+- above: fires when the price rises to or past ``target_price``
+- below: fires when the price falls to or past ``target_price``
+- change: fires when a tick moves the price by at least ``target_price``
+  percent from the vendor's previous price
+
+The previous price is the vendor's ``card_latest_price`` row, which keeps
+near-mint ticks only. ``bulk_alerts`` applies the same conditions to each
+vendor's latest tick and the ``previous_price`` stored before it.
+
+Triggered alerts are appended to the ``price_alert_events`` queue table, from
+which notifiers claim them with ``claim_alert_events``. Alerts are read from
+the database for every batch, so every writer (API workers, the catalog
+sync, scripts) sees alerts created anywhere as soon as they are committed.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import Numeric, String, column, insert, select, tuple_, update, values
+
+from models import CardLatestPrice as CardLatestPriceModel, PriceAlert as PriceAlertModel
+from models import PriceAlertEvent as PriceAlertEventModel
+
+ALERT_TYPES = ('above', 'below', 'change')
+
+# Bounds of a Numeric(10, 2) target, for ranges open on one side
+MAX_TARGET = 99999999.99
+
+IndexedAlert = namedtuple('IndexedAlert', 'id user_id card_id alert_type target_price')
+
+class AlertIndex:
+    """
+    Per-card sorted threshold arrays for active alerts.
+
+    ``_cards[card_id][alert_type]`` is a pair of parallel lists: thresholds in
+    ascending order and the alerts they belong to.
+    """
+
+    def __init__(self, alerts=()):
+        self._cards = {}
+        self._count = 0
+        for alert in alerts:
+            self.add(alert)
+
+    def __len__(self):
+        return self._count
+
+    def add(self, alert):
+        types = self._cards.setdefault(alert.card_id, {})
+        keys, refs = types.setdefault(alert.alert_type, ([], []))
+        pos = bisect_right(keys, alert.target_price)
+        keys.insert(pos, alert.target_price)
+        refs.insert(pos, alert)
+        self._count += 1
+
+    def crossed(self, card_id, previous, price):
+        """
+        Alerts on ``card_id`` triggered by a move from ``previous`` to ``price``.
+
+        With no previous price, every above/below alert the price already sits
+        past fires, and change alerts cannot fire.
+        """
+        hits = []
+        types = self._cards.get(card_id)
+        if not types:
+            return hits
+        keys, refs = types.get('above', ([], []))
+        if keys:
+            # previous < target <= price
+            lo = 0 if previous is None else bisect_right(keys, previous)
+            hits.extend(refs[lo:bisect_right(keys, price)])
+        keys, refs = types.get('below', ([], []))
+        if keys:
+            # price <= target < previous
+            hi = len(keys) if previous is None else bisect_left(keys, previous)
+            hits.extend(refs[bisect_left(keys, price):hi])
+        keys, refs = types.get('change', ([], []))
+        if keys and previous:
+            pct = abs(price - previous) / previous * 100
+            hits.extend(refs[:bisect_right(keys, pct)])
+        return hits
+
+def crossed_ranges(card_id, previous, price):
+    """
+    ``(card_id, alert_type, lo, hi)`` target ranges a move can cross, bounds inclusive.
+
+    A superset of what ``AlertIndex.crossed`` fires, which applies the exact
+    open and closed bounds.
+    """
+    if previous is None:
+        return [(card_id, 'above', -MAX_TARGET, price), (card_id, 'below', price, MAX_TARGET)]
+    ranges = []
+    if price > previous:
+        ranges.append((card_id, 'above', previous, price))
+    elif price < previous:
+        ranges.append((card_id, 'below', price, previous))
+    if previous:
+        ranges.append((card_id, 'change', -MAX_TARGET, abs(price - previous) / previous * 100))
+    return ranges
+
+def indexed_alert(alert):
+    """IndexedAlert for a PriceAlert row, or None if it cannot be evaluated"""
+    if alert.alert_type not in ALERT_TYPES or alert.target_price is None:
+        return None
+    return IndexedAlert(alert.id, alert.user_id, alert.card_id, alert.alert_type, float(alert.target_price))
+
+def alerted_cards(db, card_ids):
+    """The subset of ``card_ids`` with at least one active alert"""
+    if not card_ids:
+        return set()
+    return set(db.execute(select(PriceAlertModel.card_id).distinct().where(
+        PriceAlertModel.is_active == True, PriceAlertModel.card_id.in_(list(card_ids))
+    )).scalars())
+
+def load_index(db, ranges):
+    """AlertIndex of the active alerts whose target lies in one of ``ranges`` (see ``crossed_ranges``)"""
+    ranges = sorted(set(ranges))
+    if not ranges:
+        return AlertIndex()
+    crossed = values(
+        column('card_id', String), column('alert_type', String), column('lo', Numeric), column('hi', Numeric),
+        name='crossed',
+    ).data(ranges)
+    rows = db.execute(select(PriceAlertModel).distinct().join(
+        crossed,
+        (crossed.c.card_id == PriceAlertModel.card_id)
+        & (crossed.c.alert_type == PriceAlertModel.alert_type)
+        & PriceAlertModel.target_price.between(crossed.c.lo, crossed.c.hi),
+    ).where(PriceAlertModel.is_active == True)).scalars()
+    return AlertIndex(alert for alert in map(indexed_alert, rows) if alert is not None)
+
+def evaluate_price_alerts(db, price_rows):
+    """
+    Queue an event for every alert crossed by ``price_rows``; the caller commits.
+
+    Must run before card_latest_price is updated with the same rows, since
+    that table supplies each vendor's previous price. Ticks older than the
+    stored latest price are late arrivals and do not move the price, so they
+    trigger nothing. Returns the queued event rows.
+    """
+    cards = alerted_cards(db, {row['card_id'] for row in price_rows})
+    rows = [row for row in price_rows if row['card_id'] in cards]
+    if not rows:
+        return []
+    keys = {(row['card_id'], row['vendor_id']) for row in rows}
+    previous = {
+        (card_id, vendor_id): (float(price), recorded_at)
+        for card_id, vendor_id, price, recorded_at in db.execute(
+            select(
+                CardLatestPriceModel.card_id, CardLatestPriceModel.vendor_id,
+                CardLatestPriceModel.price, CardLatestPriceModel.recorded_at,
+            ).where(tuple_(CardLatestPriceModel.card_id, CardLatestPriceModel.vendor_id).in_(keys))
+        )
+    }
+    moves = []
+    for row in sorted(rows, key=lambda row: row['recorded_at']):
+        key = (row['card_id'], row['vendor_id'])
+        prev_price, prev_at = previous.get(key, (None, None))
+        if prev_at is not None and row['recorded_at'] < prev_at:
+            continue
+        price = float(row['price'])
+        moves.append((row, prev_price, price))
+        previous[key] = (price, row['recorded_at'])
+    index = load_index(db, [
+        crossed for row, prev_price, price in moves for crossed in crossed_ranges(row['card_id'], prev_price, price)
+    ])
+    now = datetime.now()
+    events = []
+    for row, prev_price, price in moves:
+        for alert in index.crossed(row['card_id'], prev_price, price):
+            events.append({
+                'alert_id': alert.id,
+                'user_id': alert.user_id,
+                'card_id': alert.card_id,
+                'vendor_id': row['vendor_id'],
+                'alert_type': alert.alert_type,
+                'target_price': alert.target_price,
+                'previous_price': prev_price,
+                'price': price,
+                'currency': row['currency'],
+                'recorded_at': row['recorded_at'],
+                'created_at': now,
+            })
+    queue_alert_events(db, events, now)
+    return events
+
+def queue_alert_events(db, events, now):
+    """Append triggered-alert events to the queue and stamp their alerts' triggered_at"""
+    if not events:
+        return
+    db.execute(insert(PriceAlertEventModel), events)
+    stamp_triggered_alerts(db, {event['alert_id'] for event in events}, now)
+
+def stamp_triggered_alerts(db, alert_ids, now):
+    db.execute(update(PriceAlertModel).where(PriceAlertModel.id.in_(list(alert_ids))).values(triggered_at=now))
+
+def claim_alert_events(db, limit=100):
+    """
+    Mark up to ``limit`` undelivered events as delivered and return them.
+
+    Rows are locked with SKIP LOCKED, so concurrent notifiers never claim the
+    same event. The caller commits once the events have been handed off.
+    """
+    events = db.execute(
+        select(PriceAlertEventModel)
+        .where(PriceAlertEventModel.delivered_at.is_(None))
+        .order_by(PriceAlertEventModel.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    now = datetime.now()
+    for event in events:
+        event.delivered_at = now
+    return events
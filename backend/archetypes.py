@@ -0,0 +1,294 @@
+"""
+Canonical deck archetypes from card-count vectors.
+
+Each decklist's main and extra deck become a sparse vector of card counts
+(one column per card id). Archetype centroids are the normalized mean vector
+of the decks labelled with that archetype, seeded from the submitted
+``deckType`` (whitespace and case folded). A deck is assigned the centroid
+with the highest cosine similarity when it reaches ``MIN_SIMILARITY``;
+otherwise it keeps its own label. ``classify_all`` repeats
+centroid-then-assign for a few rounds over every deck at once with SciPy
+sparse matrices and writes ``Decklist.archetype`` back.
+
+The centroids live in an in-memory ``ArchetypeClassifier`` so the decklist
+endpoints can label a single new deck with one sparse dot product. Each API
+process refits it on a background thread every ``REFRESH_SECONDS``, which
+also picks up centroids from a batch run in another process; a decklist
+written before the first fit waits for it.
+"""
+
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select, text
+
+from database import SessionLocal
+from models import DeckCard as DeckCardModel, Decklist as DecklistModel
+from decks import deck_card_rows
+from meta import UNKNOWN_ARCHETYPE, rebuild_meta_stats
+
+# Zones that define an archetype; side decks are matchup tech
+ARCHETYPE_ZONES = ('main', 'extra')
+
+# Labels with fewer decks than this do not get a centroid
+MIN_ARCHETYPE_DECKS = 3
+
+# Lowest cosine similarity at which a deck is relabelled to a centroid
+MIN_SIMILARITY = 0.5
+
+REFINE_ROUNDS = 3
+
+REFRESH_SECONDS = 900
+
+def label_key(deck_type):
+    """Whitespace-collapsed, casefolded deckType; '' for blank labels"""
+    return ' '.join((deck_type or '').split()).casefold()
+
+def normalize_rows(matrix):
+    """Scale each row of a CSR matrix to unit length; empty rows stay empty"""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ matrix
+
+def centroids_for(vectors, labels, count):
+    """Unit-length mean of the (unit-length) rows carrying each label in ``range(count)``"""
+    members = np.flatnonzero(labels >= 0)
+    sizes = np.bincount(labels[members], minlength=count)
+    weights = sparse.csr_matrix(
+        (1 / sizes[labels[members]], (labels[members], members)), shape=(count, vectors.shape[0])
+    )
+    return normalize_rows((weights @ vectors).tocsr())
+
+class ArchetypeClassifier:
+    """Archetype names, their unit-length centroids and the card id of each centroid column"""
+
+    def __init__(self, names=(), centroids=None, card_ids=()):
+        self.names = list(names)
+        self.card_index = {card_id: i for i, card_id in enumerate(card_ids)}
+        if centroids is None:
+            centroids = sparse.csr_matrix((len(self.names), len(self.card_index)))
+        # Column-major, so a single deck's dot product only touches its own cards
+        self.centroids = centroids.tocsc()
+
+    def __len__(self):
+        return len(self.names)
+
+    def classify_counts(self, counts):
+        """(archetype, similarity) for ``{card_id: quantity}``; archetype is None below MIN_SIMILARITY"""
+        if not self.names or not counts:
+            return None, 0.0
+        known = [(self.card_index[card_id], quantity) for card_id, quantity in counts.items() if card_id in self.card_index]
+        if not known:
+            return None, 0.0
+        cols, quantities = zip(*known)
+        norm = np.sqrt(sum(quantity * quantity for quantity in counts.values()))
+        scores = self.centroids[:, list(cols)] @ (np.array(quantities, dtype=float) / norm)
+        best = int(np.argmax(scores))
+        similarity = float(scores[best])
+        return (self.names[best] if similarity >= MIN_SIMILARITY else None), similarity
+
+def deck_counts(decklist):
+    """``{card_id: quantity}`` over a decklist's archetype zones, read from its JSONB"""
+    counts = Counter()
+    for row in deck_card_rows(decklist):
+        if row['zone'] in ARCHETYPE_ZONES:
+            counts[row['card_id']] += row['quantity']
+    return counts
+
+def classify_decklist(decklist, classifier=None):
+    """
+    Set ``decklist.archetype`` and ``archetype_similarity`` from its cards.
+
+    Decks not close enough to any centroid keep their submitted deckType,
+    as do all decks until the refresh thread has fitted a classifier.
+    """
+    classifier = classifier if classifier is not None else get_classifier()
+    archetype, similarity = classifier.classify_counts(deck_counts(decklist))
+    decklist.archetype = archetype or ' '.join((decklist.deckType or '').split()) or UNKNOWN_ARCHETYPE
+    decklist.archetype_similarity = round(similarity, 4)
+
+def load_deck_vectors(db):
+    """
+    Decklist ids, submitted deckTypes, card ids and the sparse count matrix.
+
+    Read from the deck_cards index, which mirrors the decklists' JSONB zones.
+    """
+    decks = db.execute(select(DecklistModel.id, DecklistModel.deckType).order_by(DecklistModel.id)).all()
+    ids = [deck_id for deck_id, _ in decks]
+    row_of = {deck_id: i for i, deck_id in enumerate(ids)}
+    entries = db.execute(
+        select(DeckCardModel.decklist_id, DeckCardModel.card_id, DeckCardModel.quantity)
+        .where(DeckCardModel.zone.in_(ARCHETYPE_ZONES))
+    ).all()
+    entries = [(deck_id, card_id, quantity) for deck_id, card_id, quantity in entries if deck_id in row_of]
+    deck_ids, card_ids, quantities = zip(*entries) if entries else ((), (), ())
+    cards, cols = np.unique(np.array(card_ids, dtype=str), return_inverse=True)
+    rows = np.array([row_of[deck_id] for deck_id in deck_ids], dtype=int)
+    # Duplicate (row, col) pairs, e.g. one card in main and extra, are summed
+    vectors = sparse.csr_matrix(
+        (np.array(quantities, dtype=float), (rows, cols)), shape=(len(ids), len(cards))
+    )
+    return ids, [deck_type for _, deck_type in decks], cards.tolist(), vectors
+
+def seed_labels(deck_types):
+    """Label index per deck and the display name per label, from the submitted deckTypes"""
+    spellings = {}
+    for deck_type in deck_types:
+        key = label_key(deck_type)
+        if key:
+            spellings.setdefault(key, Counter())[' '.join(deck_type.split())] += 1
+    keys = sorted(spellings)
+    index = {key: i for i, key in enumerate(keys)}
+    labels = np.array([index.get(label_key(deck_type), -1) for deck_type in deck_types], dtype=int)
+    # Show each label as its most common spelling
+    names = [spellings[key].most_common(1)[0][0] for key in keys]
+    return labels, names
+
+def fit_centroids(vectors, labels, names):
+    """Centroids of the labels with at least MIN_ARCHETYPE_DECKS decks, and their names"""
+    sizes = np.bincount(labels[labels >= 0], minlength=len(names))
+    kept = np.flatnonzero(sizes >= MIN_ARCHETYPE_DECKS)
+    remap = np.full(len(names) + 1, -1)
+    remap[kept] = np.arange(len(kept))
+    # labels of -1 index the trailing -1 of remap
+    return centroids_for(vectors, remap[labels], len(kept)), [names[i] for i in kept]
+
+def assign(vectors, centroids):
+    """Best centroid per row (-1 below MIN_SIMILARITY) and its cosine similarity"""
+    if centroids.shape[0] == 0:
+        return np.full(vectors.shape[0], -1), np.zeros(vectors.shape[0])
+    scores = (vectors @ centroids.T).toarray()
+    best = scores.argmax(axis=1)
+    similarity = scores[np.arange(len(best)), best]
+    return np.where(similarity >= MIN_SIMILARITY, best, -1), similarity
+
+def relabel(assigned, names, deck_types):
+    """
+    Labels for the next round: the matched centroid, else the deck's own label.
+
+    Unmatched decks whose label already has a centroid are left out, so they
+    do not pull it away from the decks that match it; other labels are kept
+    so a rogue archetype can gather enough decks for a centroid.
+    """
+    labels = assigned.copy()
+    next_names = list(names)
+    index = {label_key(name): i for i, name in enumerate(names)}
+    centroid_keys = set(index)
+    for i in np.flatnonzero(assigned < 0).tolist():
+        key = label_key(deck_types[i])
+        if not key or key in centroid_keys:
+            continue
+        if key not in index:
+            index[key] = len(next_names)
+            next_names.append(' '.join(deck_types[i].split()))
+        labels[i] = index[key]
+    return labels, next_names
+
+def fit(vectors, deck_types, rounds=REFINE_ROUNDS):
+    """
+    Fit centroids and label every deck.
+
+    Returns ``(names, centroids, assigned, similarity)``; ``assigned`` indexes
+    ``names`` or is -1 where a deck matched no centroid.
+    """
+    vectors = normalize_rows(vectors)
+    labels, label_names = seed_labels(deck_types)
+    for _ in range(max(rounds, 1)):
+        centroids, names = fit_centroids(vectors, labels, label_names)
+        assigned, similarity = assign(vectors, centroids)
+        next_labels, next_names = relabel(assigned, names, deck_types)
+        if np.array_equal(next_labels, labels) and next_names == label_names:
+            break
+        labels, label_names = next_labels, next_names
+    return names, centroids, assigned, similarity
+
+_lock = threading.Lock()
+_classifier = None
+_thread = None
+
+def get_classifier():
+    """Current classifier; empty until the first fit"""
+    return _classifier if _classifier is not None else ArchetypeClassifier()
+
+def rebuild_classifier(db):
+    """Fit centroids over all decklists and swap in a new classifier"""
+    global _classifier
+    ids, deck_types, card_ids, vectors = load_deck_vectors(db)
+    names, centroids, _, _ = fit(vectors, deck_types)
+    _classifier = ArchetypeClassifier(names, centroids, card_ids)
+    return _classifier
+
+def refresh_classifier():
+    """Rebuild the classifier from the committed decklists"""
+    db = SessionLocal()
+    try:
+        return rebuild_classifier(db)
+    finally:
+        db.close()
+
+def _refresh_loop():
+    while True:
+        try:
+            classifier = refresh_classifier()
+            print(f"Archetype classifier built with {len(classifier)} archetypes.")
+        except Exception as e:
+            print(f"Error refreshing archetype classifier: {e}")
+        time.sleep(REFRESH_SECONDS)
+
+def start_refresh():
+    """Start the periodic classifier refresh thread unless it is already running"""
+    global _thread
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return _thread
+        _thread = threading.Thread(target=_refresh_loop, name='archetype-classifier', daemon=True)
+        _thread.start()
+        return _thread
+
+def classify_all(db):
+    """
+    Relabel every decklist and refresh the meta stats; the caller commits.
+
+    Also swaps in the fitted classifier for this process; API processes pick
+    it up on their next refresh. Returns stats with counts and timings.
+    """
+    global _classifier
+    start = time.perf_counter()
+    ids, deck_types, card_ids, vectors = load_deck_vectors(db)
+    loaded = time.perf_counter()
+    names, centroids, assigned, similarity = fit(vectors, deck_types)
+    fitted = time.perf_counter()
+    rows = []
+    for i, deck_id in enumerate(ids):
+        if assigned[i] >= 0:
+            archetype = names[assigned[i]]
+        else:
+            archetype = ' '.join((deck_types[i] or '').split()) or UNKNOWN_ARCHETYPE
+        rows.append({'id': deck_id, 'archetype': archetype, 'archetype_similarity': round(float(similarity[i]), 4)})
+    relabelled = sum(
+        row['archetype'] != ' '.join((deck_type or '').split()) for row, deck_type in zip(rows, deck_types)
+    )
+    if rows:
+        db.execute(text("""
+            UPDATE decklists SET archetype = v.archetype, archetype_similarity = v.similarity
+            FROM unnest(:ids, :archetypes, :similarities) AS v(id, archetype, similarity)
+            WHERE decklists.id = v.id
+        """), {
+            'ids': ids,
+            'archetypes': [row['archetype'] for row in rows],
+            'similarities': [row['archetype_similarity'] for row in rows],
+        })
+    rebuild_meta_stats(db)
+    _classifier = ArchetypeClassifier(names, centroids, card_ids)
+    return {
+        'decklists': len(ids),
+        'cards': len(card_ids),
+        'archetypes': len(names),
+        'relabelled': relabelled,
+        'load_seconds': round(loaded - start, 3),
+        'fit_seconds': round(fitted - loaded, 3),
+        'seconds': round(time.perf_counter() - start, 3),
+    }
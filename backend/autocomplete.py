@@ -0,0 +1,145 @@
+"""
+In-memory prefix index over card names for type-ahead.
+
+Names are normalized (accents stripped, lowercased, punctuation collapsed to
+spaces) and kept in sorted arrays, so a lookup is a binary search plus a short
+scan with no database round-trip. The index is immutable; rebuilds construct a
+new one and swap the module-level reference.
+
+Bootstrap and the catalog sync build it in their own process. A background
+thread in every process also checks every ``CATALOG_CHECK_SECONDS`` whether
+the catalog changed since the index was built (the catalog generation for
+this process, the cards table's Postgres write counters for others) and
+rebuilds it if so, so requests never wait on the database.
+"""
+
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+
+from sqlalchemy import select, text
+
+from cache import catalog_generation
+from database import SessionLocal
+from models import Card as CardModel
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+# How often each process checks whether the catalog changed
+CATALOG_CHECK_SECONDS = 60
+
+CARDS_WRITE_COUNT_SQL = """
+    SELECT n_tup_ins + n_tup_upd + n_tup_del FROM pg_stat_user_tables WHERE relname = 'cards'
+"""
+
+def normalize(text):
+    """Lowercase, strip accents and collapse punctuation to single spaces"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(''.join(ch if ch.isalnum() else ' ' for ch in text.lower()).split())
+
+class PrefixIndex:
+    """
+    Sorted-array prefix index.
+
+    ``_names`` holds each full normalized name; ``_words`` holds every
+    suffix starting at a word boundary (``"white dragon"`` for
+    ``"blue eyes white dragon"``), so queries also match later words.
+    Full-name matches are returned ahead of word matches.
+    """
+
+    def __init__(self, cards=()):
+        self._cards = []
+        names = []
+        words = []
+        for card_id, name in cards:
+            idx = len(self._cards)
+            self._cards.append({'id': card_id, 'name': name})
+            key = normalize(name)
+            names.append((key, idx))
+            parts = key.split(' ')
+            for i in range(1, len(parts)):
+                words.append((' '.join(parts[i:]), idx))
+        names.sort()
+        words.sort()
+        self._name_keys = [key for key, _ in names]
+        self._name_refs = [idx for _, idx in names]
+        self._word_keys = [key for key, _ in words]
+        self._word_refs = [idx for _, idx in words]
+
+    def __len__(self):
+        return len(self._cards)
+
+    @staticmethod
+    def _scan(keys, refs, prefix, limit, seen, out):
+        i = bisect_left(keys, prefix)
+        while i < len(keys) and len(out) < limit and keys[i].startswith(prefix):
+            idx = refs[i]
+            if idx not in seen:
+                seen.add(idx)
+                out.append(idx)
+            i += 1
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """Return up to ``limit`` cards whose name or a later word starts with ``query``"""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        seen = set()
+        out = []
+        self._scan(self._name_keys, self._name_refs, prefix, limit, seen, out)
+        self._scan(self._word_keys, self._word_refs, prefix, limit, seen, out)
+        return [self._cards[idx] for idx in out]
+
+_lock = threading.Lock()
+_index = PrefixIndex()
+# (catalog generation, cards write count) the index was built at
+_built = None
+_thread = None
+
+def get_index():
+    return _index
+
+def cards_write_count(db):
+    return db.execute(text(CARDS_WRITE_COUNT_SQL)).scalar()
+
+def rebuild_index(db):
+    """Rebuild the index from the cards table and swap it in"""
+    global _index, _built
+    built = (catalog_generation(), cards_write_count(db))
+    _index = PrefixIndex(db.execute(select(CardModel.id, CardModel.name)).all())
+    _built = built
+    return _index
+
+def refresh_if_stale():
+    """Rebuild the index if the catalog changed since it was built; True if it did"""
+    db = SessionLocal()
+    try:
+        if _built == (catalog_generation(), cards_write_count(db)):
+            return False
+        rebuild_index(db)
+        return True
+    finally:
+        db.close()
+
+def _refresh_loop():
+    while True:
+        # Bootstrap builds the first index
+        time.sleep(CATALOG_CHECK_SECONDS)
+        try:
+            if refresh_if_stale():
+                print(f"Autocomplete index rebuilt with {len(_index)} card names.")
+        except Exception as e:
+            print(f"Error refreshing autocomplete index: {e}")
+
+def start_refresh():
+    """Start the periodic index refresh thread unless it is already running"""
+    global _thread
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return _thread
+        _thread = threading.Thread(target=_refresh_loop, name='autocomplete', daemon=True)
+        _thread.start()
+        return _thread
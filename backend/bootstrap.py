@@ -0,0 +1,215 @@
+"""
+Background catalog bootstrapping and delta sync.
+
+Vendors and the YGOPRODeck catalog are loaded on a daemon thread started from
+the app lifespan, so workers accept requests immediately and serve whatever is
+already in the database while the load runs. Later syncs run on the same kind
+of thread. Progress is exposed through ``get_status()`` for the /health and
+/ready endpoints.
+
+Every worker bootstraps, since the autocomplete index is per process, but
+the steps run under a Postgres advisory lock so only one worker at a time
+creates partitions or loads the catalog; the others then find the work
+done. A failed bootstrap is retried every ``RETRY_SECONDS``.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+
+from database import SessionLocal, engine
+from models import Card as CardModel, CatalogLoad as CatalogLoadModel, Vendor as VendorModel
+from ingestion import fetch_catalog, ingest_cards, sync_cards, format_stats, format_sync_stats
+import autocomplete
+import partitions
+
+# Arbitrary key for pg_advisory_lock, shared by every worker
+BOOTSTRAP_LOCK_KEY = 7306241
+
+RETRY_SECONDS = 60
+
+_lock = threading.Lock()
+_thread = None
+_sync_thread = None
+_status = {
+    'state': 'pending',  # pending, running, ready, failed
+    'step': None,
+    'cards': 0,
+    'prices': 0,
+    'started_at': None,
+    'finished_at': None,
+    'error': None,
+    'syncing': False,
+    'last_sync': None,
+}
+
+def _update(**fields):
+    with _lock:
+        _status.update(fields)
+
+def get_status():
+    """Snapshot of the bootstrap progress"""
+    with _lock:
+        return dict(_status)
+
+# --- Ensure vendors exist before card/price population ---
+def create_vendors_on_startup():
+    db = SessionLocal()
+    try:
+        existing = db.query(VendorModel).count()
+        if existing == 0:
+            vendors = [
+                VendorModel(id='tcgplayer', name='TCGPlayer', url='https://www.tcgplayer.com', api_endpoint='https://api.tcgplayer.com', created_at=datetime.now(), updated_at=datetime.now()),
+                VendorModel(id='ebay', name='eBay', url='https://www.ebay.com', api_endpoint='https://api.ebay.com', created_at=datetime.now(), updated_at=datetime.now()),
+                VendorModel(id='cardmarket', name='Cardmarket', url='https://www.cardmarket.com', api_endpoint='https://api.cardmarket.com', created_at=datetime.now(), updated_at=datetime.now()),
+            ]
+            for v in vendors:
+                db.add(v)
+            db.commit()
+            print("Vendors table populated.")
+        else:
+            print(f"Vendors table already has {existing} vendors. Skipping vendor population.")
+    finally:
+        db.close()
+
+def populate_cards_on_startup():
+    """
+    Load the catalog and its prices from YGOPRODeck unless a load has finished.
+
+    ``ingest_cards`` commits per batch, so a load that failed partway leaves
+    cards behind; it is resumed with the idempotent delta sync.
+    """
+    db = SessionLocal()
+    try:
+        card_count = db.query(CardModel).count()
+        if db.query(CatalogLoadModel).filter(CatalogLoadModel.finished_at.isnot(None)).first():
+            _update(cards=card_count)
+            print(f"Cards table already has {card_count} cards. Skipping population.")
+            return
+        load = CatalogLoadModel(started_at=datetime.now())
+        db.add(load)
+        db.commit()
+        if card_count == 0:
+            print("Cards table is empty. Streaming catalog from YGOPRODeck...")
+            stats = ingest_cards(
+                db,
+                fetch_catalog(),
+                on_batch=lambda cards, prices: _update(cards=cards, prices=prices),
+            )
+            print(f"Successfully populated {format_stats(stats)}")
+        else:
+            print(f"Catalog load did not finish with {card_count} cards. Resuming with a sync...")
+            stats = sync_cards(db, fetch_catalog(), on_batch=lambda stats: _update(cards=card_count + stats['inserted']))
+            print(f"Catalog sync: {format_sync_stats(stats)}")
+        load.finished_at = datetime.now()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def refresh_autocomplete():
+    """Rebuild the in-memory card name index from the cards table"""
+    db = SessionLocal()
+    try:
+        index = autocomplete.rebuild_index(db)
+        print(f"Autocomplete index built with {len(index)} card names.")
+    finally:
+        db.close()
+
+def ensure_price_partitions():
+    """Create the upcoming monthly price_history partitions"""
+    db = SessionLocal()
+    try:
+        created = partitions.ensure_partitions(db)
+        db.commit()
+        if created:
+            print(f"Created price_history partitions: {', '.join(created)}")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def bootstrap_steps():
+    """Run the bootstrap steps while holding the bootstrap advisory lock"""
+    with engine.connect() as conn:
+        _update(step='lock')
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {'key': BOOTSTRAP_LOCK_KEY})
+        # The lock is held by the session, so do not sit idle in a transaction
+        conn.commit()
+        try:
+            _update(step='partitions')
+            ensure_price_partitions()
+            _update(step='vendors')
+            create_vendors_on_startup()
+            _update(step='cards')
+            populate_cards_on_startup()
+            _update(step='autocomplete')
+            refresh_autocomplete()
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': BOOTSTRAP_LOCK_KEY})
+            conn.commit()
+
+def run_bootstrap():
+    """Create vendors, then load the catalog, recording progress and retrying until it succeeds"""
+    _update(state='running', started_at=datetime.now().isoformat(), finished_at=None, error=None)
+    while True:
+        try:
+            bootstrap_steps()
+            break
+        except Exception as e:
+            print(f"Error bootstrapping catalog, retrying in {RETRY_SECONDS}s: {e}")
+            _update(state='failed', error=str(e), finished_at=datetime.now().isoformat())
+        time.sleep(RETRY_SECONDS)
+        _update(state='running', finished_at=None)
+    _update(state='ready', step=None, error=None, finished_at=datetime.now().isoformat())
+
+def sync_catalog():
+    """Run a delta sync of the catalog against YGOPRODeck and return its stats"""
+    db = SessionLocal()
+    try:
+        stats = sync_cards(db, fetch_catalog())
+        print(f"Catalog sync: {format_sync_stats(stats)}")
+        if stats['inserted'] or stats['updated']:
+            refresh_autocomplete()
+        return stats
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def run_sync():
+    """Delta sync wrapper that records the outcome in the status"""
+    _update(syncing=True)
+    try:
+        stats = sync_catalog()
+    except Exception as e:
+        print(f"Error syncing catalog: {e}")
+        _update(syncing=False, last_sync={'error': str(e), 'finished_at': datetime.now().isoformat()})
+        return
+    _update(syncing=False, last_sync=dict(stats, finished_at=datetime.now().isoformat()))
+
+def start_sync():
+    """Start a background delta sync unless one is already running"""
+    global _sync_thread
+    with _lock:
+        if _sync_thread is not None and _sync_thread.is_alive():
+            return _sync_thread
+        _sync_thread = threading.Thread(target=run_sync, name='catalog-sync', daemon=True)
+        _sync_thread.start()
+        return _sync_thread
+
+def start_bootstrap():
+    """Start the bootstrap thread unless one is already running"""
+    global _thread
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return _thread
+        _thread = threading.Thread(target=run_bootstrap, name='catalog-bootstrap', daemon=True)
+        _thread.start()
+        return _thread
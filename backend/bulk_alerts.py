@@ -0,0 +1,221 @@
+"""
+Vectorized re-evaluation of every active price alert against current prices.
+
+Used after a bulk import or an outage, when ticks may have been written
+without going through the event-driven engine in ``alerts``. Active alerts
+and the rows of ``card_latest_price`` are loaded into NumPy arrays and each
+alert is paired with every vendor price of its card, so every trigger is
+computed in a handful of array operations instead of a Python loop per
+alert. Each pair compares one vendor's price in its own currency, as the
+event-driven engine does per tick; an alert fires at most once per run,
+for the vendor furthest past its target.
+
+Conditions are the event-driven engine's, applied to each vendor's latest
+tick and the tick before it (``previous_price``):
+
+- above: the price is at or over ``target_price``
+- below: the price is at or under ``target_price``
+- change: the latest tick moved at least ``target_price`` percent from the
+  previous one
+
+An alert that has never been triggered fires whenever its condition holds,
+since ticks that crossed it may never have been evaluated. Alerts already
+triggered at or after the latest tick was recorded are skipped, so
+re-running the evaluator does not queue the same event twice; for a newer
+tick, an above/below alert fires again only if that tick crossed its target,
+not while the price merely stays past it.
+"""
+
+import csv
+import io
+import time
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import Float, cast, select
+
+from models import CardLatestPrice as CardLatestPriceModel, PriceAlert as PriceAlertModel
+from alerts import ALERT_TYPES, stamp_triggered_alerts
+
+ABOVE, BELOW, CHANGE = range(len(ALERT_TYPES))
+
+def group_extreme(groups, values, size):
+    """
+    Row index of the largest non-NaN value in each group, -1 for empty groups.
+
+    ``groups`` holds each row's group number in ``range(size)``.
+    """
+    best = np.full(size, -1)
+    valid = np.flatnonzero(~np.isnan(values))
+    if not len(valid):
+        return best
+    # Sort by group, then value; the last row of each group run is its maximum
+    order = valid[np.lexsort((values[valid], groups[valid]))]
+    sorted_groups = groups[order]
+    last = np.append(sorted_groups[1:] != sorted_groups[:-1], True)
+    best[sorted_groups[last]] = order[last]
+    return best
+
+def signed_values(types, price, move):
+    """Per row, the value an alert of each type maximises and compares with its target"""
+    return np.select([types == ABOVE, types == BELOW], [price, -price], move)
+
+# Numeric columns are read as floats; building Decimals dominates load time otherwise
+
+def load_alerts(db):
+    rows = db.execute(
+        select(
+            PriceAlertModel.id, PriceAlertModel.user_id, PriceAlertModel.card_id,
+            PriceAlertModel.alert_type, cast(PriceAlertModel.target_price, Float), PriceAlertModel.triggered_at,
+        ).where(
+            PriceAlertModel.is_active == True,
+            PriceAlertModel.alert_type.in_(ALERT_TYPES),
+            PriceAlertModel.target_price.isnot(None),
+        )
+    ).all()
+    ids, users, cards, types, targets, triggered = zip(*rows) if rows else ((),) * 6
+    type_codes = {alert_type: code for code, alert_type in enumerate(ALERT_TYPES)}
+    return {
+        'id': np.array(ids, dtype=object),
+        'user_id': np.array(users, dtype=object),
+        'card_id': np.array(cards, dtype=object),
+        'type': np.array([type_codes[t] for t in types], dtype=np.int8),
+        'target': np.array(targets, dtype=float),
+        'triggered_at': np.array(triggered, dtype='datetime64[us]'),
+    }
+
+def load_prices(db):
+    """Latest price per card and vendor, with the vendor's tick before it"""
+    rows = db.execute(
+        select(
+            CardLatestPriceModel.card_id, CardLatestPriceModel.vendor_id, cast(CardLatestPriceModel.price, Float),
+            cast(CardLatestPriceModel.previous_price, Float), CardLatestPriceModel.currency,
+            CardLatestPriceModel.recorded_at,
+        )
+    ).all()
+    cards, vendors, prices, previous, currencies, recorded = zip(*rows) if rows else ((),) * 6
+    return {
+        'card_id': np.array(cards, dtype=object),
+        'vendor_id': np.array(vendors, dtype=object),
+        'price': np.array(prices, dtype=float),
+        'previous': np.array([np.nan if p is None else p for p in previous], dtype=float),
+        'currency': np.array(currencies, dtype=object),
+        'recorded_at': np.array(recorded, dtype='datetime64[us]'),
+    }
+
+def percent_move(price, previous):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(previous > 0, np.abs(price - previous) / previous * 100, np.nan)
+
+def find_triggers(alerts, prices):
+    """
+    Evaluate every alert at once.
+
+    Returns ``(alert_rows, price_rows)``: positions of the triggered alerts and
+    of the price row that triggered each of them.
+    """
+    if not len(alerts['id']) or not len(prices['card_id']):
+        return np.array([], dtype=int), np.array([], dtype=int)
+    # Fixed-width strings sort several times faster than object arrays
+    price_card = prices['card_id'].astype(str)
+    by_card = np.argsort(price_card, kind='stable')
+    sorted_cards = price_card[by_card]
+
+    # One pair per alert and vendor price of its card; each card's prices
+    # are a contiguous run of the sorted cards
+    alert_card = alerts['card_id'].astype(str)
+    first = np.searchsorted(sorted_cards, alert_card, side='left')
+    counts = np.searchsorted(sorted_cards, alert_card, side='right') - first
+    pair_alert = np.repeat(np.arange(len(alert_card)), counts)
+    offsets = np.arange(len(pair_alert)) - np.repeat(np.cumsum(counts) - counts, counts)
+    row = by_card[first[pair_alert] + offsets]
+    types = alerts['type'][pair_alert]
+    target = signed_values(types, alerts['target'][pair_alert], alerts['target'][pair_alert])
+
+    price = prices['price'][row]
+    previous = prices['previous'][row]
+    value = signed_values(types, price, percent_move(price, previous))
+    # NaN (no previous tick) compares false, so it never counts as past the target
+    was_past = (types != CHANGE) & (signed_values(types, previous, previous) >= target)
+    triggered_at = alerts['triggered_at'][pair_alert]
+    never = np.isnat(triggered_at)
+    # NaT compares false, so never-triggered alerts are always eligible
+    newer = ~(triggered_at >= prices['recorded_at'][row])
+    hit = (value >= target) & newer & (never | ~was_past)
+
+    # Per alert, the hit furthest past its target
+    best = group_extreme(pair_alert, np.where(hit, value, np.nan), len(alert_card))
+    triggered = np.flatnonzero(best >= 0)
+    return triggered, row[best[triggered]]
+
+EVENT_COLUMNS = (
+    'alert_id', 'user_id', 'card_id', 'vendor_id', 'alert_type', 'target_price',
+    'previous_price', 'price', 'currency', 'recorded_at', 'created_at',
+)
+
+def copy_alert_events(db, events):
+    """Write event rows with COPY on the session's connection, inside its transaction"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for event in events:
+        writer.writerow(['' if event[column] is None else event[column] for column in EVENT_COLUMNS])
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY price_alert_events ({', '.join(EVENT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    finally:
+        cursor.close()
+
+def reevaluate_alerts(db):
+    """
+    Re-check all active alerts against card_latest_price and queue events.
+
+    Events are written with one COPY and the triggered_at stamps with one
+    UPDATE; the caller commits. Returns stats with counts, elapsed seconds and alerts/sec.
+    """
+    start = time.perf_counter()
+    now = datetime.now()
+    alerts = load_alerts(db)
+    prices = load_prices(db)
+    loaded = time.perf_counter()
+    triggered, rows = find_triggers(alerts, prices)
+    evaluated = time.perf_counter()
+    events = [
+        {
+            'alert_id': alerts['id'][a],
+            'user_id': alerts['user_id'][a],
+            'card_id': alerts['card_id'][a],
+            'vendor_id': prices['vendor_id'][p],
+            'alert_type': ALERT_TYPES[alerts['type'][a]],
+            'target_price': float(alerts['target'][a]),
+            'previous_price': None if np.isnan(prices['previous'][p]) else float(prices['previous'][p]),
+            'price': float(prices['price'][p]),
+            'currency': prices['currency'][p],
+            'recorded_at': prices['recorded_at'][p].item(),
+            'created_at': now,
+        }
+        for a, p in zip(triggered.tolist(), rows.tolist())
+    ]
+    if events:
+        copy_alert_events(db, events)
+        stamp_triggered_alerts(db, {event['alert_id'] for event in events}, now)
+    elapsed = time.perf_counter() - start
+    count = len(alerts['id'])
+    return {
+        'alerts': count,
+        'prices': len(prices['card_id']),
+        'triggered': len(events),
+        'load_seconds': round(loaded - start, 3),
+        'evaluate_seconds': round(evaluated - loaded, 3),
+        'seconds': round(elapsed, 3),
+        'alerts_per_sec': round(count / elapsed, 1) if elapsed > 0 else float(count),
+    }
+
+def format_stats(stats):
+    return (
+        f"{stats['alerts']} alerts against {stats['prices']} prices, {stats['triggered']} triggered "
+        f"in {stats['seconds']}s (load {stats['load_seconds']}s, evaluate {stats['evaluate_seconds']}s, "
+        f"{stats['alerts_per_sec']} alerts/sec)"
+    )
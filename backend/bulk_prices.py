@@ -0,0 +1,195 @@
+"""
+Streaming bulk ingestion of price points for POST /price-history/bulk.
+
+The request body is read chunk by chunk and split into lines, so only the
+current batch of rows is ever held in memory. Each line is one NDJSON object
+or one CSV record (the first CSV line is the header), so CSV fields must not
+contain newlines, even quoted ones. Lines longer than ``MAX_LINE_BYTES`` abort
+the request. Rows are validated as
+they arrive; every ``BULK_BATCH_SIZE`` rows the valid ones are written with a
+single multi-row INSERT (``prices.write_prices``) and committed on their own,
+together with the derived latest-price and rollup tables. The response
+lists accepted and rejected counts per batch along with the first errors.
+"""
+
+import csv
+import json
+import math
+import uuid
+from datetime import datetime
+
+from sqlalchemy import select
+
+from models import Card as CardModel, Vendor as VendorModel
+from prices import write_prices
+
+BULK_BATCH_SIZE = 5000
+
+# At most this many error messages are reported per batch
+MAX_BATCH_ERRORS = 20
+
+NDJSON_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+CSV_TYPES = ('text/csv',)
+BULK_CONTENT_TYPES = NDJSON_TYPES + CSV_TYPES
+
+REQUIRED_FIELDS = ('card_id', 'vendor_id', 'price', 'currency', 'recorded_at')
+OPTIONAL_FIELDS = ('id', 'condition', 'rarity', 'set_code')
+
+# Largest value price_history.price (Numeric(10, 2)) can hold
+MAX_PRICE = 99999999.99
+
+# Longest line accepted; a body without newlines is rejected instead of buffered
+MAX_LINE_BYTES = 64 * 1024
+
+class LineTooLong(ValueError):
+    pass
+
+async def iter_lines(chunks, max_line_bytes=MAX_LINE_BYTES):
+    """Split an async stream of byte chunks into lines without buffering the whole body"""
+    buffer = b''
+    async for chunk in chunks:
+        buffer += chunk
+        lines = buffer.split(b'\n')
+        buffer = lines.pop()
+        if len(buffer) > max_line_bytes or any(len(line) > max_line_bytes for line in lines):
+            raise LineTooLong(f"lines must not exceed {max_line_bytes} bytes")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+def record_parser(content_type):
+    """
+    Return ``parse(text)`` turning one line into a dict of raw field values.
+
+    For CSV the first call consumes the header and returns None.
+    """
+    if content_type in NDJSON_TYPES:
+        def parse(text):
+            record = json.loads(text)
+            if not isinstance(record, dict):
+                raise ValueError("expected a JSON object")
+            return record
+        return parse
+
+    header = []
+    def parse(text):
+        values = next(csv.reader([text]))
+        if not header:
+            header.extend(name.strip() for name in values)
+            return None
+        if len(values) != len(header):
+            raise ValueError(f"expected {len(header)} columns, got {len(values)}")
+        return dict(zip(header, values))
+    return parse
+
+def clean_price_row(record, now):
+    """Validate one raw record and return a price_history row, raising ValueError on bad input"""
+    missing = [field for field in REQUIRED_FIELDS if record.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    try:
+        price = round(float(record['price']), 2)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid price {record['price']!r}")
+    if not math.isfinite(price):
+        raise ValueError(f"invalid price {record['price']!r}")
+    if price < 0:
+        raise ValueError("price must not be negative")
+    if price > MAX_PRICE:
+        raise ValueError(f"price must not exceed {MAX_PRICE}")
+    try:
+        recorded_at = datetime.fromisoformat(str(record['recorded_at']))
+    except ValueError:
+        raise ValueError(f"invalid recorded_at {record['recorded_at']!r}")
+    if recorded_at.tzinfo is not None:
+        # Stored timestamps are naive local time, like datetime.now()
+        recorded_at = recorded_at.astimezone().replace(tzinfo=None)
+    row = {field: (str(record[field]) if record.get(field) not in (None, '') else None) for field in OPTIONAL_FIELDS}
+    row.update(
+        id=row['id'] or str(uuid.uuid4()),
+        card_id=str(record['card_id']),
+        vendor_id=str(record['vendor_id']),
+        price=price,
+        currency=str(record['currency']),
+        recorded_at=recorded_at,
+        created_at=now,
+    )
+    return row
+
+def load_vendor_ids(db):
+    return set(db.execute(select(VendorModel.id)).scalars())
+
+def write_price_batch(db, rows, vendor_ids):
+    """
+    Write one batch of validated ``(line, row)`` pairs and commit.
+
+    Rows for unknown cards or vendors and rows already stored (same id and
+    recorded_at, or same card, vendor, condition and recorded_at) are rejected; returns
+    ``(accepted, errors)``.
+    """
+    errors = []
+    card_ids = {row['card_id'] for _, row in rows}
+    known_cards = set(db.execute(select(CardModel.id).where(CardModel.id.in_(card_ids))).scalars())
+    valid = []
+    for line, row in rows:
+        if row['card_id'] not in known_cards:
+            errors.append((line, f"unknown card_id {row['card_id']!r}"))
+        elif row['vendor_id'] not in vendor_ids:
+            errors.append((line, f"unknown vendor_id {row['vendor_id']!r}"))
+        else:
+            valid.append((line, row))
+    if not valid:
+        return 0, errors
+    # Rows are matched by identity, so a second row reusing a key is a duplicate
+    written = {id(row) for row in write_prices(db, [row for _, row in valid])}
+    db.commit()
+    errors.extend((line, "duplicate price record") for line, row in valid if id(row) not in written)
+    return len(written), errors
+
+async def ingest_price_stream(chunks, content_type, write, batch_size=BULK_BATCH_SIZE):
+    """
+    Parse, validate and write a streamed body batch by batch.
+
+    ``write(rows)`` persists a list of ``(line, row)`` pairs and returns
+    ``(accepted, errors)``; it is awaited, so callers can push blocking
+    database work onto a thread. Returns totals plus one summary per batch.
+    """
+    parse = record_parser(content_type)
+    now = datetime.now()
+    summary = {'accepted': 0, 'rejected': 0, 'batches': []}
+    rows = []
+    errors = []
+
+    async def flush():
+        accepted, write_errors = await write(rows) if rows else (0, [])
+        batch_errors = sorted(errors + write_errors)
+        summary['batches'].append({
+            'batch': len(summary['batches']) + 1,
+            'accepted': accepted,
+            'rejected': len(batch_errors),
+            'errors': [{'line': line, 'error': error} for line, error in batch_errors[:MAX_BATCH_ERRORS]],
+        })
+        summary['accepted'] += accepted
+        summary['rejected'] += len(batch_errors)
+        rows.clear()
+        errors.clear()
+
+    line_no = 0
+    async for raw in iter_lines(chunks):
+        line_no += 1
+        try:
+            text = raw.decode('utf-8').strip()
+            if not text:
+                continue
+            record = parse(text)
+            if record is None:
+                continue
+            rows.append((line_no, clean_price_row(record, now)))
+        except (ValueError, csv.Error) as e:
+            errors.append((line_no, str(e)))
+        if len(rows) + len(errors) >= batch_size:
+            await flush()
+    if rows or errors or not summary['batches']:
+        await flush()
+    return summary
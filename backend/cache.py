@@ -0,0 +1,141 @@
+"""
+Small in-process caches for hot read paths.
+
+Caches that hold catalog-derived data register themselves with
+``catalog_cache()``. Catalog ingestion and sync call ``invalidate_catalog()``,
+which bumps the catalog generation and drops their entries right away instead
+of waiting for the TTL. Each worker process has its own caches, so a write
+made by another process is only picked up once the TTL expires.
+
+/cards caches whole pages and totals per normalized filter tuple. Totals are
+included by default for offset paging and only on request
+(``include_total=true``) for cursor paging.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after ``ttl`` seconds.
+
+    Once ``maxsize`` entries are stored, the least recently used one is
+    evicted on insert. ``get_or_set`` coalesces concurrent misses for the same
+    key, so only one caller computes the value while the others wait for it.
+    Values computed before an ``invalidate()`` are not stored.
+    """
+
+    def __init__(self, maxsize=256, ttl=60.0, name=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.generation = 0
+        self._data = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        # Caller must hold self._lock
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def _store(self, key, value, generation):
+        # Caller must hold self._lock
+        if generation != self.generation:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get_or_set(self, key, compute):
+        """Return the cached value for ``key``, computing and storing it on a miss"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            inflight = self._inflight.setdefault(key, threading.Lock())
+        with inflight:
+            with self._lock:
+                value = self._lookup(key)
+                if value is not _MISSING:
+                    # Another caller filled it while we waited
+                    self.coalesced += 1
+                    return value
+                self.misses += 1
+                generation = self.generation
+            try:
+                value = compute()
+                with self._lock:
+                    self._store(key, value, generation)
+            finally:
+                with self._lock:
+                    if self._inflight.get(key) is inflight:
+                        del self._inflight[key]
+        return value
+
+    def invalidate(self):
+        """Drop every entry and bump the generation"""
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'generation': self.generation,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+_catalog_lock = threading.Lock()
+_catalog_generation = 0
+_catalog_caches = []
+
+def catalog_cache(name, maxsize=256, ttl=60.0):
+    """Create a TTLCache that is invalidated whenever the card catalog changes"""
+    cache = TTLCache(maxsize=maxsize, ttl=ttl, name=name)
+    with _catalog_lock:
+        _catalog_caches.append(cache)
+    return cache
+
+def invalidate_catalog():
+    """Bump the catalog generation and drop every catalog-derived cache entry"""
+    global _catalog_generation
+    with _catalog_lock:
+        _catalog_generation += 1
+        caches = list(_catalog_caches)
+    for cache in caches:
+        cache.invalidate()
+
+def catalog_generation():
+    return _catalog_generation
+
+def catalog_cache_stats():
+    with _catalog_lock:
+        caches = list(_catalog_caches)
+    return {
+        'catalog_generation': _catalog_generation,
+        'caches': {cache.name: cache.stats() for cache in caches},
+    }
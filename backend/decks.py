@@ -0,0 +1,55 @@
+"""
+Helpers for the relational ``deck_cards`` index over decklist JSONB zones.
+
+Decklist value and card usage are answered from this index with one
+aggregate query each (value joins it to ``card_latest_price``), instead of
+unpacking the JSONB of every decklist.
+"""
+
+from sqlalchemy import delete, insert
+
+from models import DeckCard as DeckCardModel
+
+# Decklist attribute holding each zone's JSONB list
+DECK_ZONES = {
+    'main': 'mainDeck',
+    'extra': 'extraDeck',
+    'side': 'sideDeck',
+}
+
+def deck_card_rows(decklist):
+    """
+    Flatten a decklist's zones into deck_cards rows, summing repeated entries.
+
+    A missing quantity counts as one copy; entries with a quantity of zero or
+    less are skipped.
+    """
+    rows = {}
+    for zone, attr in DECK_ZONES.items():
+        for entry in getattr(decklist, attr) or []:
+            card_id = entry.get('cardId')
+            if not card_id:
+                continue
+            quantity = entry.get('quantity')
+            quantity = 1 if quantity is None else int(quantity)
+            if quantity <= 0:
+                continue
+            key = (zone, str(card_id))
+            rows[key] = rows.get(key, 0) + quantity
+    return [
+        {
+            'decklist_id': decklist.id,
+            'tournament_id': decklist.tournamentId,
+            'zone': zone,
+            'card_id': card_id,
+            'quantity': quantity,
+        }
+        for (zone, card_id), quantity in rows.items()
+    ]
+
+def sync_deck_cards(db, decklist):
+    """Replace the deck_cards rows of ``decklist``; the caller commits"""
+    db.execute(delete(DeckCardModel).where(DeckCardModel.decklist_id == decklist.id))
+    rows = deck_card_rows(decklist)
+    if rows:
+        db.execute(insert(DeckCardModel), rows)
@@ -0,0 +1,65 @@
+"""
+Largest-Triangle-Three-Buckets downsampling for price charts.
+
+LTTB keeps the first and last point, splits the rest into equal buckets and
+from each bucket keeps the point forming the largest triangle with the point
+kept from the previous bucket and the average of the next bucket. Peaks and
+dips survive, unlike plain striding or averaging. Bucket averages and the
+per-bucket triangle areas are computed with NumPy, so the Python-level loop
+runs once per output point rather than once per input point.
+"""
+
+import numpy as np
+
+MIN_POINTS = 3
+
+def lttb_indices(x, y, n):
+    """Indices of the ``n`` points LTTB keeps from a series sorted by ``x``"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    length = len(x)
+    if n >= length or n < MIN_POINTS:
+        return np.arange(length)
+
+    # Bucket i covers [edges[i], edges[i + 1]); the first and last points stand alone
+    every = (length - 2) / (n - 2)
+    edges = (np.arange(n - 1) * every).astype(int) + 1
+    edges[-1] = length - 1
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+    # The last bucket looks ahead to the final point instead of a bucket average
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    out = np.empty(n, dtype=int)
+    out[0] = 0
+    out[-1] = length - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        xs, ys = x[lo:hi], y[lo:hi]
+        area = np.abs((x[a] - next_x[i]) * (ys - y[a]) - (x[a] - xs) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+def lttb_select(series, x, y, max_points):
+    """
+    Downsample several interleaved series at once.
+
+    ``series``, ``x`` and ``y`` are parallel sequences (e.g. vendor id,
+    timestamp, price). Each series is reduced to at most ``max_points`` with
+    LTTB; returns the kept positions in their original order.
+    """
+    series = np.asarray(series)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = []
+    for key in np.unique(series):
+        positions = np.flatnonzero(series == key)
+        order = positions[np.argsort(x[positions], kind='stable')]
+        keep.append(order[lttb_indices(x[order], y[order], max_points)])
+    if not keep:
+        return []
+    return np.sort(np.concatenate(keep)).tolist()
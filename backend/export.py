@@ -0,0 +1,138 @@
+"""
+Streaming export of price_history for GET /export/price-history and
+scripts/export_price_history.py.
+
+Rows are read through a server-side cursor ``EXPORT_BATCH_SIZE`` at a time
+and each batch is encoded and handed out before the next is fetched, so
+memory stays flat however many rows match. Formats:
+
+- csv: a header line, then the rows of each batch
+- parquet: one row group per batch
+- arrow: an Arrow IPC stream with one record batch per batch
+
+Rows are not sorted; partitions are scanned oldest month first, so output
+is roughly in ``recorded_at`` order without a sort over the whole table.
+"""
+
+import csv
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import exists, select
+
+from database import engine
+from models import CardSet as CardSetModel, PriceHistory as PriceHistoryModel
+
+EXPORT_BATCH_SIZE = 20000
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+EXPORT_COLUMNS = (
+    'id', 'card_id', 'vendor_id', 'price', 'currency', 'condition', 'rarity', 'set_code', 'recorded_at',
+)
+
+EXPORT_SCHEMA = pa.schema([
+    ('id', pa.string()),
+    ('card_id', pa.string()),
+    ('vendor_id', pa.string()),
+    ('price', pa.decimal128(10, 2)),
+    ('currency', pa.string()),
+    ('condition', pa.string()),
+    ('rarity', pa.string()),
+    ('set_code', pa.string()),
+    ('recorded_at', pa.timestamp('us')),
+])
+
+def export_query(start=None, end=None, vendor_id=None, set_name=None):
+    """
+    Select the exported columns of price_history.
+
+    ``start`` is inclusive and ``end`` exclusive; ``set_name`` keeps cards
+    printed in that set.
+    """
+    query = select(*(getattr(PriceHistoryModel, column) for column in EXPORT_COLUMNS))
+    if start is not None:
+        query = query.where(PriceHistoryModel.recorded_at >= start)
+    if end is not None:
+        query = query.where(PriceHistoryModel.recorded_at < end)
+    if vendor_id:
+        query = query.where(PriceHistoryModel.vendor_id == vendor_id)
+    if set_name:
+        query = query.where(exists().where(
+            CardSetModel.card_id == PriceHistoryModel.card_id,
+            CardSetModel.set_name == set_name,
+        ))
+    return query
+
+def iter_batches(query, batch_size=EXPORT_BATCH_SIZE, bind=None):
+    """Yield lists of row tuples from a server-side cursor on a connection of its own"""
+    with (bind or engine).connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that collects bytes until they are drained"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def to_record_batch(rows):
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, EXPORT_SCHEMA)],
+        schema=EXPORT_SCHEMA,
+    )
+
+def encode_csv(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in batches:
+        writer.writerows(
+            (id_, card_id, vendor_id, price, currency, condition, rarity, set_code, recorded_at.isoformat())
+            for id_, card_id, vendor_id, price, currency, condition, rarity, set_code, recorded_at in rows
+        )
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def encode_arrow(batches, fmt):
+    sink = _ChunkSink()
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(sink, EXPORT_SCHEMA)
+    else:
+        writer = pa.ipc.new_stream(sink, EXPORT_SCHEMA)
+    for rows in batches:
+        if rows:
+            writer.write_batch(to_record_batch(rows))
+        chunk = sink.drain()
+        if chunk:
+            yield chunk
+    writer.close()
+    yield sink.drain()
+
+def export_price_history(fmt, batches):
+    """Encode row batches as ``fmt``, yielding bytes chunk by chunk"""
+    if fmt == 'csv':
+        return encode_csv(batches)
+    return encode_arrow(batches, fmt)
@@ -0,0 +1,415 @@
+"""
+Streaming, batched ingestion of the YGOPRODeck catalog.
+
+The card payload is parsed incrementally from the HTTP response, mapped in
+batches, and written with multi-row INSERTs so neither the raw payload nor the
+full set of ORM objects has to be held in memory at once.
+"""
+
+import hashlib
+import json
+import resource
+import sys
+import time
+import uuid
+from datetime import datetime
+
+import requests
+from sqlalchemy import Numeric, String, column, delete, func, select, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from models import Card as CardModel, CardSet as CardSetModel
+from models import CardLatestPrice as CardLatestPriceModel
+from cache import invalidate_catalog
+from prices import write_prices
+
+# YGOPRODeck API URL
+YGOPRODECK_API = "https://db.ygoprodeck.com/api/v7/cardinfo.php"
+
+# Cards mapped and written per INSERT round-trip
+BATCH_SIZE = 1000
+
+# Bytes read from the HTTP response per chunk
+CHUNK_SIZE = 64 * 1024
+
+# (vendor_id, key in the mapped card, currency) for prices shipped with the catalog
+VENDOR_PRICE_FIELDS = [
+    ("tcgplayer", "tcgplayer_price", "USD"),
+    ("ebay", "ebay_price", "USD"),
+    ("cardmarket", "cardmarket_price", "EUR"),
+]
+
+CARD_COLUMNS = set(CardModel.__table__.columns.keys())
+
+# Bookkeeping fields and vendor prices (tracked in price_history) that must
+# not affect a card's fingerprint
+FINGERPRINT_EXCLUDED = {'fingerprint', 'createdAt', 'updatedAt'} | {key for _, key, _ in VENDOR_PRICE_FIELDS}
+
+# Printing fields left out of the fingerprint; set prices churn daily, so
+# sync_cards refreshes them in a separate pass (update_set_prices)
+PRINTING_FINGERPRINT_EXCLUDED = {'set_price'}
+
+# Map YGOPRODeck card data to your CardModel fields
+def map_card(ygocard):
+    # Extract price info
+    price_info = ygocard.get('card_prices', [{}])[0]
+    tcgplayer_price = price_info.get('tcgplayer_price')
+    ebay_price = price_info.get('ebay_price')
+    cardmarket_price = price_info.get('cardmarket_price')
+
+    # Determine reprint status
+    card_sets = ygocard.get('card_sets', [])
+    is_reprint = len(card_sets) > 1
+    printings = [
+        {
+            'set_name': setinfo.get('set_name', ''),
+            'set_code': setinfo.get('set_code', ''),
+            'rarity': setinfo.get('set_rarity') or None,
+            'set_price': parse_price(setinfo.get('set_price')),
+        }
+        for setinfo in card_sets
+    ]
+
+    # Banlist info
+    banlist_info = ygocard.get('banlist_info', {})
+    is_banned = bool(banlist_info.get('ban_tcg') == 'Banned')
+    is_limited = bool(banlist_info.get('ban_tcg') == 'Limited')
+    is_semi_limited = bool(banlist_info.get('ban_tcg') == 'Semi-Limited')
+
+    return {
+        'id': str(ygocard.get('id', '')),
+        'name': ygocard.get('name', ''),
+        'type': ygocard.get('type', ''),
+        'attribute': ygocard.get('attribute'),
+        'level': ygocard.get('level'),
+        'race': ygocard.get('race'),
+        'attack': ygocard.get('atk'),
+        'defense': ygocard.get('def'),
+        'description': ygocard.get('desc', ''),
+        'imageUrl': ygocard.get('card_images', [{}])[0].get('image_url', ''),
+        'rarity': ', '.join([setinfo.get('set_rarity', '') for setinfo in card_sets]),
+        'set': ', '.join([setinfo.get('set_name', '') for setinfo in card_sets]),
+        'setCode': ', '.join([setinfo.get('set_code', '') for setinfo in card_sets]),
+        'cardNumber': ygocard.get('id', ''),
+        'isReprint': is_reprint,
+        'isBanned': is_banned,
+        'isLimited': is_limited,
+        'isSemiLimited': is_semi_limited,
+        'createdAt': '',
+        'updatedAt': '',
+        # Optionally, store price info in a separate table or as extra fields
+        'tcgplayer_price': tcgplayer_price,
+        'ebay_price': ebay_price,
+        'cardmarket_price': cardmarket_price,
+        # One entry per printing, stored in the card_sets table
+        'card_sets': printings,
+    }
+
+def is_tcg_card(ygocard):
+    """True if at least one printing is neither OCG nor Speed Duel"""
+    card_sets = ygocard.get('card_sets', [])
+    return any(
+        'OCG' not in setinfo.get('set_name', '') and 'Speed Duel' not in setinfo.get('set_name', '')
+        for setinfo in card_sets
+    )
+
+def parse_price(price):
+    """Return a vendor price as float, or None if missing, zero or malformed"""
+    if not price or price in ("0.00", ""):
+        return None
+    try:
+        return float(price)
+    except (TypeError, ValueError):
+        return None
+
+def card_fingerprint(card_data):
+    """Stable hash of the catalog fields and printings of a mapped card, ignoring prices"""
+    payload = {k: v for k, v in card_data.items() if k not in FINGERPRINT_EXCLUDED}
+    payload['card_sets'] = [
+        {k: v for k, v in printing.items() if k not in PRINTING_FINGERPRINT_EXCLUDED}
+        for printing in payload.get('card_sets', [])
+    ]
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def iter_json_array(chunks, key='data'):
+    """
+    Yield the elements of the top-level ``key`` array of a JSON document one by one.
+
+    ``chunks`` is any iterable of text chunks (e.g. ``response.iter_content(decode_unicode=True)``).
+    Only the element currently being decoded and the unread tail of the
+    buffer are kept in memory.
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer = ''
+    pos = 0
+
+    def read_more():
+        nonlocal buffer, pos
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return False
+        if isinstance(chunk, bytes):
+            chunk = chunk.decode('utf-8')
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    # Find the opening bracket of the requested array
+    marker = f'"{key}"'
+    while True:
+        idx = buffer.find(marker, pos)
+        if idx != -1:
+            bracket = buffer.find('[', idx + len(marker))
+            if bracket != -1:
+                pos = bracket + 1
+                break
+        if not read_more():
+            return
+
+    while True:
+        # Skip whitespace and separators between elements
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos >= len(buffer):
+            if not read_more():
+                raise ValueError(f"Unterminated '{key}' array in JSON payload")
+            continue
+        if buffer[pos] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Element is split across chunks
+            if not read_more():
+                raise
+            continue
+        pos = end
+        yield item
+
+def iter_batches(items, size=BATCH_SIZE):
+    """Group an iterable into lists of at most ``size`` items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def build_rows(ygocards, now):
+    """Map a batch of YGOPRODeck cards to card, card_sets and price_history rows"""
+    card_rows = []
+    set_rows = []
+    price_rows = []
+    for ygocard in ygocards:
+        if not is_tcg_card(ygocard):
+            continue
+        card_data = map_card(ygocard)
+        card_row = {k: v for k, v in card_data.items() if k in CARD_COLUMNS}
+        card_row['fingerprint'] = card_fingerprint(card_data)
+        card_rows.append(card_row)
+        printings = card_data['card_sets']
+        set_rows.extend(dict(printing, card_id=card_data['id']) for printing in printings)
+        # Prices shipped with the catalog are attributed to the first printing
+        first = printings[0] if printings else {}
+        for vendor_id, price_key, currency in VENDOR_PRICE_FIELDS:
+            price_val = parse_price(card_data.get(price_key))
+            if price_val is None:
+                continue
+            price_rows.append({
+                'id': str(uuid.uuid4()),
+                'card_id': card_data['id'],
+                'vendor_id': vendor_id,
+                'price': price_val,
+                'currency': currency,
+                'condition': "NM",
+                'rarity': first.get('rarity'),
+                'set_code': first.get('set_code') or None,
+                'recorded_at': now,
+                'created_at': now,
+            })
+    return card_rows, set_rows, price_rows
+
+def peak_memory_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    if sys.platform != 'darwin':
+        peak *= 1024
+    return round(peak / (1024 * 1024), 2)
+
+def ingest_cards(db, ygocards, batch_size=BATCH_SIZE, on_batch=None):
+    """
+    Write YGOPRODeck cards and their vendor prices in bounded batches.
+
+    Each batch is written with one multi-row INSERT per table and committed,
+    so memory stays proportional to ``batch_size`` rather than the catalog.
+    Cards that already exist are left alone and prices equal to the latest
+    stored one are skipped, so re-running a load is safe and writes little.
+    ``on_batch(cards, prices)`` is called with running totals after every
+    commit. Returns a stats dict with row counts, elapsed seconds, rows/sec
+    and the process peak RSS in MB.
+    """
+    start = time.perf_counter()
+    card_count = 0
+    price_count = 0
+    now = datetime.now()
+    latest_prices = load_latest_prices(db)
+    for batch in iter_batches(ygocards, batch_size):
+        card_rows, set_rows, price_rows = build_rows(batch, now)
+        if card_rows:
+            insert_cards(db, card_rows)
+        if set_rows:
+            insert_card_sets(db, set_rows)
+        written = write_prices(db, changed_prices(price_rows, latest_prices))
+        db.commit()
+        invalidate_catalog()
+        card_count += len(card_rows)
+        price_count += len(written)
+        if on_batch:
+            on_batch(card_count, price_count)
+    elapsed = time.perf_counter() - start
+    rows = card_count + price_count
+    return {
+        'cards': card_count,
+        'prices': price_count,
+        'seconds': round(elapsed, 3),
+        'rows_per_sec': round(rows / elapsed, 1) if elapsed > 0 else float(rows),
+        'peak_memory_mb': peak_memory_mb(),
+    }
+
+def load_fingerprints(db):
+    """Map of card id to stored fingerprint"""
+    return dict(db.execute(select(CardModel.id, CardModel.fingerprint)).all())
+
+def load_latest_prices(db):
+    """Map of (card_id, vendor_id) to the most recently recorded price"""
+    rows = db.execute(
+        select(CardLatestPriceModel.card_id, CardLatestPriceModel.vendor_id, CardLatestPriceModel.price)
+    )
+    return {(card_id, vendor_id): float(price) for card_id, vendor_id, price in rows}
+
+def changed_prices(price_rows, latest_prices):
+    """Price rows whose price differs from the latest stored one for their card and vendor"""
+    # price_history stores two decimals, so compare at that precision
+    return [
+        row for row in price_rows
+        if latest_prices.get((row['card_id'], row['vendor_id'])) != round(row['price'], 2)
+    ]
+
+def insert_cards(db, card_rows):
+    """Insert new cards, leaving existing ones untouched"""
+    db.execute(pg_insert(CardModel).on_conflict_do_nothing(index_elements=[CardModel.id]), card_rows)
+
+def insert_card_sets(db, set_rows):
+    """Insert printings, skipping exact duplicates listed twice by the source"""
+    stmt = pg_insert(CardSetModel).on_conflict_do_nothing(
+        index_elements=[CardSetModel.card_id, CardSetModel.set_code, func.coalesce(CardSetModel.rarity, '')]
+    )
+    db.execute(stmt, set_rows)
+
+def update_set_prices(db, set_rows):
+    """Copy set_price onto the stored printings, writing only those whose price moved; returns the count"""
+    if not set_rows:
+        return 0
+    fresh = values(
+        column('card_id', String), column('set_code', String), column('rarity', String),
+        column('set_price', Numeric(10, 2)),
+        name='fresh',
+    ).data([(row['card_id'], row['set_code'], row['rarity'] or '', row['set_price']) for row in set_rows])
+    stmt = update(CardSetModel).where(
+        CardSetModel.card_id == fresh.c.card_id,
+        CardSetModel.set_code == fresh.c.set_code,
+        func.coalesce(CardSetModel.rarity, '') == fresh.c.rarity,
+        CardSetModel.set_price.is_distinct_from(fresh.c.set_price),
+    ).values(set_price=fresh.c.set_price)
+    return db.execute(stmt).rowcount
+
+def replace_card_sets(db, card_ids, set_rows):
+    """Swap the stored printings of ``card_ids`` for ``set_rows``"""
+    db.execute(delete(CardSetModel).where(CardSetModel.card_id.in_(card_ids)))
+    if set_rows:
+        insert_card_sets(db, set_rows)
+
+def upsert_cards(db, card_rows):
+    """INSERT ... ON CONFLICT (id) DO UPDATE for a batch of card rows"""
+    stmt = pg_insert(CardModel)
+    update_columns = {
+        name: stmt.excluded[name]
+        for name in card_rows[0]
+        if name not in ('id', 'createdAt')
+    }
+    db.execute(stmt.on_conflict_do_update(index_elements=[CardModel.id], set_=update_columns), card_rows)
+
+def sync_cards(db, ygocards, batch_size=BATCH_SIZE, on_batch=None):
+    """
+    Bring the stored catalog in line with a fresh YGOPRODeck payload.
+
+    Each mapped card is fingerprinted and compared with the fingerprint stored
+    on its row; only new or changed cards are upserted. Set prices are not
+    part of the fingerprint, so unchanged cards get them in a separate UPDATE
+    that only touches printings whose price moved. A price point is
+    appended only when a vendor price differs from the latest stored one, so
+    writes scale with the number of changes rather than the catalog size.
+    ``on_batch(stats)`` is called with running totals after every commit.
+    """
+    start = time.perf_counter()
+    fingerprints = load_fingerprints(db)
+    latest_prices = load_latest_prices(db)
+    stats = {'seen': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'prices': 0}
+    now = datetime.now()
+    for batch in iter_batches(ygocards, batch_size):
+        card_rows, set_rows, price_rows = build_rows(batch, now)
+        changed = []
+        for row in card_rows:
+            stored = fingerprints.get(row['id'], False)
+            if stored == row['fingerprint']:
+                stats['unchanged'] += 1
+                continue
+            if stored is False:
+                row['createdAt'] = now.isoformat()
+                stats['inserted'] += 1
+            else:
+                stats['updated'] += 1
+            row['updatedAt'] = now.isoformat()
+            changed.append(row)
+        moved = changed_prices(price_rows, latest_prices)
+        changed_ids = {row['id'] for row in changed}
+        if changed:
+            upsert_cards(db, changed)
+            replace_card_sets(db, changed_ids, [row for row in set_rows if row['card_id'] in changed_ids])
+        update_set_prices(db, [row for row in set_rows if row['card_id'] not in changed_ids])
+        written = write_prices(db, moved)
+        db.commit()
+        if changed:
+            invalidate_catalog()
+        stats['seen'] += len(card_rows)
+        stats['prices'] += len(written)
+        if on_batch:
+            on_batch(dict(stats))
+    elapsed = time.perf_counter() - start
+    stats['seconds'] = round(elapsed, 3)
+    stats['peak_memory_mb'] = peak_memory_mb()
+    return stats
+
+def fetch_catalog(url=YGOPRODECK_API):
+    """Stream the YGOPRODeck catalog, yielding raw card dicts as they are parsed"""
+    with requests.get(url, stream=True) as response:
+        response.raise_for_status()
+        response.encoding = response.encoding or 'utf-8'
+        yield from iter_json_array(response.iter_content(chunk_size=CHUNK_SIZE, decode_unicode=True))
+
+def format_stats(stats):
+    return (
+        f"{stats['cards']} cards and {stats['prices']} price records in {stats['seconds']}s "
+        f"({stats['rows_per_sec']} rows/sec, peak memory {stats['peak_memory_mb']} MB)"
+    )
+
+def format_sync_stats(stats):
+    return (
+        f"{stats['seen']} cards checked, {stats['inserted']} inserted, {stats['updated']} updated, "
+        f"{stats['unchanged']} unchanged, {stats['prices']} price points appended in {stats['seconds']}s"
+    )
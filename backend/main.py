@@ -1,18 +1,47 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel
 from typing import List, Optional
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, distinct, exists, func, literal, select, tuple_, union_all
+from sqlalchemy.orm import Session, selectinload
 from fastapi import Depends
 from database import SessionLocal
 from models import Tournament as TournamentModel, Decklist as DecklistModel, Card as CardModel
 from models import Vendor as VendorModel, PriceHistory as PriceHistoryModel, PriceAlert as PriceAlertModel
+from models import PriceAlertEvent as PriceAlertEventModel
+from models import CardSet as CardSetModel, DeckCard as DeckCardModel, CardLatestPrice as CardLatestPriceModel
 from models import Base
-from datetime import datetime
-import requests
+from search import apply_card_search, SEARCH_MODES
+import autocomplete
+import alerts
+import movers
+from cache import catalog_cache, catalog_cache_stats
+from pagination import encode_cursor, decode_cursor
+from decks import sync_deck_cards
+import meta
+import archetypes
+from downsample import MIN_POINTS as MIN_CHART_POINTS, lttb_select
+from rollups import ROLLUP_MODELS, RESOLUTIONS, bucket_start, pick_resolution
+from prices import latest_prices, write_prices
+from bulk_prices import BULK_CONTENT_TYPES, LineTooLong, ingest_price_stream, load_vendor_ids, write_price_batch
+from export import EXPORT_FORMATS, export_price_history, export_query, iter_batches
+from bootstrap import start_bootstrap, start_sync, get_status as get_bootstrap_status
+from datetime import date, datetime
+from contextlib import asynccontextmanager
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 import asyncio
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load vendors and the card catalog in the background so the app can serve immediately
+    start_bootstrap()
+    movers.start_refresh()
+    archetypes.start_refresh()
+    autocomplete.start_refresh()
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,148 +51,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# YGOPRODeck API URL
-YGOPRODECK_API = "https://db.ygoprodeck.com/api/v7/cardinfo.php"
-
-# Map YGOPRODeck card data to your CardModel fields
-def map_card(ygocard):
-    # Extract price info
-    price_info = ygocard.get('card_prices', [{}])[0]
-    tcgplayer_price = price_info.get('tcgplayer_price')
-    ebay_price = price_info.get('ebay_price')
-    cardmarket_price = price_info.get('cardmarket_price')
-
-    # Determine reprint status
-    card_sets = ygocard.get('card_sets', [])
-    is_reprint = len(card_sets) > 1
-
-    # Banlist info
-    banlist_info = ygocard.get('banlist_info', {})
-    is_banned = bool(banlist_info.get('ban_tcg') == 'Banned')
-    is_limited = bool(banlist_info.get('ban_tcg') == 'Limited')
-    is_semi_limited = bool(banlist_info.get('ban_tcg') == 'Semi-Limited')
-
-    return {
-        'id': str(ygocard.get('id', '')),
-        'name': ygocard.get('name', ''),
-        'type': ygocard.get('type', ''),
-        'attribute': ygocard.get('attribute'),
-        'level': ygocard.get('level'),
-        'race': ygocard.get('race'),
-        'attack': ygocard.get('atk'),
-        'defense': ygocard.get('def'),
-        'description': ygocard.get('desc', ''),
-        'imageUrl': ygocard.get('card_images', [{}])[0].get('image_url', ''),
-        'rarity': ', '.join([setinfo.get('rarity', '') for setinfo in card_sets]),
-        'set': ', '.join([setinfo.get('set_name', '') for setinfo in card_sets]),
-        'setCode': ', '.join([setinfo.get('set_code', '') for setinfo in card_sets]),
-        'cardNumber': ygocard.get('id', ''),
-        'isReprint': is_reprint,
-        'isBanned': is_banned,
-        'isLimited': is_limited,
-        'isSemiLimited': is_semi_limited,
-        'createdAt': '',
-        'updatedAt': '',
-        # Optionally, store price info in a separate table or as extra fields
-        'tcgplayer_price': tcgplayer_price,
-        'ebay_price': ebay_price,
-        'cardmarket_price': cardmarket_price,
-    }
-
-def populate_cards_on_startup():
-    """Populate cards table on startup if empty, and populate price_history from YGOPRODeck prices"""
-    try:
-        db = SessionLocal()
-        card_count = db.query(CardModel).count()
-        from models import PriceHistory as PriceHistoryModel, Vendor as VendorModel
-        from datetime import datetime
-        if card_count == 0:
-            print("Cards table is empty. Populating from YGOPRODeck...")
-            # Fetch cards from YGOPRODeck
-            response = requests.get(YGOPRODECK_API)
-            response.raise_for_status()
-            data = response.json()
-            cards = data.get('data', [])
-            print(f"Fetched {len(cards)} cards from YGOPRODeck")
-            # Insert only TCG cards into database
-            tcg_count = 0
-            price_count = 0
-            for ygocard in cards:
-                card_sets = ygocard.get('card_sets', [])
-                # Only add if at least one set is not OCG and not Speed Duel
-                has_tcg_set = any('OCG' not in setinfo.get('set_name', '') and 'Speed Duel' not in setinfo.get('set_name', '') for setinfo in card_sets)
-                if not has_tcg_set:
-                    continue
-                card_data = map_card(ygocard)
-                db_card = CardModel(**{k: v for k, v in card_data.items() if k in CardModel.__table__.columns.keys()})
-                db.add(db_card)
-                tcg_count += 1
-                # Add price history for each vendor if price exists
-                now = datetime.now()
-                for vendor_id, price_key, currency in [
-                    ("tcgplayer", "tcgplayer_price", "USD"),
-                    ("ebay", "ebay_price", "USD"),
-                    ("cardmarket", "cardmarket_price", "EUR")
-                ]:
-                    price = card_data.get(price_key)
-                    if price and price not in ("0.00", None, ""):
-                        try:
-                            price_val = float(price)
-                        except Exception:
-                            continue
-                        price_record = PriceHistoryModel(
-                            id=f"{db_card.id}-{vendor_id}",
-                            card_id=db_card.id,
-                            vendor_id=vendor_id,
-                            price=price_val,
-                            currency=currency,
-                            condition="NM",
-                            rarity=db_card.rarity.split(",")[0] if db_card.rarity else None,
-                            set_code=db_card.setCode.split(",")[0] if db_card.setCode else None,
-                            recorded_at=now,
-                            created_at=now
-                        )
-                        db.add(price_record)
-                        price_count += 1
-            db.commit()
-            print(f"Successfully populated {tcg_count} TCG cards and {price_count} price records into database")
-        else:
-            print(f"Cards table already has {card_count} cards. Skipping population.")
-    except Exception as e:
-        print(f"Error populating cards: {e}")
-    finally:
-        db.close()
-
-# --- Ensure vendors exist before card/price population ---
-def create_vendors_on_startup():
-    from models import Vendor as VendorModel
-    from datetime import datetime
-    db = SessionLocal()
-    try:
-        existing = db.query(VendorModel).count()
-        if existing == 0:
-            vendors = [
-                VendorModel(id='tcgplayer', name='TCGPlayer', url='https://www.tcgplayer.com', api_endpoint='https://api.tcgplayer.com', created_at=datetime.now(), updated_at=datetime.now()),
-                VendorModel(id='ebay', name='eBay', url='https://www.ebay.com', api_endpoint='https://api.ebay.com', created_at=datetime.now(), updated_at=datetime.now()),
-                VendorModel(id='cardmarket', name='Cardmarket', url='https://www.cardmarket.com', api_endpoint='https://api.cardmarket.com', created_at=datetime.now(), updated_at=datetime.now()),
-            ]
-            for v in vendors:
-                db.add(v)
-            db.commit()
-            print("Vendors table populated.")
-        else:
-            print(f"Vendors table already has {existing} vendors. Skipping vendor population.")
-    except Exception as e:
-        print(f"Error populating vendors: {e}")
-    finally:
-        db.close()
-
-# Ensure vendors exist before cards
-create_vendors_on_startup()
-
-# Populate cards on startup
-populate_cards_on_startup()
-
 # --- Remove event scraping import/call ---
 # try:
 #     from scripts.scrape_events import fetch_events, store_events
@@ -210,6 +97,8 @@ class Decklist(BaseModel):
     extraDeck: List[DeckCard]
     sideDeck: List[DeckCard]
     deckType: str
+    archetype: Optional[str] = None  # assigned from the cards; ignored on input
+    archetype_similarity: Optional[float] = None
 
 class Tournament(BaseModel):
     id: str
@@ -222,6 +111,18 @@ class Tournament(BaseModel):
     topCut: int
     decklists: List[Decklist]
 
+class TournamentSummary(BaseModel):
+    """List view of a tournament: its fields plus a decklist count instead of the decklists"""
+    id: str
+    name: str
+    date: str
+    location: str
+    format: str
+    size: int
+    region: str
+    topCut: int
+    decklistCount: int
+
 # --- Price Tracking Models ---
 class Vendor(BaseModel):
     id: str
@@ -243,6 +144,25 @@ class PriceHistory(BaseModel):
     recorded_at: datetime
     created_at: Optional[datetime] = None
 
+class PricePoint(BaseModel):
+    """A raw price tick, or an OHLC bucket whose price is the close"""
+    id: Optional[str] = None
+    card_id: str
+    vendor_id: str
+    price: float
+    currency: str
+    condition: Optional[str] = None
+    rarity: Optional[str] = None
+    set_code: Optional[str] = None
+    recorded_at: datetime
+    created_at: Optional[datetime] = None
+    resolution: str = 'raw'
+    open: Optional[float] = None
+    high: Optional[float] = None
+    low: Optional[float] = None
+    close: Optional[float] = None
+    volume: Optional[int] = None
+
 class PriceAlert(BaseModel):
     id: str
     user_id: str
@@ -252,6 +172,29 @@ class PriceAlert(BaseModel):
     is_active: bool = True
     created_at: Optional[str] = None
     updated_at: Optional[str] = None
+    triggered_at: Optional[datetime] = None
+
+class PriceAlertEvent(BaseModel):
+    id: int
+    alert_id: str
+    user_id: str
+    card_id: str
+    vendor_id: str
+    alert_type: str
+    target_price: float
+    previous_price: Optional[float] = None
+    price: float
+    currency: str
+    recorded_at: datetime
+    created_at: datetime
+    delivered_at: Optional[datetime] = None
+
+class CardBatchRequest(BaseModel):
+    ids: List[str]
+    fields: Optional[List[str]] = None  # projection; 'id' is always returned
+
+class PriceSummaryBatchRequest(BaseModel):
+    card_ids: List[str]
 
 def get_db():
     db = SessionLocal()
@@ -264,14 +207,83 @@ def get_db():
 def read_root():
     return {"message": "MetaMarket FastAPI backend is running!"}
 
+@app.get("/health")
+def health():
+    """Liveness check; always 200 while the process is up"""
+    return {"status": "ok", "bootstrap": get_bootstrap_status()}
+
+@app.get("/ready")
+def ready():
+    """Readiness check; 503 until the catalog bootstrap has finished"""
+    status = get_bootstrap_status()
+    if status['state'] != 'ready':
+        return JSONResponse(status_code=503, content={"ready": False, "bootstrap": status})
+    return {"ready": True, "bootstrap": status}
+
+@app.post("/catalog/sync", status_code=202)
+def trigger_catalog_sync():
+    """Start a background delta sync of the card catalog against YGOPRODeck"""
+    start_sync()
+    return {"detail": "Catalog sync started", "bootstrap": get_bootstrap_status()}
+
 # --- Tournament Endpoints ---
-@app.get("/tournaments", response_model=List[Tournament])
-def get_tournaments(db: Session = Depends(get_db)):
-    return db.query(TournamentModel).all()
+MAX_TOURNAMENT_PAGE = 500
+
+@app.get("/tournaments", response_model=List[TournamentSummary])
+def get_tournaments(
+    limit: int = 100,
+    offset: int = 0,
+    format: Optional[str] = None,
+    region: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Tournament summaries with decklist counts, newest first; date_from/date_to are inclusive ISO dates"""
+    limit = max(1, min(limit, MAX_TOURNAMENT_PAGE))
+    query = db.query(TournamentModel)
+    if format:
+        query = query.filter(TournamentModel.format == format)
+    if region:
+        query = query.filter(TournamentModel.region == region)
+    if date_from:
+        query = query.filter(TournamentModel.date >= date_from)
+    if date_to:
+        query = query.filter(TournamentModel.date <= date_to)
+    tournaments = query.order_by(TournamentModel.date.desc(), TournamentModel.id).offset(offset).limit(limit).all()
+    if not tournaments:
+        return []
+    # Decklists are not loaded; one grouped query counts them for the whole page
+    counts = dict(
+        db.query(DecklistModel.tournamentId, func.count(DecklistModel.id))
+        .filter(DecklistModel.tournamentId.in_([t.id for t in tournaments]))
+        .group_by(DecklistModel.tournamentId)
+        .all()
+    )
+    return [
+        {
+            "id": t.id,
+            "name": t.name,
+            "date": t.date,
+            "location": t.location,
+            "format": t.format,
+            "size": t.size,
+            "region": t.region,
+            "topCut": t.topCut,
+            "decklistCount": counts.get(t.id, 0),
+        }
+        for t in tournaments
+    ]
 
 @app.get("/tournaments/{tournament_id}", response_model=Tournament)
 def get_tournament(tournament_id: str, db: Session = Depends(get_db)):
-    tournament = db.query(TournamentModel).filter(TournamentModel.id == tournament_id).first()
+    # Load decklists with one extra IN query instead of lazily during serialization
+    tournament = (
+        db.query(TournamentModel)
+        .options(selectinload(TournamentModel.decklists))
+        .filter(TournamentModel.id == tournament_id)
+        .first()
+    )
     if not tournament:
         raise HTTPException(status_code=404, detail="Tournament not found")
     return tournament
@@ -289,8 +301,12 @@ def update_tournament(tournament_id: str, tournament: Tournament, db: Session =
     db_tournament = db.query(TournamentModel).filter(TournamentModel.id == tournament_id).first()
     if not db_tournament:
         raise HTTPException(status_code=404, detail="Tournament not found")
+    # Format, region, date and top cut feed every decklist's meta stats
+    deltas = meta.tally(((d, db_tournament) for d in db_tournament.decklists), -1)
     for key, value in tournament.dict().items():
         setattr(db_tournament, key, value)
+    db.flush()
+    meta.apply_meta_deltas(db, meta.tally(((d, db_tournament) for d in db_tournament.decklists), 1, deltas))
     db.commit()
     db.refresh(db_tournament)
     return db_tournament
@@ -300,6 +316,7 @@ def delete_tournament(tournament_id: str, db: Session = Depends(get_db)):
     db_tournament = db.query(TournamentModel).filter(TournamentModel.id == tournament_id).first()
     if not db_tournament:
         raise HTTPException(status_code=404, detail="Tournament not found")
+    meta.apply_meta_deltas(db, meta.tally(((d, db_tournament) for d in db_tournament.decklists), -1))
     db.delete(db_tournament)
     db.commit()
     return {"detail": "Tournament deleted"}
@@ -321,6 +338,10 @@ def get_decklist(tournament_id: str, decklist_id: str, db: Session = Depends(get
 def create_decklist(tournament_id: str, decklist: Decklist, db: Session = Depends(get_db)):
     db_decklist = DecklistModel(**decklist.dict())
     db.add(db_decklist)
+    db.flush()
+    sync_deck_cards(db, db_decklist)
+    archetypes.classify_decklist(db_decklist)
+    meta.apply_meta_deltas(db, meta.tally([(db_decklist, meta.decklist_tournament(db, db_decklist))]))
     db.commit()
     db.refresh(db_decklist)
     return db_decklist
@@ -330,8 +351,13 @@ def update_decklist(tournament_id: str, decklist_id: str, decklist: Decklist, db
     db_decklist = db.query(DecklistModel).filter(DecklistModel.tournamentId == tournament_id, DecklistModel.id == decklist_id).first()
     if not db_decklist:
         raise HTTPException(status_code=404, detail="Decklist not found")
+    deltas = meta.tally([(db_decklist, meta.decklist_tournament(db, db_decklist))], -1)
     for key, value in decklist.dict().items():
         setattr(db_decklist, key, value)
+    db.flush()
+    sync_deck_cards(db, db_decklist)
+    archetypes.classify_decklist(db_decklist)
+    meta.apply_meta_deltas(db, meta.tally([(db_decklist, meta.decklist_tournament(db, db_decklist))], 1, deltas))
     db.commit()
     db.refresh(db_decklist)
     return db_decklist
@@ -341,61 +367,280 @@ def delete_decklist(tournament_id: str, decklist_id: str, db: Session = Depends(
     db_decklist = db.query(DecklistModel).filter(DecklistModel.tournamentId == tournament_id, DecklistModel.id == decklist_id).first()
     if not db_decklist:
         raise HTTPException(status_code=404, detail="Decklist not found")
+    # deck_cards rows go with it through ON DELETE CASCADE
+    meta.apply_meta_deltas(db, meta.tally([(db_decklist, meta.decklist_tournament(db, db_decklist))], -1))
     db.delete(db_decklist)
     db.commit()
     return {"detail": "Decklist deleted"}
 
-@app.get("/cards")
-def get_cards(
-    limit: int = 24, 
-    offset: int = 0, 
-    card_type: Optional[str] = None,
-    attribute: Optional[str] = None,
-    spell_type: Optional[str] = None,
-    trap_type: Optional[str] = None,
-    monster_type: Optional[str] = None,
-    rarity: Optional[str] = None,
-    search: Optional[str] = None,
+@app.get("/tournaments/{tournament_id}/decklists/{decklist_id}/value")
+def get_decklist_value(tournament_id: str, decklist_id: str, db: Session = Depends(get_db)):
+    """Value of a decklist at each vendor's current prices, with how many of its copies each vendor prices"""
+    decklist = db.query(DecklistModel.id).filter(DecklistModel.tournamentId == tournament_id, DecklistModel.id == decklist_id).first()
+    if not decklist:
+        raise HTTPException(status_code=404, detail="Decklist not found")
+    # An empty deck has no deck_cards rows
+    total_quantity = db.query(func.sum(DeckCardModel.quantity)).filter(
+        DeckCardModel.decklist_id == decklist_id, DeckCardModel.tournament_id == tournament_id
+    ).scalar() or 0
+    rows = db.query(
+        CardLatestPriceModel.vendor_id,
+        CardLatestPriceModel.currency,
+        func.sum(DeckCardModel.quantity * CardLatestPriceModel.price).label('total'),
+        func.sum(DeckCardModel.quantity).label('priced_quantity'),
+    ).join(
+        CardLatestPriceModel, CardLatestPriceModel.card_id == DeckCardModel.card_id
+    ).filter(
+        DeckCardModel.decklist_id == decklist_id, DeckCardModel.tournament_id == tournament_id
+    ).group_by(CardLatestPriceModel.vendor_id, CardLatestPriceModel.currency).order_by(CardLatestPriceModel.vendor_id).all()
+    return {
+        "decklist_id": decklist_id,
+        "total_quantity": int(total_quantity),
+        "vendors": [
+            {
+                "vendor_id": row.vendor_id,
+                "currency": row.currency,
+                "total": float(row.total),
+                "priced_quantity": int(row.priced_quantity),
+            }
+            for row in rows
+        ],
+    }
+
+# --- Meta Analysis Endpoints ---
+MAX_META_TRENDS = 20
+
+@app.get("/meta")
+def get_meta(
+    format: Optional[str] = None,
+    region: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(CardModel)
-    
-    # Apply filters
-    if card_type and card_type != 'all':
+    """Archetype usage share and top-cut conversion over the tournament weeks between the dates, inclusive"""
+    total, archetypes = meta.archetype_shares(db, format, region, start, end)
+    return {"format": format, "region": region, "total_decklists": total, "archetypes": archetypes}
+
+@app.get("/meta/trends")
+def get_meta_trends(
+    format: Optional[str] = None,
+    region: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: int = 8,
+    db: Session = Depends(get_db)
+):
+    """Weekly usage share of the most played archetypes"""
+    limit = max(1, min(limit, MAX_META_TRENDS))
+    archetypes, weeks = meta.archetype_trends(db, format, region, start, end, limit)
+    return {"format": format, "region": region, "archetypes": archetypes, "weeks": weeks}
+
+# Cached filtered totals and listing pages for /cards, keyed by the normalized
+# filter tuple; both are dropped whenever catalog ingestion or sync writes cards
+card_count_cache = catalog_cache('card_counts', maxsize=512, ttl=60)
+card_page_cache = catalog_cache('card_pages', maxsize=1024, ttl=60)
+
+# Columns returned for each card; deferred bookkeeping columns are left out
+CARD_FIELDS = [
+    column.key for column in CardModel.__table__.columns
+    if column.key not in ('fingerprint', 'search_vector')
+]
+
+def card_to_dict(card):
+    return {field: getattr(card, field) for field in CARD_FIELDS}
+
+def card_filters(card_type=None, attribute=None, spell_type=None, trap_type=None, monster_type=None, rarity=None, set_name=None, set_code=None):
+    """Normalize /cards filter params into a hashable tuple; 'all' and empty mean unfiltered"""
+    def norm(value):
+        return None if not value or value == 'all' else value
+    return (
+        norm(card_type), norm(attribute), norm(spell_type), norm(trap_type), norm(monster_type),
+        norm(rarity), norm(set_name), norm(set_code),
+    )
+
+def printing_exists(*criteria):
+    """EXISTS over card_sets for the current card, served by the card_sets indexes"""
+    return exists().where(CardSetModel.card_id == CardModel.id, *criteria)
+
+def filter_cards(query, filters):
+    card_type, attribute, spell_type, trap_type, monster_type, rarity, set_name, set_code = filters
+
+    if card_type:
         # For Effect Monster, include all effect monsters (including ritual monsters)
         if card_type == 'Effect Monster':
             query = query.filter(CardModel.type.like('%Effect Monster%'))
         else:
             query = query.filter(CardModel.type == card_type)
     
-    if attribute and attribute != 'all':
+    if attribute:
         query = query.filter(CardModel.attribute == attribute)
     
-    if spell_type and spell_type != 'all':
+    if spell_type:
         query = query.filter(CardModel.race == spell_type)
     
-    if trap_type and trap_type != 'all':
+    if trap_type:
         query = query.filter(CardModel.race == trap_type)
     
-    if monster_type and monster_type != 'all':
+    if monster_type:
         query = query.filter(CardModel.race == monster_type)
     
-    if rarity and rarity != 'all':
+    # Rarity and set filters match any printing of the card
+    if rarity:
         if rarity == 'Unknown':
-            query = query.filter((CardModel.rarity == None) | (CardModel.rarity == ''))
+            query = query.filter(~printing_exists(CardSetModel.rarity != None))
         else:
-            query = query.filter(CardModel.rarity == rarity)
+            query = query.filter(printing_exists(CardSetModel.rarity == rarity))
+    
+    if set_name:
+        query = query.filter(printing_exists(CardSetModel.set_name == set_name))
+    
+    if set_code:
+        query = query.filter(printing_exists(CardSetModel.set_code == set_code))
+    
+    return query
+
+MAX_CARD_PAGE = 100
+
+@app.get("/cards")
+def get_cards(
+    limit: int = 24, 
+    offset: int = 0, 
+    card_type: Optional[str] = None,
+    attribute: Optional[str] = None,
+    spell_type: Optional[str] = None,
+    trap_type: Optional[str] = None,
+    monster_type: Optional[str] = None,
+    rarity: Optional[str] = None,
+    set_name: Optional[str] = None,
+    set_code: Optional[str] = None,
+    search: Optional[str] = None,
+    search_mode: str = 'prefix',
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
+    db: Session = Depends(get_db)
+):
+    """List cards, optionally filtered and searched; keyset-paged by next_cursor, or by offset for searches"""
+    if search_mode not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"search_mode must be one of {', '.join(SEARCH_MODES)}")
+    if cursor and search:
+        raise HTTPException(status_code=400, detail="cursor paging is not supported for search results; use offset")
+    limit = max(1, min(limit, MAX_CARD_PAGE))
+    offset = max(offset, 0)
+    filters = card_filters(card_type, attribute, spell_type, trap_type, monster_type, rarity, set_name, set_code)
+    if include_total is None:
+        include_total = cursor is None
+    search_key = (search, search_mode) if search else (None, None)
+    page_key = filters + search_key + (limit, None if cursor else offset, cursor, include_total)
+    return card_page_cache.get_or_set(
+        page_key,
+        lambda: list_cards(db, filters, limit, offset, search, search_mode, cursor, include_total),
+    )
+
+def list_cards(db, filters, limit, offset, search, search_mode, cursor, include_total):
+    query = filter_cards(db.query(CardModel), filters)
     
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (CardModel.name.ilike(search_term)) | 
-            (CardModel.description.ilike(search_term))
-        )
+        # Ranked search over the full-text/trigram indexes; name matches come first
+        query = apply_card_search(query, search, search_mode)
     
-    total = query.count()
-    cards = query.offset(offset).limit(limit).all()
-    return { 'cards': cards, 'total': total }
+    total = None
+    if include_total:
+        count_key = filters + ((search, search_mode) if search else (None, None))
+        total = card_count_cache.get_or_set(count_key, query.count)
+    
+    if search:
+        cards = query.offset(offset).limit(limit).all()
+        return { 'cards': [card_to_dict(card) for card in cards], 'total': total, 'next_cursor': None }
+    
+    query = query.order_by(CardModel.name, CardModel.id)
+    if cursor:
+        try:
+            last_name, last_id = decode_cursor(cursor, (str, str))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(tuple_(CardModel.name, CardModel.id) > tuple_(last_name, last_id))
+    else:
+        query = query.offset(offset)
+    # Fetch one extra row to learn whether another page exists
+    cards = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(cards) > limit:
+        cards = cards[:limit]
+        next_cursor = encode_cursor([cards[-1].name, cards[-1].id])
+    return { 'cards': [card_to_dict(card) for card in cards], 'total': total, 'next_cursor': next_cursor }
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """Hit/miss counters and sizes of the catalog caches"""
+    return catalog_cache_stats()
+
+@app.get("/cards/autocomplete")
+def autocomplete_cards(q: str, limit: int = autocomplete.DEFAULT_LIMIT):
+    """Type-ahead card name matches served from the in-memory prefix index"""
+    limit = max(1, min(limit, autocomplete.MAX_LIMIT))
+    return {'query': q, 'results': autocomplete.get_index().search(q, limit)}
+
+card_facet_cache = catalog_cache('card_facets', maxsize=512, ttl=300)
+
+# Bit mask returned by GROUPING(type, attribute, race) for each grouping set
+FACET_GROUPING = {3: 'type', 5: 'attribute', 6: 'race'}
+
+def compute_card_facets(db, filters, search, search_mode):
+    """
+    Value counts for every facet in one round-trip.
+
+    type, attribute and race come from a single GROUPING SETS pass over the
+    filtered cards; rarity counts distinct cards per printing rarity and is
+    UNION ALLed onto the same statement.
+    """
+    query = filter_cards(db.query(CardModel.id, CardModel.type, CardModel.attribute, CardModel.race), filters)
+    if search:
+        query = apply_card_search(query, search, search_mode).order_by(None)
+    filtered = query.cte('filtered')
+
+    grouping = func.grouping(filtered.c.type, filtered.c.attribute, filtered.c.race)
+    grouped = select(
+        grouping.label('grouping'),
+        case((grouping == 3, filtered.c.type), (grouping == 5, filtered.c.attribute), else_=filtered.c.race).label('value'),
+        func.count().label('count'),
+    ).group_by(func.grouping_sets(tuple_(filtered.c.type), tuple_(filtered.c.attribute), tuple_(filtered.c.race)))
+    rarities = select(
+        literal(0).label('grouping'),
+        CardSetModel.rarity.label('value'),
+        func.count(distinct(CardSetModel.card_id)).label('count'),
+    ).where(CardSetModel.card_id.in_(select(filtered.c.id))).group_by(CardSetModel.rarity)
+
+    facets = {'type': [], 'attribute': [], 'race': [], 'rarity': []}
+    for grouping_value, value, count in db.execute(union_all(grouped, rarities)):
+        facets[FACET_GROUPING.get(grouping_value, 'rarity')].append({'value': value, 'count': count})
+    for values in facets.values():
+        values.sort(key=lambda item: (-item['count'], item['value'] or ''))
+    return {'total': sum(item['count'] for item in facets['type']), 'facets': facets}
+
+@app.get("/cards/facets")
+def get_card_facets(
+    card_type: Optional[str] = None,
+    attribute: Optional[str] = None,
+    spell_type: Optional[str] = None,
+    trap_type: Optional[str] = None,
+    monster_type: Optional[str] = None,
+    rarity: Optional[str] = None,
+    set_name: Optional[str] = None,
+    set_code: Optional[str] = None,
+    search: Optional[str] = None,
+    search_mode: str = 'prefix',
+    db: Session = Depends(get_db)
+):
+    """Per-value counts of type, attribute, race and rarity for the given /cards filter"""
+    if search_mode not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"search_mode must be one of {', '.join(SEARCH_MODES)}")
+    filters = card_filters(card_type, attribute, spell_type, trap_type, monster_type, rarity, set_name, set_code)
+    search_key = (search, search_mode) if search else (None, None)
+    return card_facet_cache.get_or_set(
+        filters + search_key,
+        lambda: compute_card_facets(db, filters, search, search_mode),
+    )
 
 @app.get("/cards/{card_id}", response_model=Card)
 def get_card(card_id: str, db: Session = Depends(get_db)):
@@ -404,6 +649,78 @@ def get_card(card_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Card not found")
     return card
 
+# Upper bound on ids per /cards/batch request (main + extra + side deck fits easily)
+MAX_BATCH_IDS = 500
+
+@app.post("/cards/batch")
+def get_cards_batch(batch: CardBatchRequest, db: Session = Depends(get_db)):
+    """Resolve many card ids in request order; unknown ids are listed under missing"""
+    ids = list(dict.fromkeys(batch.ids))
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    fields = CARD_FIELDS
+    if batch.fields:
+        unknown = [field for field in batch.fields if field not in CARD_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        fields = ['id'] + [field for field in dict.fromkeys(batch.fields) if field != 'id']
+    if not ids:
+        return {'cards': [], 'missing': []}
+    rows = db.query(*[getattr(CardModel, field) for field in fields]).filter(CardModel.id.in_(ids)).all()
+    found = {row.id: dict(zip(fields, row)) for row in rows}
+    return {
+        'cards': [found[card_id] for card_id in ids if card_id in found],
+        'missing': [card_id for card_id in ids if card_id not in found],
+    }
+
+@app.get("/cards/{card_id}/usage")
+def get_card_usage(
+    card_id: str,
+    format: Optional[str] = None,
+    region: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Tournament usage of a card: decks running it, those in a top cut and average copies"""
+    scope = [DecklistModel.tournamentId == TournamentModel.id]
+    if format:
+        scope.append(TournamentModel.format == format)
+    if region:
+        scope.append(TournamentModel.region == region)
+    top_cut = (DecklistModel.placement != None) & (TournamentModel.topCut != None) & (DecklistModel.placement <= TournamentModel.topCut)
+    total_decks = (
+        select(func.count(DecklistModel.id))
+        .select_from(DecklistModel)
+        .join(TournamentModel, and_(*scope))
+        .correlate(None)
+        .scalar_subquery()
+    )
+    row = db.execute(
+        select(
+            func.count(distinct(DeckCardModel.decklist_id)).label('decks'),
+            func.count(distinct(DeckCardModel.decklist_id)).filter(top_cut).label('top_cut_decks'),
+            func.count(distinct(DeckCardModel.tournament_id)).label('tournaments'),
+            func.coalesce(func.sum(DeckCardModel.quantity), 0).label('copies'),
+            func.coalesce(func.sum(DeckCardModel.quantity).filter(DeckCardModel.zone == 'main'), 0).label('main'),
+            func.coalesce(func.sum(DeckCardModel.quantity).filter(DeckCardModel.zone == 'extra'), 0).label('extra'),
+            func.coalesce(func.sum(DeckCardModel.quantity).filter(DeckCardModel.zone == 'side'), 0).label('side'),
+            total_decks.label('total_decks'),
+        )
+        .select_from(DeckCardModel)
+        .join(DecklistModel, DecklistModel.id == DeckCardModel.decklist_id)
+        .join(TournamentModel, and_(*scope))
+        .where(DeckCardModel.card_id == card_id)
+    ).one()
+    return {
+        "card_id": card_id,
+        "decks": row.decks,
+        "total_decks": row.total_decks,
+        "usage_rate": round(row.decks / row.total_decks, 4) if row.total_decks else 0.0,
+        "top_cut_decks": row.top_cut_decks,
+        "tournaments": row.tournaments,
+        "avg_copies": round(row.copies / row.decks, 2) if row.decks else 0.0,
+        "copies_by_zone": {"main": row.main, "extra": row.extra, "side": row.side},
+    }
+
 # --- Price Tracking Endpoints ---
 @app.get("/vendors", response_model=List[Vendor])
 def get_vendors(db: Session = Depends(get_db)):
@@ -424,72 +741,183 @@ def create_vendor(vendor: Vendor, db: Session = Depends(get_db)):
     db.refresh(db_vendor)
     return db_vendor
 
-@app.get("/cards/{card_id}/prices", response_model=List[PriceHistory])
+@app.get("/cards/{card_id}/prices", response_model=List[PricePoint])
 def get_card_prices(
     card_id: str, 
     vendor_id: Optional[str] = None,
     days: Optional[int] = 30,
+    resolution: str = 'auto',
+    max_points: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
-    """Get price history for a specific card"""
-    query = db.query(PriceHistoryModel).filter(PriceHistoryModel.card_id == card_id)
-    
-    if vendor_id:
-        query = query.filter(PriceHistoryModel.vendor_id == vendor_id)
-    
+    """Price history for a card as raw ticks or OHLC buckets, optionally downsampled to max_points"""
+    if resolution not in RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of {', '.join(RESOLUTIONS)}")
+    if max_points is not None and max_points < MIN_CHART_POINTS:
+        raise HTTPException(status_code=400, detail=f"max_points must be at least {MIN_CHART_POINTS}")
+
     # Get prices from the last N days
     from datetime import datetime, timedelta
     days_to_use = days if days is not None else 30
     cutoff_date = datetime.now() - timedelta(days=days_to_use)
-    query = query.filter(PriceHistoryModel.recorded_at >= cutoff_date)
-    
-    # Order by recorded_at descending (most recent first)
-    prices = query.order_by(PriceHistoryModel.recorded_at.desc()).all()
-    return prices
+    if resolution == 'auto':
+        resolution = pick_resolution(days_to_use)
+
+    if resolution == 'raw':
+        query = db.query(PriceHistoryModel).filter(PriceHistoryModel.card_id == card_id)
+        if vendor_id:
+            query = query.filter(PriceHistoryModel.vendor_id == vendor_id)
+        query = query.filter(PriceHistoryModel.recorded_at >= cutoff_date)
+        # Order by recorded_at descending (most recent first)
+        points = query.order_by(PriceHistoryModel.recorded_at.desc()).all()
+        return downsample_prices(points, max_points, lambda p: (p.vendor_id, p.recorded_at, p.price))
+
+    model = ROLLUP_MODELS[resolution]
+    query = db.query(model).filter(model.card_id == card_id)
+    if vendor_id:
+        query = query.filter(model.vendor_id == vendor_id)
+    query = query.filter(model.bucket >= bucket_start(cutoff_date, resolution))
+    points = [
+        {
+            'card_id': row.card_id,
+            'vendor_id': row.vendor_id,
+            'price': row.close,
+            'currency': row.currency,
+            'recorded_at': row.bucket,
+            'resolution': resolution,
+            'open': row.open,
+            'high': row.high,
+            'low': row.low,
+            'close': row.close,
+            'volume': row.volume,
+        }
+        for row in query.order_by(model.bucket.desc()).all()
+    ]
+    return downsample_prices(points, max_points, lambda p: (p['vendor_id'], p['recorded_at'], p['price']))
+
+def downsample_prices(points, max_points, fields):
+    """Keep at most ``max_points`` per vendor; ``fields(point)`` gives (vendor_id, recorded_at, price)"""
+    if not max_points or len(points) <= max_points:
+        return points
+    series, times, prices = zip(*(fields(p) for p in points))
+    keep = lttb_select(series, [t.timestamp() for t in times], [float(p) for p in prices], max_points)
+    return [points[i] for i in keep]
+
+# Summaries only consider prices recorded within this window
+SUMMARY_WINDOW_DAYS = 7
+
+def price_summary_row(price):
+    return {
+        "vendor_id": price.vendor_id,
+        "price": float(price.price),
+        "currency": price.currency,
+        "condition": price.condition,
+        "recorded_at": price.recorded_at.isoformat() if price.recorded_at else None
+    }
+
+def latest_vendor_prices(db, card_ids):
+    """Current price per vendor for ``card_ids`` within the summary window, from card_latest_price"""
+    prices = latest_prices(db, card_ids, max_age_days=SUMMARY_WINDOW_DAYS)
+    return {card_id: [price_summary_row(row) for row in rows] for card_id, rows in prices.items()}
 
 @app.get("/cards/{card_id}/price-summary")
 def get_card_price_summary(card_id: str, db: Session = Depends(get_db)):
     """Get current price summary for a card across all vendors"""
-    from sqlalchemy import func
-    from datetime import datetime, timedelta
-    
-    # Get the most recent price for each vendor
-    subquery = db.query(
-        PriceHistoryModel.vendor_id,
-        func.max(PriceHistoryModel.recorded_at).label('max_date')
-    ).filter(
-        PriceHistoryModel.card_id == card_id,
-        PriceHistoryModel.recorded_at >= datetime.now() - timedelta(days=7)  # Last 7 days
-    ).group_by(PriceHistoryModel.vendor_id).subquery()
-    
-    prices = db.query(PriceHistoryModel).join(
-        subquery,
-        (PriceHistoryModel.vendor_id == subquery.c.vendor_id) &
-        (PriceHistoryModel.recorded_at == subquery.c.max_date)
-    ).all()
-    
     return {
         "card_id": card_id,
-        "prices": [
-            {
-                "vendor_id": price.vendor_id,
-                "price": float(price.price),
-                "currency": price.currency,
-                "condition": price.condition,
-                "recorded_at": price.recorded_at.isoformat() if price.recorded_at else None
-            }
-            for price in prices
-        ]
+        "prices": latest_vendor_prices(db, [card_id])[card_id]
+    }
+
+@app.post("/price-summary/batch")
+def get_price_summary_batch(batch: PriceSummaryBatchRequest, db: Session = Depends(get_db)):
+    """Price summaries for many cards, one per distinct id in request order"""
+    card_ids = list(dict.fromkeys(batch.card_ids))
+    if len(card_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    if not card_ids:
+        return {"summaries": []}
+    prices = latest_vendor_prices(db, card_ids)
+    return {
+        "summaries": [{"card_id": card_id, "prices": prices[card_id]} for card_id in card_ids]
     }
 
 @app.post("/price-history", response_model=PriceHistory)
 def create_price_record(price_history: PriceHistory, db: Session = Depends(get_db)):
-    """Add a new price record for a card"""
-    db_price = PriceHistoryModel(**price_history.dict())
-    db.add(db_price)
+    """Add a new price record for a card; 409 if the same id and recorded_at or the same tick is already stored"""
+    row = price_history.dict()
+    if row['recorded_at'].tzinfo is not None:
+        # Stored timestamps are naive local time, like datetime.now()
+        row['recorded_at'] = row['recorded_at'].astimezone().replace(tzinfo=None)
+    if not write_prices(db, [row]):
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Price record already exists")
     db.commit()
-    db.refresh(db_price)
-    return db_price
+    return db.get(PriceHistoryModel, (row['id'], row['recorded_at']))
+
+@app.post("/price-history/bulk")
+async def bulk_create_price_records(request: Request, db: Session = Depends(get_db)):
+    """Stream NDJSON or CSV price records in, written and reported in batches"""
+    content_type = request.headers.get('content-type', '').split(';')[0].strip().lower()
+    if content_type not in BULK_CONTENT_TYPES:
+        raise HTTPException(status_code=415, detail=f"Content-Type must be one of {', '.join(BULK_CONTENT_TYPES)}")
+    vendor_ids = await run_in_threadpool(load_vendor_ids, db)
+
+    async def write(rows):
+        return await run_in_threadpool(write_price_batch, db, rows, vendor_ids)
+
+    try:
+        return await ingest_price_stream(request.stream(), content_type, write)
+    except LineTooLong as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/export/price-history")
+def export_price_history_endpoint(
+    format: str = 'csv',
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    vendor_id: Optional[str] = None,
+    set_name: Optional[str] = None,
+):
+    """Stream price history as csv, parquet or arrow; start is inclusive, end exclusive"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if start and end and start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    media_type, extension = EXPORT_FORMATS[format]
+    query = export_query(start, end, vendor_id, set_name)
+    return StreamingResponse(
+        export_price_history(format, iter_batches(query)),
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename="price_history.{extension}"'},
+    )
+
+@app.get("/market/movers")
+def get_market_movers(
+    window: str = '24h',
+    direction: str = 'gainers',
+    sort: str = 'pct',
+    vendor_id: Optional[str] = None,
+    rarity: Optional[str] = None,
+    limit: int = movers.DEFAULT_LIMIT,
+):
+    """Biggest price moves per card and vendor over a window, from the in-memory snapshot"""
+    if window not in movers.WINDOWS:
+        raise HTTPException(status_code=400, detail=f"window must be one of {', '.join(movers.WINDOWS)}")
+    if direction not in movers.DIRECTIONS:
+        raise HTTPException(status_code=400, detail=f"direction must be one of {', '.join(movers.DIRECTIONS)}")
+    if sort not in movers.SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(movers.SORTS)}")
+    limit = max(1, min(limit, movers.MAX_LIMIT))
+    snapshot = movers.get_snapshot()
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail="Market movers are not available yet")
+    return {
+        "window": window,
+        "direction": direction,
+        "sort": sort,
+        "as_of": snapshot.generated_at.isoformat(),
+        "movers": snapshot.windows[window].top(limit, direction, sort, vendor_id, rarity),
+    }
 
 @app.get("/price-alerts", response_model=List[PriceAlert])
 def get_price_alerts(user_id: str, db: Session = Depends(get_db)):
@@ -503,8 +931,28 @@ def get_price_alerts(user_id: str, db: Session = Depends(get_db)):
 @app.post("/price-alerts", response_model=PriceAlert)
 def create_price_alert(price_alert: PriceAlert, db: Session = Depends(get_db)):
     """Create a new price alert for a user"""
+    if price_alert.alert_type not in alerts.ALERT_TYPES:
+        raise HTTPException(status_code=400, detail=f"alert_type must be one of {', '.join(alerts.ALERT_TYPES)}")
+    if price_alert.target_price is None or price_alert.target_price < 0:
+        raise HTTPException(status_code=400, detail="target_price must be a non-negative number")
     db_alert = PriceAlertModel(**price_alert.dict())
     db.add(db_alert)
     db.commit()
     db.refresh(db_alert)
     return db_alert
+
+@app.get("/price-alerts/events", response_model=List[PriceAlertEvent])
+def get_price_alert_events(user_id: str, after_id: Optional[int] = None, limit: int = 50, db: Session = Depends(get_db)):
+    """Triggered alerts for a user, newest first; pass the smallest id seen as after_id to page back"""
+    limit = max(1, min(limit, 200))
+    query = db.query(PriceAlertEventModel).filter(PriceAlertEventModel.user_id == user_id)
+    if after_id is not None:
+        query = query.filter(PriceAlertEventModel.id < after_id)
+    return query.order_by(PriceAlertEventModel.id.desc()).limit(limit).all()
+
+@app.post("/price-alerts/events/claim", response_model=List[PriceAlertEvent])
+def claim_price_alert_events(limit: int = 100, db: Session = Depends(get_db)):
+    """Hand undelivered alert events to a notifier, marking them delivered"""
+    events = alerts.claim_alert_events(db, max(1, min(limit, 1000)))
+    db.commit()
+    return events
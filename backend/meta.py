@@ -0,0 +1,189 @@
+"""
+Meta analysis over tournament decklists: archetype share, top-cut
+conversion and weekly trends by format and region.
+
+``meta_archetype_stats`` holds one row per format, region, tournament week
+and archetype with decklist counts. The decklist and tournament endpoints
+keep it current by tallying the rows a change removes and adds and applying
+the difference with ``apply_meta_deltas`` in the same transaction, so meta
+reads aggregate that small table rather than every decklist.
+
+Decklists are counted under their canonical ``archetype`` (see
+``archetypes``), falling back to the submitted ``deckType``.
+
+A decklist counts towards top-cut conversion when it has a placement and
+its tournament has a ``topCut``; it converted if ``placement <= topCut``.
+"""
+
+from datetime import date, timedelta
+
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from models import Decklist as DecklistModel, MetaArchetypeStat as MetaStatModel, Tournament as TournamentModel
+
+UNKNOWN_ARCHETYPE = 'Unknown'
+
+def archetype_name(deck_type):
+    return (deck_type or '').strip() or UNKNOWN_ARCHETYPE
+
+def week_of(value):
+    """ISO date of the Monday starting the week of ``value``, '' if it is not a date"""
+    if isinstance(value, str):
+        try:
+            value = date.fromisoformat(value[:10])
+        except ValueError:
+            return ''
+    if not isinstance(value, date):
+        return ''
+    return (value - timedelta(days=value.weekday())).isoformat()
+
+def meta_entry(deck_type, placement, format, region, tournament_date, top_cut):
+    """Stats key and (decklists, placed, top_cut) counts contributed by one decklist"""
+    key = (format or '', region or '', week_of(tournament_date), archetype_name(deck_type))
+    placed = placement is not None and top_cut is not None
+    return key, (1, int(placed), int(placed and placement <= top_cut))
+
+def decklist_meta(decklist, tournament):
+    deck_type = decklist.archetype or decklist.deckType
+    if tournament is None:
+        return meta_entry(deck_type, decklist.placement, None, None, None, None)
+    return meta_entry(
+        deck_type, decklist.placement,
+        tournament.format, tournament.region, tournament.date, tournament.topCut,
+    )
+
+def tally(pairs, sign=1, deltas=None):
+    """
+    Add the counts of ``(decklist, tournament)`` pairs, times ``sign``, to ``deltas``.
+
+    Counts are read immediately, so tally with -1 before changing a row and
+    with +1 after.
+    """
+    deltas = {} if deltas is None else deltas
+    for decklist, tournament in pairs:
+        key, counts = decklist_meta(decklist, tournament)
+        current = deltas.setdefault(key, [0, 0, 0])
+        for i, count in enumerate(counts):
+            current[i] += sign * count
+    return deltas
+
+def decklist_tournament(db, decklist):
+    return db.get(TournamentModel, decklist.tournamentId) if decklist.tournamentId else None
+
+def apply_meta_deltas(db, deltas):
+    """Add ``deltas`` to meta_archetype_stats and drop emptied rows; the caller commits"""
+    rows = [
+        {
+            'format': format, 'region': region, 'week': week, 'archetype': archetype,
+            'decklists': decklists, 'placed': placed, 'top_cut': top_cut,
+        }
+        for (format, region, week, archetype), (decklists, placed, top_cut) in deltas.items()
+        if decklists or placed or top_cut
+    ]
+    if not rows:
+        return
+    stmt = pg_insert(MetaStatModel).values(rows)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=['format', 'region', 'week', 'archetype'],
+        set_={
+            'decklists': MetaStatModel.decklists + stmt.excluded.decklists,
+            'placed': MetaStatModel.placed + stmt.excluded.placed,
+            'top_cut': MetaStatModel.top_cut + stmt.excluded.top_cut,
+        },
+    ))
+    removed = [key for key, (decklists, _, _) in deltas.items() if decklists < 0]
+    if removed:
+        db.execute(delete(MetaStatModel).where(
+            tuple_(MetaStatModel.format, MetaStatModel.region, MetaStatModel.week, MetaStatModel.archetype).in_(removed),
+            MetaStatModel.decklists <= 0,
+        ))
+
+def rebuild_meta_stats(db):
+    """Recompute meta_archetype_stats from all decklists; the caller commits"""
+    deltas = {}
+    rows = db.execute(
+        select(
+            func.coalesce(DecklistModel.archetype, DecklistModel.deckType), DecklistModel.placement,
+            TournamentModel.format, TournamentModel.region, TournamentModel.date, TournamentModel.topCut,
+        ).outerjoin(TournamentModel, TournamentModel.id == DecklistModel.tournamentId)
+    )
+    for row in rows:
+        key, counts = meta_entry(*row)
+        current = deltas.setdefault(key, [0, 0, 0])
+        for i, count in enumerate(counts):
+            current[i] += count
+    db.execute(delete(MetaStatModel))
+    apply_meta_deltas(db, deltas)
+    return sum(decklists for decklists, _, _ in deltas.values())
+
+def filter_stats(query, format=None, region=None, start=None, end=None):
+    """Restrict a meta_archetype_stats query; ``start`` and ``end`` are inclusive dates"""
+    if format:
+        query = query.where(MetaStatModel.format == format)
+    if region:
+        query = query.where(MetaStatModel.region == region)
+    if start:
+        query = query.where(MetaStatModel.week >= week_of(start))
+    if end:
+        query = query.where(MetaStatModel.week != '', MetaStatModel.week <= week_of(end))
+    return query
+
+def pct(part, whole):
+    return round(part / whole * 100, 2) if whole else None
+
+def archetype_shares(db, format=None, region=None, start=None, end=None):
+    """Usage share and top-cut conversion per archetype, most played first"""
+    rows = db.execute(filter_stats(
+        select(
+            MetaStatModel.archetype,
+            func.sum(MetaStatModel.decklists),
+            func.sum(MetaStatModel.placed),
+            func.sum(MetaStatModel.top_cut),
+        ).group_by(MetaStatModel.archetype),
+        format, region, start, end,
+    )).all()
+    total = sum(decklists for _, decklists, _, _ in rows)
+    archetypes = [
+        {
+            'archetype': archetype,
+            'decklists': int(decklists),
+            'share': pct(decklists, total),
+            'placed': int(placed),
+            'top_cut': int(top_cut),
+            'top_cut_rate': pct(top_cut, placed),
+        }
+        for archetype, decklists, placed, top_cut in rows
+    ]
+    archetypes.sort(key=lambda item: (-item['decklists'], item['archetype']))
+    return int(total), archetypes
+
+def archetype_trends(db, format=None, region=None, start=None, end=None, limit=8):
+    """
+    Weekly usage share of the ``limit`` most played archetypes.
+
+    Tournaments without a date are left out. Returns the archetypes and one
+    entry per week with its decklist total and each archetype's share.
+    """
+    rows = db.execute(filter_stats(
+        select(MetaStatModel.week, MetaStatModel.archetype, func.sum(MetaStatModel.decklists))
+        .where(MetaStatModel.week != '')
+        .group_by(MetaStatModel.week, MetaStatModel.archetype),
+        format, region, start, end,
+    )).all()
+    weeks = {}
+    totals = {}
+    for week, archetype, decklists in rows:
+        weeks.setdefault(week, {})[archetype] = int(decklists)
+        totals[archetype] = totals.get(archetype, 0) + int(decklists)
+    top = sorted(totals, key=lambda archetype: (-totals[archetype], archetype))[:limit]
+    series = []
+    for week in sorted(weeks):
+        counts = weeks[week]
+        total = sum(counts.values())
+        series.append({
+            'week': week,
+            'decklists': total,
+            'shares': {archetype: pct(counts.get(archetype, 0), total) for archetype in top},
+        })
+    return top, series
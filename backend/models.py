@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, Date, Text, Numeric, DateTime
-from sqlalchemy.orm import declarative_base, relationship
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, String, Integer, Float, Boolean, ForeignKey, Date, Text, Numeric, DateTime, Computed, Index, text
+from sqlalchemy.orm import declarative_base, relationship, deferred
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 
 Base = declarative_base()
 
@@ -26,6 +26,56 @@ class Card(Base):
     isSemiLimited = Column(Boolean, default=False)
     createdAt = Column(String)
     updatedAt = Column(String)
+    # Hash of the mapped YGOPRODeck fields, used by the catalog delta sync
+    fingerprint = deferred(Column(String))
+    # Weighted full-text vector: name as A, description as B
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+    ))
+
+    __table_args__ = (
+        Index('idx_cards_name_id', 'name', 'id'),
+        Index('idx_cards_type', 'type'),
+        Index('idx_cards_attribute', 'attribute'),
+        Index('idx_cards_race', 'race'),
+        Index('idx_cards_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('idx_cards_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        Index('idx_cards_description_trgm', 'description', postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'}),
+    )
+
+    sets = relationship('CardSet', back_populates='card', cascade='all, delete-orphan', order_by='CardSet.id')
+
+class CardSet(Base):
+    """One printing of a card: the set it appeared in and at which rarity"""
+    __tablename__ = 'card_sets'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    card_id = Column(String, ForeignKey('cards.id', ondelete='CASCADE'), nullable=False)
+    set_name = Column(String, nullable=False)
+    set_code = Column(String, nullable=False)
+    rarity = Column(String)
+    set_price = Column(Numeric(precision=10, scale=2))
+
+    card = relationship('Card', back_populates='sets')
+
+    __table_args__ = (
+        # rarity is nullable, so NULL rarities are compared as ''
+        Index('uq_card_sets_card_code_rarity', 'card_id', 'set_code', text("coalesce(rarity, '')"), unique=True),
+        Index('idx_card_sets_rarity_card', 'rarity', 'card_id'),
+        Index('idx_card_sets_set_name_card', 'set_name', 'card_id'),
+        Index('idx_card_sets_set_code', 'set_code'),
+    )
+
+class CatalogLoad(Base):
+    """One bootstrap load of the YGOPRODeck catalog; finished_at is set once it ran to the end"""
+    __tablename__ = 'catalog_loads'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime)
 
 class Tournament(Base):
     __tablename__ = 'tournaments'
@@ -39,6 +89,12 @@ class Tournament(Base):
     topCut = Column(Integer)
     decklists = relationship('Decklist', back_populates='tournament', cascade='all, delete-orphan')
 
+    __table_args__ = (
+        Index('idx_tournaments_date', 'date'),
+        Index('idx_tournaments_format_date', 'format', 'date'),
+        Index('idx_tournaments_region_date', 'region', 'date'),
+    )
+
 class Decklist(Base):
     __tablename__ = 'decklists'
     id = Column(String, primary_key=True)
@@ -49,8 +105,53 @@ class Decklist(Base):
     mainDeck = Column(JSONB)
     extraDeck = Column(JSONB)
     sideDeck = Column(JSONB)
+    # Canonical archetype assigned from the deck's cards by ``archetypes``
+    archetype = Column(String)
+    archetype_similarity = Column(Float)
     tournament = relationship('Tournament', back_populates='decklists')
 
+    __table_args__ = (
+        Index('idx_decklists_tournament_id', 'tournamentId'),
+    )
+
+class DeckCard(Base):
+    """
+    Relational index over a decklist's JSONB zones: one row per card per zone.
+
+    Kept in sync with ``Decklist.mainDeck``/``extraDeck``/``sideDeck`` by the
+    decklist endpoints. ``tournament_id`` is copied from the decklist so
+    per-tournament aggregates do not need the join.
+    """
+    __tablename__ = 'deck_cards'
+    decklist_id = Column(String, ForeignKey('decklists.id', ondelete='CASCADE'), primary_key=True)
+    zone = Column(String, primary_key=True)  # main, extra, side
+    card_id = Column(String, primary_key=True)
+    tournament_id = Column(String)
+    quantity = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index('idx_deck_cards_card_id', 'card_id'),
+        Index('idx_deck_cards_tournament_card', 'tournament_id', 'card_id'),
+    )
+
+class MetaArchetypeStat(Base):
+    """
+    Decklist counts per format, region, tournament week and archetype.
+
+    Maintained incrementally by ``meta`` as decklists and tournaments are
+    written, so meta queries sum a few rows instead of scanning decklists.
+    Unknown format, region or week are stored as ''.
+    """
+    __tablename__ = 'meta_archetype_stats'
+    format = Column(String, primary_key=True)
+    region = Column(String, primary_key=True)
+    week = Column(String, primary_key=True)  # ISO date of the Monday
+    archetype = Column(String, primary_key=True)
+    decklists = Column(Integer, nullable=False)
+    # Decklists with a placement at a tournament with a known top cut, and those inside it
+    placed = Column(Integer, nullable=False)
+    top_cut = Column(Integer, nullable=False)
+
 # --- Price Tracking Models ---
 class Vendor(Base):
     __tablename__ = 'vendors'
@@ -71,13 +172,63 @@ class PriceHistory(Base):
     condition = Column(String)  # NM, LP, MP, etc.
     rarity = Column(String)
     set_code = Column(String)
-    recorded_at = Column(DateTime, nullable=False)
+    # Monthly range partitions on recorded_at (see partitions.py), which
+    # therefore has to be part of the primary key
+    recorded_at = Column(DateTime, primary_key=True)
     created_at = Column(DateTime)
+
+    __table_args__ = (
+        Index('idx_price_history_card_vendor_recorded', 'card_id', 'vendor_id', 'recorded_at'),
+        # Natural key: one tick per card, vendor and condition at a given time.
+        # condition is nullable and NULLs never conflict, hence the coalesce.
+        Index('uq_price_history_natural_key', 'card_id', 'vendor_id', text("coalesce(condition, '')"), 'recorded_at', unique=True),
+        {'postgresql_partition_by': 'RANGE (recorded_at)'},
+    )
     
     # Relationships
     card = relationship('Card')
     vendor = relationship('Vendor')
 
+class PriceRollupColumns:
+    """OHLC columns shared by the rollup tables; one row per card, vendor and bucket"""
+    card_id = Column(String, primary_key=True)
+    vendor_id = Column(String, primary_key=True)
+    bucket = Column(DateTime, primary_key=True)  # start of the day/week
+    currency = Column(String, nullable=False)
+    open = Column(Numeric(precision=10, scale=2), nullable=False)
+    high = Column(Numeric(precision=10, scale=2), nullable=False)
+    low = Column(Numeric(precision=10, scale=2), nullable=False)
+    close = Column(Numeric(precision=10, scale=2), nullable=False)
+    volume = Column(Integer, nullable=False)  # number of raw price points
+    open_at = Column(DateTime, nullable=False)
+    close_at = Column(DateTime, nullable=False)
+
+class PriceRollupDaily(PriceRollupColumns, Base):
+    __tablename__ = 'price_rollups_daily'
+    __table_args__ = (
+        # Cross-card scans of recent buckets (market movers)
+        Index('idx_price_rollups_daily_bucket', 'bucket'),
+    )
+
+class PriceRollupWeekly(PriceRollupColumns, Base):
+    __tablename__ = 'price_rollups_weekly'
+
+class CardLatestPrice(Base):
+    """
+    Most recent near-mint price_history row per card and vendor, maintained on
+    every price write. Other conditions are left out (see ``prices``).
+    """
+    __tablename__ = 'card_latest_price'
+    card_id = Column(String, primary_key=True)
+    vendor_id = Column(String, primary_key=True)
+    condition = Column(String)
+    price = Column(Numeric(precision=10, scale=2), nullable=False)
+    currency = Column(String, nullable=False)
+    recorded_at = Column(DateTime, nullable=False)
+    # The vendor's tick before this one; 'change' alerts measure the move from it
+    previous_price = Column(Numeric(precision=10, scale=2))
+    previous_recorded_at = Column(DateTime)
+
 class PriceAlert(Base):
     __tablename__ = 'price_alerts'
     id = Column(String, primary_key=True)
@@ -88,6 +239,37 @@ class PriceAlert(Base):
     is_active = Column(Boolean, nullable=False, default=True)
     created_at = Column(DateTime)
     updated_at = Column(DateTime)
+    triggered_at = Column(DateTime)  # when an event was last queued for it
     
     # Relationships
-    card = relationship('Card') 
\ No newline at end of file
+    card = relationship('Card') 
+
+    __table_args__ = (
+        # Active alerts whose target a written price batch crossed
+        Index(
+            'idx_price_alerts_active_card_type_target', 'card_id', 'alert_type', 'target_price',
+            postgresql_where=text('is_active'),
+        ),
+    )
+
+class PriceAlertEvent(Base):
+    """Queue of triggered price alerts; notifiers claim rows and set delivered_at"""
+    __tablename__ = 'price_alert_events'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    alert_id = Column(String, ForeignKey('price_alerts.id', ondelete='CASCADE'), nullable=False)
+    user_id = Column(String, nullable=False)
+    card_id = Column(String, nullable=False)
+    vendor_id = Column(String, nullable=False)
+    alert_type = Column(String, nullable=False)
+    target_price = Column(Numeric(precision=10, scale=2), nullable=False)
+    previous_price = Column(Numeric(precision=10, scale=2))
+    price = Column(Numeric(precision=10, scale=2), nullable=False)
+    currency = Column(String, nullable=False)
+    recorded_at = Column(DateTime, nullable=False)  # time of the tick that triggered it
+    created_at = Column(DateTime, nullable=False)
+    delivered_at = Column(DateTime)
+
+    __table_args__ = (
+        Index('idx_price_alert_events_user_id', 'user_id', 'id'),
+        Index('idx_price_alert_events_pending', 'id', postgresql_where=text('delivered_at IS NULL')),
+    )
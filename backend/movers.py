@@ -0,0 +1,186 @@
+"""
+In-memory snapshot of the biggest price movers for /market/movers.
+
+A background thread rebuilds the snapshot every ``REFRESH_SECONDS``. For each
+window it loads, per card and vendor, the current price from
+``card_latest_price`` and the baseline price (the last tick at or before
+the window start, from ``price_history``), then computes absolute and
+percentage change with NumPy and pre-sorts both. Both sides are near-mint
+prices only, like ``card_latest_price``; the rollups mix every condition.
+Requests only mask and slice those arrays, so they never touch the
+database, and get a 503 until the thread's first build lands.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import Float, cast, or_, select
+
+from database import SessionLocal
+from models import Card as CardModel, CardSet as CardSetModel, CardLatestPrice as CardLatestPriceModel
+from models import PriceHistory as PriceHistoryModel
+from prices import LATEST_PRICE_CONDITION
+
+WINDOWS = {
+    '24h': timedelta(days=1),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+}
+DIRECTIONS = ('gainers', 'losers')
+SORTS = ('pct', 'abs')
+
+REFRESH_SECONDS = 300
+
+# How far before the window start to look for the baseline tick
+BASELINE_LOOKBACK = timedelta(days=7)
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+class WindowMovers:
+    """Per (card, vendor) changes over one window, pre-sorted by pct and abs change"""
+
+    def __init__(self, rows, rarity_cards):
+        card_ids, names, vendor_ids, currencies, baselines, prices = zip(*rows) if rows else ((),) * 6
+        self.card_id = np.array(card_ids, dtype=str)
+        self.name = np.array(names, dtype=object)
+        self.vendor_id = np.array(vendor_ids, dtype=str)
+        self.currency = np.array(currencies, dtype=object)
+        self.baseline = np.array(baselines, dtype=float)
+        self.price = np.array(prices, dtype=float)
+        self.change = self.price - self.baseline
+        self.change_pct = self.change / self.baseline * 100
+        # Stable descending order: biggest gainers first, losers at the end
+        self.order = {
+            'pct': np.argsort(-self.change_pct, kind='stable'),
+            'abs': np.argsort(-self.change, kind='stable'),
+        }
+        self._rarity_cards = rarity_cards
+        self._rarity_masks = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.card_id)
+
+    def rarity_mask(self, rarity):
+        with self._lock:
+            mask = self._rarity_masks.get(rarity)
+            if mask is None:
+                cards = np.array(sorted(self._rarity_cards.get(rarity, ())), dtype=str)
+                mask = np.isin(self.card_id, cards)
+                self._rarity_masks[rarity] = mask
+            return mask
+
+    def top(self, limit, direction='gainers', sort='pct', vendor_id=None, rarity=None):
+        order = self.order[sort]
+        if direction == 'losers':
+            order = order[::-1]
+        mask = np.ones(len(self), dtype=bool)
+        if vendor_id:
+            mask &= self.vendor_id == vendor_id
+        if rarity:
+            mask &= self.rarity_mask(rarity)
+        # Only actual moves in the requested direction
+        mask &= (self.change > 0) if direction == 'gainers' else (self.change < 0)
+        picked = order[mask[order]][:limit]
+        return [
+            {
+                'card_id': self.card_id[i],
+                'name': self.name[i],
+                'vendor_id': self.vendor_id[i],
+                'currency': self.currency[i],
+                'baseline_price': round(float(self.baseline[i]), 2),
+                'price': round(float(self.price[i]), 2),
+                'change': round(float(self.change[i]), 2),
+                'change_pct': round(float(self.change_pct[i]), 2),
+            }
+            for i in picked.tolist()
+        ]
+
+def load_window(db, since):
+    """(card_id, name, vendor_id, currency, baseline, price) for every card and vendor priced at ``since``"""
+    baseline = select(
+        PriceHistoryModel.card_id, PriceHistoryModel.vendor_id, cast(PriceHistoryModel.price, Float).label('close'),
+    ).where(
+        # Bounded on recorded_at, so only the partitions in the lookback are scanned
+        PriceHistoryModel.recorded_at >= since - BASELINE_LOOKBACK,
+        PriceHistoryModel.recorded_at <= since,
+        or_(PriceHistoryModel.condition.is_(None), PriceHistoryModel.condition == LATEST_PRICE_CONDITION),
+    ).distinct(
+        PriceHistoryModel.card_id, PriceHistoryModel.vendor_id
+    ).order_by(
+        PriceHistoryModel.card_id, PriceHistoryModel.vendor_id, PriceHistoryModel.recorded_at.desc()
+    ).subquery()
+    return db.execute(
+        select(
+            CardLatestPriceModel.card_id, CardModel.name, CardLatestPriceModel.vendor_id,
+            CardLatestPriceModel.currency, baseline.c.close, cast(CardLatestPriceModel.price, Float),
+        ).join(
+            baseline,
+            (baseline.c.card_id == CardLatestPriceModel.card_id) & (baseline.c.vendor_id == CardLatestPriceModel.vendor_id),
+        ).join(
+            CardModel, CardModel.id == CardLatestPriceModel.card_id
+        ).where(baseline.c.close > 0)
+    ).all()
+
+def load_rarity_cards(db):
+    rarity_cards = {}
+    for card_id, rarity in db.execute(select(CardSetModel.card_id, CardSetModel.rarity).distinct()):
+        rarity_cards.setdefault(rarity, set()).add(card_id)
+    return rarity_cards
+
+class MoversSnapshot:
+    def __init__(self, windows, generated_at, seconds):
+        self.windows = windows
+        self.generated_at = generated_at
+        self.seconds = seconds
+
+def build_snapshot(db, now=None):
+    start = time.perf_counter()
+    now = now or datetime.now()
+    rarity_cards = load_rarity_cards(db)
+    windows = {
+        name: WindowMovers(load_window(db, now - span), rarity_cards)
+        for name, span in WINDOWS.items()
+    }
+    return MoversSnapshot(windows, now, round(time.perf_counter() - start, 3))
+
+_lock = threading.Lock()
+_snapshot = None
+_thread = None
+
+def get_snapshot():
+    """Latest snapshot built by the refresh thread, None until the first build lands"""
+    return _snapshot
+
+def refresh_snapshot():
+    """Rebuild the snapshot from the database and swap it in"""
+    global _snapshot
+    db = SessionLocal()
+    try:
+        snapshot = build_snapshot(db)
+    finally:
+        db.close()
+    _snapshot = snapshot
+    return snapshot
+
+def _refresh_loop():
+    while True:
+        try:
+            snapshot = refresh_snapshot()
+            print(f"Market movers snapshot refreshed in {snapshot.seconds}s.")
+        except Exception as e:
+            print(f"Error refreshing market movers: {e}")
+        time.sleep(REFRESH_SECONDS)
+
+def start_refresh():
+    """Start the periodic snapshot refresh thread unless it is already running"""
+    global _thread
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return _thread
+        _thread = threading.Thread(target=_refresh_loop, name='market-movers', daemon=True)
+        _thread.start()
+        return _thread
@@ -0,0 +1,36 @@
+"""
+Opaque keyset cursors.
+
+A cursor is the URL-safe base64 of the JSON-encoded sort key of the last row
+on a page. Clients treat it as an opaque string and send it back unchanged.
+
+/cards without a search is ordered by (name, id) and every page carries a
+``next_cursor``; the next page is a keyset seek past it, so deep pages cost
+the same as the first. Search results are ranked and paged by offset.
+"""
+
+import base64
+import binascii
+import json
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, types):
+    """
+    Decode a cursor into a list of sort-key values, or raise ValueError.
+
+    ``types`` gives the expected type of each value, one per sort column.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Malformed cursor")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Malformed cursor")
+    # bool is an int subclass, but never a valid sort key
+    if any(isinstance(value, bool) or not isinstance(value, type_) for value, type_ in zip(values, types)):
+        raise ValueError("Malformed cursor")
+    return values
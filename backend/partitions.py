@@ -0,0 +1,144 @@
+"""
+Monthly range partitions of price_history and the raw-tick retention policy.
+
+price_history is partitioned by ``recorded_at`` into one table per calendar
+month (``price_history_y2025m06``), plus ``price_history_default`` for ticks
+outside every monthly range. ``ensure_partitions`` creates the partitions for
+the coming months ahead of time; ``apply_retention`` compacts months older
+than the retention window into ``price_rollups_daily`` and then drops their
+partitions whole, so old ticks leave without row-level deletes or bloat.
+"""
+
+import os
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from rollups import DAILY_MERGE_SQL, DAILY_REPLACE_SQL, DAILY_ROLLUP_SQL, rebuild_weekly_rollups
+
+# Raw ticks older than this many days are compacted into daily rollups and dropped
+RETENTION_DAYS = int(os.getenv("PRICE_RETENTION_DAYS", "365"))
+
+# Partitions are kept created this many months past the current one
+FUTURE_MONTHS = 3
+
+DEFAULT_PARTITION = 'price_history_default'
+
+_NAME_RE = re.compile(r"^price_history_y(\d{4})m(\d{2})$")
+
+def month_start(ts):
+    return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+def partition_name(month):
+    return f"price_history_y{month.year}m{month.month:02d}"
+
+def list_partitions(db):
+    """Start month of every monthly partition of price_history, oldest first"""
+    names = db.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'price_history'
+    """)).scalars()
+    months = []
+    for name in names:
+        match = _NAME_RE.match(name)
+        if match:
+            months.append(datetime(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+def create_partition(db, month):
+    """
+    Create and attach the partition for ``month``; the caller commits.
+
+    Ticks for that month already sitting in the default partition are moved
+    into the new table first, since attaching fails while they are there.
+    """
+    name = partition_name(month)
+    lo, hi = month, add_months(month, 1)
+    bounds = {'lo': lo, 'hi': hi}
+    db.execute(text(f"CREATE TABLE {name} (LIKE price_history INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    db.execute(text(
+        f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE recorded_at >= :lo AND recorded_at < :hi"
+    ), bounds)
+    db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE recorded_at >= :lo AND recorded_at < :hi"), bounds)
+    db.execute(text(
+        f"ALTER TABLE price_history ATTACH PARTITION {name} FOR VALUES FROM ('{lo.isoformat()}') TO ('{hi.isoformat()}')"
+    ))
+    return name
+
+def ensure_partitions(db, months_ahead=FUTURE_MONTHS, now=None):
+    """Create any missing partitions from the current month to ``months_ahead`` months out"""
+    current = month_start(now or datetime.now())
+    existing = set(list_partitions(db))
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing:
+            created.append(create_partition(db, month))
+    return created
+
+def compact_into_daily(db, source, where='', merge=False):
+    """
+    Write daily rollups for the ticks in ``source``.
+
+    Without ``merge`` those buckets are replaced, which is only right when
+    ``source`` holds every tick of the days it covers. With ``merge`` the
+    ticks are folded into what the buckets already hold.
+    """
+    conflict = DAILY_MERGE_SQL if merge else DAILY_REPLACE_SQL
+    db.execute(text(DAILY_ROLLUP_SQL.format(source=source, where=where) + conflict))
+
+def apply_retention(db, keep_days=RETENTION_DAYS, now=None):
+    """
+    Compact and drop raw ticks older than ``keep_days``; the caller commits.
+
+    Every monthly partition that ends before the cutoff is rolled up into
+    price_rollups_daily, detached and dropped. Stray old ticks in the default
+    partition (e.g. late ticks for a month already dropped) are merged into
+    their days' rollups, never replacing them, and deleted row by row, as
+    there are few of them. Weekly rollups and card_latest_price are left as
+    they are. Returns the names of the dropped partitions.
+    """
+    cutoff = (now or datetime.now()) - timedelta(days=keep_days)
+    dropped = []
+    for month in list_partitions(db):
+        if add_months(month, 1) > cutoff:
+            break
+        name = partition_name(month)
+        compact_into_daily(db, name)
+        db.execute(text(f"ALTER TABLE price_history DETACH PARTITION {name}"))
+        db.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+    # Only whole days can be compacted without splitting a daily bucket
+    day_cutoff = cutoff.replace(hour=0, minute=0, second=0, microsecond=0)
+    where = f"WHERE recorded_at < '{day_cutoff.isoformat()}'"
+    compact_into_daily(db, DEFAULT_PARTITION, where, merge=True)
+    db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} {where}"))
+    return dropped
+
+def rebuild_price_rollups(db):
+    """
+    Regenerate the rollups from price_history; the caller commits.
+
+    Daily buckets are rebuilt from raw ticks only from the oldest monthly
+    partition onwards, since older days may have been compacted and dropped
+    by the retention policy. Older ticks left in the default partition are
+    merged into their days instead. Weekly buckets are then rebuilt from the
+    daily ones.
+    """
+    months = list_partitions(db)
+    if months:
+        since = months[0].isoformat()
+        db.execute(text("DELETE FROM price_rollups_daily WHERE bucket >= :since"), {'since': since})
+        db.execute(text(DAILY_ROLLUP_SQL.format(source='price_history', where=f"WHERE recorded_at >= '{since}'")))
+        compact_into_daily(db, DEFAULT_PARTITION, f"WHERE recorded_at < '{since}'", merge=True)
+    else:
+        compact_into_daily(db, DEFAULT_PARTITION, merge=True)
+    rebuild_weekly_rollups(db)
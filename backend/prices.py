@@ -0,0 +1,162 @@
+"""
+Writes to price_history and the tables derived from it.
+
+Every writer of price_history goes through ``write_prices``, which inserts a
+batch with ``ON CONFLICT DO NOTHING`` against the natural key (card, vendor,
+condition, recorded_at), so replaying the same ticks is a no-op. Only the
+rows that were actually inserted are passed on to ``apply_price_writes`` in
+the same transaction. That queues events for the price alerts they trigger,
+refreshes ``card_latest_price`` (one near-mint row per card and vendor with
+the tick before it, so "current price" reads are a primary-key lookup
+instead of an aggregate over history)
+and folds the rows into the OHLC rollups.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from models import CardLatestPrice as CardLatestPriceModel, PriceHistory as PriceHistoryModel
+from rollups import apply_price_rollups
+from alerts import evaluate_price_alerts
+
+LATEST_PRICE_FIELDS = ('card_id', 'vendor_id', 'condition', 'price', 'currency', 'recorded_at')
+
+# card_latest_price and alerts follow this condition only; ticks without a
+# condition are taken to be near mint, as the catalog's prices are
+LATEST_PRICE_CONDITION = 'NM'
+
+def is_latest_condition(row):
+    return row.get('condition') in (None, LATEST_PRICE_CONDITION)
+
+def newest_per_vendor(price_rows):
+    """
+    Reduce price rows to the newest one per (card_id, vendor_id).
+
+    Each carries the price and time of the tick before it in the batch, or
+    None for both when the batch has only one.
+    """
+    newest = {}
+    previous = {}
+    for row in price_rows:
+        key = (row['card_id'], row['vendor_id'])
+        current = newest.get(key)
+        if current is None or row['recorded_at'] >= current['recorded_at']:
+            newest[key] = row
+            row, current = current, row
+        if row is not None and (key not in previous or row['recorded_at'] >= previous[key]['recorded_at']):
+            previous[key] = row
+    latest = []
+    for key, row in newest.items():
+        before = previous.get(key)
+        latest.append(dict(
+            {field: row.get(field) for field in LATEST_PRICE_FIELDS},
+            previous_price=before['price'] if before else None,
+            previous_recorded_at=before['recorded_at'] if before else None,
+        ))
+    return latest
+
+def upsert_latest_prices(db, price_rows):
+    """Move card_latest_price forward to ``price_rows`` where they are newer"""
+    rows = newest_per_vendor(price_rows)
+    if not rows:
+        return
+    stmt = pg_insert(CardLatestPriceModel)
+    table = CardLatestPriceModel.__table__.c
+    excluded = stmt.excluded
+    # The tick before the new latest one: the batch's own previous tick if it
+    # is newer than the stored price, else the stored price itself. A tick at
+    # the stored time replaces it, so it keeps the stored previous tick.
+    batch_previous_wins = case(
+        (table.recorded_at < excluded.recorded_at, excluded.previous_recorded_at > table.recorded_at),
+        else_=(excluded.previous_recorded_at > table.previous_recorded_at)
+        | (table.previous_recorded_at.is_(None) & excluded.previous_recorded_at.isnot(None)),
+    )
+    stored_latest_wins = table.recorded_at < excluded.recorded_at
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.card_id, table.vendor_id],
+        set_=dict(
+            {field: excluded[field] for field in LATEST_PRICE_FIELDS[2:]},
+            previous_price=case(
+                (batch_previous_wins, excluded.previous_price),
+                (stored_latest_wins, table.price),
+                else_=table.previous_price,
+            ),
+            previous_recorded_at=case(
+                (batch_previous_wins, excluded.previous_recorded_at),
+                (stored_latest_wins, table.recorded_at),
+                else_=table.previous_recorded_at,
+            ),
+        ),
+        # Late-arriving older ticks must not replace a newer price
+        where=excluded.recorded_at >= table.recorded_at,
+    )
+    db.execute(stmt, rows)
+
+def apply_price_writes(db, price_rows):
+    """Update every table derived from price_history for newly written rows; the caller commits"""
+    if not price_rows:
+        return
+    # Other conditions must not move the near-mint price alerts and readers see
+    latest = [row for row in price_rows if is_latest_condition(row)]
+    # Alerts compare against the previous latest price, so evaluate them first
+    evaluate_price_alerts(db, latest)
+    upsert_latest_prices(db, latest)
+    apply_price_rollups(db, price_rows)
+
+def write_prices(db, price_rows):
+    """
+    Insert a batch of price_history rows, skipping any that already exist.
+
+    A row is skipped when its primary key (id, recorded_at) or its natural key
+    (card, vendor, condition, recorded_at) is already stored. The
+    inserted rows update the derived tables; returns them. The caller commits.
+    """
+    if not price_rows:
+        return []
+    stmt = pg_insert(PriceHistoryModel).on_conflict_do_nothing().returning(
+        PriceHistoryModel.id, PriceHistoryModel.recorded_at
+    )
+    inserted = set(db.execute(stmt, price_rows).tuples())
+    written = []
+    for row in price_rows:
+        # A key repeated within the batch was inserted once, for its first row
+        key = (row['id'], row['recorded_at'])
+        if key in inserted:
+            inserted.discard(key)
+            written.append(row)
+    apply_price_writes(db, written)
+    return written
+
+REBUILD_LATEST_SQL = """
+    INSERT INTO card_latest_price (
+        card_id, vendor_id, condition, price, currency, recorded_at, previous_price, previous_recorded_at
+    )
+    SELECT DISTINCT ON (card_id, vendor_id)
+        card_id, vendor_id, condition, price, currency, recorded_at,
+        lag(price) OVER ticks, lag(recorded_at) OVER ticks
+    FROM price_history
+    WHERE condition IS NULL OR condition = :condition
+    WINDOW ticks AS (PARTITION BY card_id, vendor_id ORDER BY recorded_at)
+    ORDER BY card_id, vendor_id, recorded_at DESC
+"""
+
+def rebuild_latest_prices(db):
+    """Regenerate card_latest_price from price_history; the caller commits"""
+    db.execute(text("TRUNCATE card_latest_price"))
+    db.execute(text(REBUILD_LATEST_SQL), {'condition': LATEST_PRICE_CONDITION})
+
+def latest_prices(db, card_ids, max_age_days=None):
+    """
+    Current price per vendor for ``card_ids`` as {card_id: [CardLatestPrice]}.
+
+    With ``max_age_days`` prices recorded longer ago than that are left out.
+    """
+    query = db.query(CardLatestPriceModel).filter(CardLatestPriceModel.card_id.in_(card_ids))
+    if max_age_days is not None:
+        query = query.filter(CardLatestPriceModel.recorded_at >= datetime.now() - timedelta(days=max_age_days))
+    prices = {card_id: [] for card_id in card_ids}
+    for row in query.order_by(CardLatestPriceModel.card_id, CardLatestPriceModel.vendor_id):
+        prices[row.card_id].append(row)
+    return prices
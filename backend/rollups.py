@@ -0,0 +1,158 @@
+"""
+Daily and weekly OHLC rollups of price_history.
+
+Rollups are maintained incrementally: ``prices.apply_price_writes`` passes
+every batch of new price_history rows to ``apply_price_rollups`` in the same
+transaction, which folds them into the matching buckets with one upsert per
+table.
+``partitions.rebuild_price_rollups`` regenerates them from raw history
+(weekly via daily).
+
+/cards/{card_id}/prices serves buckets for long ranges (``resolution=auto``)
+and reports each bucket's close as its ``price``.
+"""
+
+from datetime import timedelta
+
+from sqlalchemy import case, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from models import PriceRollupDaily, PriceRollupWeekly
+
+ROLLUP_MODELS = {
+    '1d': PriceRollupDaily,
+    '1w': PriceRollupWeekly,
+}
+
+RESOLUTIONS = ('auto', 'raw') + tuple(ROLLUP_MODELS)
+
+# (max days in range, resolution) used when resolution=auto
+AUTO_RESOLUTIONS = [
+    (7, 'raw'),
+    (180, '1d'),
+]
+
+def pick_resolution(days):
+    """Coarsest resolution that still gives a useful number of points for ``days``"""
+    for max_days, resolution in AUTO_RESOLUTIONS:
+        if days <= max_days:
+            return resolution
+    return '1w'
+
+def bucket_start(ts, resolution):
+    """Start of the day or ISO week (Monday) containing ``ts``, as Postgres date_trunc does"""
+    day = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    if resolution == '1w':
+        return day - timedelta(days=day.weekday())
+    return day
+
+def aggregate_ticks(price_rows, resolution):
+    """Fold raw price rows into one OHLC row per (card_id, vendor_id, bucket)"""
+    buckets = {}
+    for row in price_rows:
+        ts = row['recorded_at']
+        price = float(row['price'])
+        key = (row['card_id'], row['vendor_id'], bucket_start(ts, resolution))
+        agg = buckets.get(key)
+        if agg is None:
+            buckets[key] = {
+                'card_id': key[0],
+                'vendor_id': key[1],
+                'bucket': key[2],
+                'currency': row['currency'],
+                'open': price, 'high': price, 'low': price, 'close': price,
+                'volume': 1,
+                'open_at': ts, 'close_at': ts,
+            }
+            continue
+        if ts < agg['open_at']:
+            agg['open'], agg['open_at'] = price, ts
+        if ts >= agg['close_at']:
+            agg['close'], agg['close_at'] = price, ts
+        agg['high'] = max(agg['high'], price)
+        agg['low'] = min(agg['low'], price)
+        agg['volume'] += 1
+    return list(buckets.values())
+
+def upsert_rollups(db, model, rows):
+    """Merge pre-aggregated OHLC rows into ``model``'s table"""
+    stmt = pg_insert(model)
+    table = model.__table__.c
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.card_id, table.vendor_id, table.bucket],
+        set_={
+            'open': case((excluded.open_at < table.open_at, excluded.open), else_=table.open),
+            'open_at': func.least(table.open_at, excluded.open_at),
+            'close': case((excluded.close_at >= table.close_at, excluded.close), else_=table.close),
+            'close_at': func.greatest(table.close_at, excluded.close_at),
+            'high': func.greatest(table.high, excluded.high),
+            'low': func.least(table.low, excluded.low),
+            'volume': table.volume + excluded.volume,
+        },
+    )
+    db.execute(stmt, rows)
+
+def apply_price_rollups(db, price_rows):
+    """Fold newly written price_history rows into every rollup table; the caller commits"""
+    if not price_rows:
+        return
+    for resolution, model in ROLLUP_MODELS.items():
+        upsert_rollups(db, model, aggregate_ticks(price_rows, resolution))
+
+# Daily OHLC rows aggregated from the raw ticks in {source}
+DAILY_ROLLUP_SQL = """
+    INSERT INTO price_rollups_daily (card_id, vendor_id, bucket, currency, open, high, low, close, volume, open_at, close_at)
+    SELECT card_id, vendor_id, date_trunc('day', recorded_at),
+           (array_agg(currency ORDER BY recorded_at))[1],
+           (array_agg(price ORDER BY recorded_at))[1],
+           max(price), min(price),
+           (array_agg(price ORDER BY recorded_at DESC))[1],
+           count(*), min(recorded_at), max(recorded_at)
+    FROM {source}
+    {where}
+    GROUP BY card_id, vendor_id, date_trunc('day', recorded_at)
+"""
+
+# Conflict clauses for DAILY_ROLLUP_SQL. Replacing is right when the source
+# holds every tick of each day it covers (a whole monthly partition).
+DAILY_REPLACE_SQL = """
+    ON CONFLICT (card_id, vendor_id, bucket) DO UPDATE SET
+        currency = excluded.currency, open = excluded.open, high = excluded.high,
+        low = excluded.low, close = excluded.close, volume = excluded.volume,
+        open_at = excluded.open_at, close_at = excluded.close_at
+"""
+
+# Merging keeps what the bucket already holds, as upsert_rollups does. Ticks
+# written through prices.write_prices were counted when written, so the
+# larger volume is kept instead of adding the same ticks twice.
+DAILY_MERGE_SQL = """
+    ON CONFLICT (card_id, vendor_id, bucket) DO UPDATE SET
+        open = CASE WHEN excluded.open_at < price_rollups_daily.open_at
+                    THEN excluded.open ELSE price_rollups_daily.open END,
+        open_at = least(price_rollups_daily.open_at, excluded.open_at),
+        close = CASE WHEN excluded.close_at >= price_rollups_daily.close_at
+                     THEN excluded.close ELSE price_rollups_daily.close END,
+        close_at = greatest(price_rollups_daily.close_at, excluded.close_at),
+        high = greatest(price_rollups_daily.high, excluded.high),
+        low = least(price_rollups_daily.low, excluded.low),
+        volume = greatest(price_rollups_daily.volume, excluded.volume)
+"""
+
+# Weekly OHLC rows aggregated from the daily rollups
+WEEKLY_FROM_DAILY_SQL = """
+    INSERT INTO price_rollups_weekly (card_id, vendor_id, bucket, currency, open, high, low, close, volume, open_at, close_at)
+    SELECT card_id, vendor_id, date_trunc('week', bucket),
+           (array_agg(currency ORDER BY bucket))[1],
+           (array_agg(open ORDER BY bucket))[1],
+           max(high), min(low),
+           (array_agg(close ORDER BY bucket DESC))[1],
+           sum(volume), min(open_at), max(close_at)
+    FROM price_rollups_daily
+    GROUP BY card_id, vendor_id, date_trunc('week', bucket)
+"""
+
+def rebuild_weekly_rollups(db):
+    """Regenerate price_rollups_weekly from the daily rollups; the caller commits"""
+    db.execute(text("TRUNCATE price_rollups_weekly"))
+    db.execute(text(WEEKLY_FROM_DAILY_SQL))
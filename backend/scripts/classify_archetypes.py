@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Fit archetype centroids over all decklists and write each decklist's
+canonical archetype back, then rebuild the meta stats to match.
+
+Run after importing decklists in bulk; the API labels single decklists as
+they are written, against centroids it refits every
+``archetypes.REFRESH_SECONDS``.
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionLocal
+from archetypes import classify_all
+
+def main():
+    db = SessionLocal()
+    try:
+        stats = classify_all(db)
+        db.commit()
+        print(
+            f"Classified {stats['decklists']} decklists over {stats['cards']} cards into "
+            f"{stats['archetypes']} archetypes ({stats['relabelled']} relabelled) in {stats['seconds']}s "
+            f"(load {stats['load_seconds']}s, fit {stats['fit_seconds']}s)."
+        )
+    except Exception as e:
+        print(f"Error classifying archetypes: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Export price history as csv, parquet or an Arrow IPC stream.
+
+Streams through a server-side cursor, so memory use does not grow with the
+number of rows. Writes to stdout unless --output is given.
+"""
+
+import argparse
+import sys
+import os
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from export import EXPORT_BATCH_SIZE, EXPORT_FORMATS, export_price_history, export_query, iter_batches
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv')
+    parser.add_argument('--start', type=datetime.fromisoformat, help='inclusive, ISO date or datetime')
+    parser.add_argument('--end', type=datetime.fromisoformat, help='exclusive, ISO date or datetime')
+    parser.add_argument('--vendor-id')
+    parser.add_argument('--set-name', help='only cards printed in this set')
+    parser.add_argument('--batch-size', type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument('--output', '-o', help='file to write, default stdout')
+    args = parser.parse_args()
+
+    query = export_query(args.start, args.end, args.vendor_id, args.set_name)
+    out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    written = 0
+    try:
+        for chunk in export_price_history(args.format, iter_batches(query, args.batch_size)):
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if args.output:
+            out.close()
+    print(f"Exported {written} bytes of price history as {args.format}.", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Cron entry point for price_history partition maintenance.
+
+Creates the monthly partitions for the coming months, then applies the
+retention policy: raw ticks older than PRICE_RETENTION_DAYS (default 365)
+are compacted into daily rollups and their partitions dropped.
+"""
+
+import argparse
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionLocal
+from partitions import RETENTION_DAYS, ensure_partitions, apply_retention
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--keep-days', type=int, default=RETENTION_DAYS, help='days of raw ticks to keep')
+    parser.add_argument('--skip-retention', action='store_true', help='only create future partitions')
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        created = ensure_partitions(db)
+        db.commit()
+        print(f"Created partitions: {', '.join(created) or 'none'}")
+        if not args.skip_retention:
+            dropped = apply_retention(db, args.keep_days)
+            db.commit()
+            print(f"Compacted and dropped partitions: {', '.join(dropped) or 'none'}")
+    except Exception as e:
+        print(f"Error maintaining price partitions: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
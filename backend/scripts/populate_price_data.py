@@ -13,7 +13,9 @@ import random
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database import SessionLocal
-from models import Vendor, PriceHistory, Card
+from models import Vendor, Card
+from prices import write_prices
+from sqlalchemy.orm import selectinload
 import requests
 
 def create_sample_vendors():
@@ -73,7 +75,7 @@ def generate_sample_price_data():
     
     try:
         # Get all cards
-        cards = db.query(Card).limit(50).all()  # Limit to first 50 cards for testing
+        cards = db.query(Card).options(selectinload(Card.sets)).limit(50).all()  # Limit to first 50 cards for testing
         vendors = db.query(Vendor).all()
         
         if not vendors:
@@ -82,10 +84,14 @@ def generate_sample_price_data():
         
         print(f"Generating price data for {len(cards)} cards across {len(vendors)} vendors...")
         
-        # Generate price data for the last 30 days
-        base_date = datetime.now() - timedelta(days=30)
+        # Generate price data for the last 30 days, one tick per day at midnight so
+        # re-running the script on the same day writes nothing new
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        base_date = today - timedelta(days=30)
         
+        rows = []
         for card in cards:
+            first_printing = card.sets[0] if card.sets else None
             for vendor in vendors:
                 # Generate 30 days of price data
                 for day in range(30):
@@ -106,23 +112,24 @@ def generate_sample_price_data():
                     final_price = base_price * price_multiplier
                     
                     # Create price record
-                    price_record = PriceHistory(
+                    row = dict(
                         id=str(uuid.uuid4()),
                         card_id=card.id,
                         vendor_id=vendor.id,
                         price=round(final_price, 2),
                         currency='USD',
                         condition='NM',  # Near Mint
-                        rarity=card.rarity.split(',')[0] if card.rarity else 'Common',
-                        set_code=card.setCode.split(',')[0] if card.setCode else None,
+                        rarity=first_printing.rarity if first_printing and first_printing.rarity else 'Common',
+                        set_code=first_printing.set_code if first_printing else None,
                         recorded_at=date,
                         created_at=datetime.now()
                     )
                     
-                    db.add(price_record)
+                    rows.append(row)
         
+        written = write_prices(db, rows)
         db.commit()
-        print(f"Generated price data for {len(cards)} cards across {len(vendors)} vendors")
+        print(f"Generated {len(written)} new price points for {len(cards)} cards across {len(vendors)} vendors")
         
     except Exception as e:
         print(f"Error generating price data: {e}")
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Regenerate card_latest_price from raw price_history.
+
+Only needed after price rows were written outside the API and ingestion
+paths (e.g. manual SQL), since those paths keep the table current.
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionLocal
+from prices import rebuild_latest_prices
+
+def main():
+    db = SessionLocal()
+    try:
+        rebuild_latest_prices(db)
+        db.commit()
+        print("Latest prices rebuilt.")
+    except Exception as e:
+        print(f"Error rebuilding latest prices: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
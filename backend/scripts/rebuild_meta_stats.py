@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Regenerate meta_archetype_stats from all decklists.
+
+Run once after the table is created; afterwards the decklist and tournament
+endpoints keep it current.
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionLocal
+from meta import rebuild_meta_stats
+
+def main():
+    db = SessionLocal()
+    try:
+        count = rebuild_meta_stats(db)
+        db.commit()
+        print(f"Meta stats rebuilt from {count} decklists.")
+    except Exception as e:
+        print(f"Error rebuilding meta stats: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
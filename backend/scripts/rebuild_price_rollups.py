@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Regenerate the daily and weekly price rollups from raw price_history.
+
+Only needed after price rows were written outside the API and ingestion
+paths (e.g. manual SQL), since those paths keep the rollups current.
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionLocal
+from partitions import rebuild_price_rollups
+
+def main():
+    db = SessionLocal()
+    try:
+        rebuild_price_rollups(db)
+        db.commit()
+        print("Price rollups rebuilt.")
+    except Exception as e:
+        print(f"Error rebuilding price rollups: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Re-check every active price alert against current prices.
+
+Run after a bulk price import or an outage; triggered alerts are queued in
+price_alert_events like the ones raised on each price write.
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionLocal
+from bulk_alerts import reevaluate_alerts, format_stats
+
+def main():
+    db = SessionLocal()
+    try:
+        stats = reevaluate_alerts(db)
+        db.commit()
+        print(f"Re-evaluated {format_stats(stats)}")
+    except Exception as e:
+        print(f"Error re-evaluating alerts: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+Delta sync of the card catalog against YGOPRODeck.
+
+Intended to run from cron (e.g. daily). Only new or changed cards are
+upserted and price points are only appended when a vendor price moved.
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bootstrap import create_vendors_on_startup, sync_catalog
+
+if __name__ == "__main__":
+    create_vendors_on_startup()
+    sync_catalog()
@@ -0,0 +1,73 @@
+"""
+Card search backed by the ``cards.search_vector`` full-text index and the
+pg_trgm indexes on name and description.
+
+``search_vector`` weights the card name as A and the description as B, so a
+query restricted to weight A tells name hits apart from description hits.
+"""
+
+import re
+
+from sqlalchemy import func
+
+from models import Card as CardModel
+
+SEARCH_MODES = ('fulltext', 'prefix', 'fuzzy')
+
+# Text search configuration used by the search_vector column
+TS_CONFIG = 'english'
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+def search_terms(search):
+    """Split free text into lexeme-safe words for to_tsquery"""
+    return _WORD_RE.findall(search.lower())
+
+def contains_pattern(search):
+    """ILIKE pattern matching ``search`` as a literal substring; use with escape='\\'"""
+    escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+def build_tsquery(terms, prefix=False, weight=''):
+    """
+    Build a to_tsquery string that ANDs ``terms``.
+
+    With ``prefix`` every term matches as a prefix (``dra:*``), so partially
+    typed words still hit. ``weight`` restricts matches to lexemes with that
+    weight, e.g. 'A' for the card name.
+    """
+    suffix = ''
+    if prefix or weight:
+        suffix = (':*' if prefix else ':') + weight
+    return ' & '.join(f"{term}{suffix}" for term in terms)
+
+def apply_card_search(query, search, mode='prefix'):
+    """
+    Filter and rank a Card query by ``search``.
+
+    - fulltext: whole-word matches on name or description
+    - prefix: like fulltext, but each word also matches as a prefix
+    - fuzzy: trigram similarity on the name (pg_trgm ``%`` operator, tolerant
+      of typos) or a substring match on the description
+
+    Results are ordered with name matches ahead of description matches, then
+    by rank. Input with no searchable words falls back to a name ILIKE.
+    """
+    if mode == 'fuzzy':
+        similarity = func.similarity(CardModel.name, search)
+        return query.filter(
+            CardModel.name.op('%')(search) | CardModel.description.ilike(contains_pattern(search), escape='\\')
+        ).order_by(similarity.desc(), CardModel.name)
+
+    terms = search_terms(search)
+    if not terms:
+        return query.filter(CardModel.name.ilike(contains_pattern(search), escape='\\')).order_by(CardModel.name)
+
+    prefix = mode == 'prefix'
+    tsquery = func.to_tsquery(TS_CONFIG, build_tsquery(terms, prefix))
+    name_tsquery = func.to_tsquery(TS_CONFIG, build_tsquery(terms, prefix, weight='A'))
+    return query.filter(CardModel.search_vector.op('@@')(tsquery)).order_by(
+        CardModel.search_vector.op('@@')(name_tsquery).desc(),
+        func.ts_rank(CardModel.search_vector, tsquery).desc(),
+        CardModel.name,
+    )
@@ -0,0 +1,87 @@
+from alerts import AlertIndex, IndexedAlert
+
+def make_index():
+    return AlertIndex([
+        IndexedAlert('a10', 'u1', 'c1', 'above', 10.0),
+        IndexedAlert('a20', 'u1', 'c1', 'above', 20.0),
+        IndexedAlert('b5', 'u2', 'c1', 'below', 5.0),
+        IndexedAlert('b8', 'u2', 'c1', 'below', 8.0),
+        IndexedAlert('ch25', 'u3', 'c1', 'change', 25.0),
+        IndexedAlert('other', 'u1', 'c2', 'above', 1.0),
+    ])
+
+def ids(alerts):
+    return sorted(alert.id for alert in alerts)
+
+def test_crossed_returns_only_thresholds_between_previous_and_new_price():
+    index = make_index()
+    assert ids(index.crossed('c1', 9.0, 15.0)) == ['a10', 'ch25']
+    assert ids(index.crossed('c1', 15.0, 25.0)) == ['a20', 'ch25']
+    # Staying past a threshold does not fire it again
+    assert ids(index.crossed('c1', 15.0, 16.0)) == []
+    assert ids(index.crossed('c1', 9.0, 4.0)) == ['b5', 'b8', 'ch25']
+    assert index.crossed('c3', 1.0, 100.0) == []
+
+def test_crossed_without_previous_price_fires_thresholds_already_passed():
+    index = make_index()
+    assert ids(index.crossed('c1', None, 12.0)) == ['a10']
+    assert ids(index.crossed('c1', None, 6.0)) == ['b8']
+
+def test_crossed_ranges_cover_the_crossed_alerts():
+    from alerts import MAX_TARGET, crossed_ranges
+    assert crossed_ranges('c1', 9.0, 15.0) == [('c1', 'above', 9.0, 15.0), ('c1', 'change', -MAX_TARGET, 6.0 / 9.0 * 100)]
+    assert crossed_ranges('c1', 9.0, 4.0)[0] == ('c1', 'below', 4.0, 9.0)
+    assert crossed_ranges('c1', 9.0, 9.0) == [('c1', 'change', -MAX_TARGET, 0.0)]
+    assert crossed_ranges('c1', None, 6.0) == [('c1', 'above', -MAX_TARGET, 6.0), ('c1', 'below', 6.0, MAX_TARGET)]
+
+def test_write_prices_evaluates_alerts_committed_by_other_processes():
+    import uuid
+    from datetime import datetime, timedelta
+    from sqlalchemy import select, text
+    from database import SessionLocal
+    from models import PriceAlert as PriceAlertModel, PriceAlertEvent as PriceAlertEventModel
+    from prices import write_prices
+
+    db = SessionLocal()
+    try:
+        card_id = db.execute(text("SELECT id FROM cards LIMIT 1")).scalar()
+        previous = db.execute(text(
+            "SELECT price FROM card_latest_price WHERE card_id = :card_id AND vendor_id = 'ebay'"
+        ), {'card_id': card_id}).scalar() or 0
+        target = float(previous) + 1
+        alert_id = str(uuid.uuid4())
+        # Written straight to the table, as another worker or script would
+        db.add(PriceAlertModel(id=alert_id, user_id='u-test', card_id=card_id, alert_type='above',
+                               target_price=target, is_active=True))
+        db.flush()
+        write_prices(db, [{
+            'id': str(uuid.uuid4()), 'card_id': card_id, 'vendor_id': 'ebay', 'price': target + 1,
+            'currency': 'USD', 'condition': 'NM', 'recorded_at': datetime.now() + timedelta(days=1),
+            'created_at': datetime.now(),
+        }])
+        events = db.execute(select(PriceAlertEventModel).where(PriceAlertEventModel.alert_id == alert_id)).scalars().all()
+        assert [float(event.price) for event in events] == [target + 1]
+    finally:
+        db.rollback()
+        db.close()
+
+def test_load_index_reads_only_alerts_in_the_crossed_ranges():
+    import uuid
+    from sqlalchemy import text
+    from database import SessionLocal
+    from models import PriceAlert as PriceAlertModel
+    from alerts import load_index
+
+    db = SessionLocal()
+    try:
+        card_id = db.execute(text("SELECT id FROM cards LIMIT 1")).scalar()
+        for alert_type, target in [('above', 5.0), ('above', 50.0), ('below', 5.0)]:
+            db.add(PriceAlertModel(id=str(uuid.uuid4()), user_id='u-test', card_id=card_id, alert_type=alert_type,
+                                   target_price=target, is_active=True))
+        db.flush()
+        index = load_index(db, [(card_id, 'above', 1.0, 10.0)])
+        assert [alert.target_price for alert in index.crossed(card_id, 1.0, 10.0)] == [5.0]
+        assert len(index) == 1
+    finally:
+        db.rollback()
+        db.close()
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from scipy import sparse
+
+from archetypes import ArchetypeClassifier, fit
+
+CORES = {
+    "Kashtira": ["k1", "k2", "k3", "k4", "k5"],
+    "Branded": ["b1", "b2", "b3", "b4", "b5"],
+}
+STAPLES = ["ash", "imperm"]
+
+def deck_matrix(decks, card_ids):
+    column = {card_id: i for i, card_id in enumerate(card_ids)}
+    rows, cols, values = [], [], []
+    for row, deck in enumerate(decks):
+        for card_id, quantity in deck.items():
+            rows.append(row)
+            cols.append(column[card_id])
+            values.append(quantity)
+    return sparse.csr_matrix((values, (rows, cols)), shape=(len(decks), len(card_ids)), dtype=float)
+
+def build(core, extra=()):
+    deck = {card_id: 3 for card_id in CORES[core]}
+    deck.update({card_id: 3 for card_id in STAPLES})
+    deck.update({card_id: 1 for card_id in extra})
+    return deck
+
+def test_fit_relabels_mislabelled_and_blank_decks():
+    card_ids = sorted({c for core in CORES.values() for c in core} | set(STAPLES) | {"tech"})
+    decks = [build("Kashtira"), build("Kashtira", ["tech"]), build("Kashtira"),
+             build("Branded"), build("Branded", ["tech"]), build("Branded"),
+             build("Kashtira"), build("Branded")]
+    deck_types = ["Kashtira", "kashtira ", "Kashtira", "Branded", "Branded", "Branded", "Branded", ""]
+    names, centroids, assigned, similarity = fit(deck_matrix(decks, card_ids), deck_types)
+    assert sorted(names) == ["Branded", "Kashtira"]
+    labels = [names[i] for i in assigned]
+    assert labels == ["Kashtira"] * 3 + ["Branded"] * 3 + ["Kashtira", "Branded"]
+    assert np.all(similarity > 0.9)
+
+    classifier = ArchetypeClassifier(names, centroids, card_ids)
+    archetype, score = classifier.classify_counts(dict(build("Kashtira"), unknown_card=3))
+    assert archetype == "Kashtira" and score > 0.8
+    assert classifier.classify_counts({"unknown_card": 40}) == (None, 0.0)
+
+def test_empty_classifier_labels_nothing():
+    assert ArchetypeClassifier().classify_counts({"k1": 3}) == (None, 0.0)
+
+def test_classify_decklist_keeps_deck_type_until_a_classifier_is_fitted(monkeypatch):
+    from types import SimpleNamespace
+    import archetypes
+
+    monkeypatch.setattr(archetypes, '_classifier', None)
+    # Requests never fit; the refresh thread does
+    monkeypatch.setattr(archetypes, 'refresh_classifier', lambda: pytest.fail("fitted in a request"))
+    decklist = SimpleNamespace(id='d1', tournamentId='t1', deckType=' Kashtira ', mainDeck=[{'cardId': 'k1', 'quantity': 3}],
+                               extraDeck=[], sideDeck=[])
+    archetypes.classify_decklist(decklist)
+    assert decklist.archetype == 'Kashtira'
+    assert decklist.archetype_similarity == 0.0
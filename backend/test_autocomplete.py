@@ -0,0 +1,36 @@
+from autocomplete import PrefixIndex, normalize
+
+CARDS = [
+    ("89631139", "Blue-Eyes White Dragon"),
+    ("46986414", "Dark Magician"),
+    ("38033121", "Dark Magician Girl"),
+    ("74677422", "Red-Eyes Black Dragon"),
+]
+
+def test_normalize():
+    assert normalize("  Élémental HERO Neos-Alius!") == "elemental hero neos alius"
+
+def test_prefix_index_orders_name_matches_before_word_matches():
+    index = PrefixIndex(CARDS)
+    assert [c["name"] for c in index.search("dark mag")] == ["Dark Magician", "Dark Magician Girl"]
+    assert [c["name"] for c in index.search("blue-e")] == ["Blue-Eyes White Dragon"]
+    assert [c["name"] for c in index.search("dragon")] == ["Blue-Eyes White Dragon", "Red-Eyes Black Dragon"]
+    assert [c["name"] for c in index.search("eyes", limit=1)] == ["Red-Eyes Black Dragon"]
+    assert index.search("!!") == []
+
+def test_refresh_if_stale_rebuilds_when_the_catalog_changes():
+    import autocomplete
+    from cache import invalidate_catalog
+
+    autocomplete.refresh_if_stale()
+    index = autocomplete.get_index()
+    assert not autocomplete.refresh_if_stale()
+    invalidate_catalog()
+    assert autocomplete.refresh_if_stale()
+    rebuilt = autocomplete.get_index()
+    assert rebuilt is not index and len(rebuilt) == len(index)
+
+    # A write from another process moves the cards write count
+    generation, writes = autocomplete._built
+    autocomplete._built = (generation, writes - 1)
+    assert autocomplete.refresh_if_stale()
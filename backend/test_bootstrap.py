@@ -0,0 +1,55 @@
+import bootstrap
+
+def test_run_bootstrap_retries_a_failed_run(monkeypatch):
+    attempts = []
+
+    def flaky_steps():
+        attempts.append(bootstrap.get_status()['state'])
+        if len(attempts) == 1:
+            raise RuntimeError("database is starting up")
+
+    monkeypatch.setattr(bootstrap, 'bootstrap_steps', flaky_steps)
+    monkeypatch.setattr(bootstrap.time, 'sleep', lambda seconds: None)
+    previous = bootstrap.get_status()
+    try:
+        bootstrap.run_bootstrap()
+        status = bootstrap.get_status()
+        assert attempts == ['running', 'running']
+        assert (status['state'], status['error']) == ('ready', None)
+    finally:
+        bootstrap._update(**previous)
+
+def test_bootstrap_lock_is_released():
+    from sqlalchemy import text
+    from database import engine
+
+    bootstrap.bootstrap_steps()
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {'key': bootstrap.BOOTSTRAP_LOCK_KEY}).scalar()
+        conn.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': bootstrap.BOOTSTRAP_LOCK_KEY})
+
+def test_populate_cards_resumes_an_unfinished_load(monkeypatch):
+    from sqlalchemy import text
+    from sqlalchemy.orm import Session
+    from database import engine
+
+    conn = engine.connect()
+    outer = conn.begin()
+    # Commits inside populate_cards_on_startup become savepoints of this transaction
+    monkeypatch.setattr(bootstrap, 'SessionLocal', lambda: Session(bind=conn, join_transaction_mode='create_savepoint'))
+    monkeypatch.setattr(bootstrap, 'fetch_catalog', lambda: iter(()))
+    syncs = []
+    monkeypatch.setattr(bootstrap, 'sync_cards', lambda db, cards, on_batch=None: syncs.append(1) or {
+        'seen': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'prices': 0, 'seconds': 0.0, 'peak_memory_mb': 0.0,
+    })
+    try:
+        # Cards are stored, but no load finished
+        conn.execute(text("DELETE FROM catalog_loads"))
+        bootstrap.populate_cards_on_startup()
+        assert syncs == [1]
+        assert conn.execute(text("SELECT count(*) FROM catalog_loads WHERE finished_at IS NOT NULL")).scalar() == 1
+        bootstrap.populate_cards_on_startup()
+        assert syncs == [1]
+    finally:
+        outer.rollback()
+        conn.close()
@@ -0,0 +1,57 @@
+import numpy as np
+
+from bulk_alerts import ABOVE, BELOW, CHANGE, find_triggers, group_extreme
+
+def test_group_extreme_picks_max_row_per_group():
+    groups = np.array([0, 0, 1, 1, 1])
+    values = np.array([1.0, 3.0, np.nan, 2.0, 5.0])
+    assert group_extreme(groups, values, 3).tolist() == [1, 4, -1]
+
+def make_prices(card_ids, currencies, prices, previous, recorded_at='2025-06-01'):
+    return {
+        'card_id': np.array(card_ids, dtype=object),
+        'currency': np.array(currencies, dtype=object),
+        'price': np.array(prices),
+        'previous': np.array(previous),
+        'recorded_at': np.array([recorded_at] * len(card_ids), dtype='datetime64[us]'),
+    }
+
+def test_find_triggers_evaluates_all_alert_types():
+    alerts = {
+        'id': np.array(['up', 'up-far', 'down', 'move', 'fired', 'no-price'], dtype=object),
+        'card_id': np.array(['c1', 'c1', 'c1', 'c1', 'c1', 'c9'], dtype=object),
+        'type': np.array([ABOVE, ABOVE, BELOW, CHANGE, ABOVE, ABOVE], dtype=np.int8),
+        'target': np.array([10.0, 50.0, 6.0, 40.0, 10.0, 1.0]),
+        'triggered_at': np.array([None, None, None, None, '2025-06-02', None], dtype='datetime64[us]'),
+    }
+    prices = make_prices(['c1', 'c1'], ['USD', 'USD'], [12.0, 5.0], [8.0, np.nan])
+    triggered, rows = find_triggers(alerts, prices)
+    fired = dict(zip(alerts['id'][triggered], rows))
+    # above/change use the 12.00 vendor (a 50% move from its previous tick), below the 5.00 one
+    assert fired == {'up': 0, 'down': 1, 'move': 0}
+
+def test_find_triggers_compares_each_vendor_in_its_own_currency():
+    alerts = {
+        'id': np.array(['up', 'down'], dtype=object),
+        'card_id': np.array(['c1', 'c1'], dtype=object),
+        'type': np.array([ABOVE, BELOW], dtype=np.int8),
+        'target': np.array([10.0, 6.0]),
+        'triggered_at': np.array([None, None], dtype='datetime64[us]'),
+    }
+    prices = make_prices(['c1', 'c2', 'c1', 'c1'], ['USD', 'USD', 'EUR', 'EUR'], [9.0, 50.0, 11.0, 5.0], [np.nan] * 4)
+    triggered, rows = find_triggers(alerts, prices)
+    # Each alert fires once, on an EUR price; the USD 9.00 meets neither
+    assert dict(zip(alerts['id'][triggered], rows)) == {'up': 2, 'down': 3}
+
+def test_find_triggers_refires_only_on_a_crossing():
+    alerts = {
+        'id': np.array(['held', 'recrossed', 'moved', 'old-tick'], dtype=object),
+        'card_id': np.array(['c1', 'c2', 'c3', 'c1'], dtype=object),
+        'type': np.array([ABOVE, ABOVE, CHANGE, ABOVE], dtype=np.int8),
+        'target': np.array([10.0, 10.0, 20.0, 10.0]),
+        'triggered_at': np.array(['2025-06-01', '2025-06-01', '2025-06-01', '2025-06-05'], dtype='datetime64[us]'),
+    }
+    # c1 stayed above 10 since the last trigger, c2 came back from 9.00, c3 moved 30%
+    prices = make_prices(['c1', 'c2', 'c3'], ['USD'] * 3, [13.0, 12.0, 13.0], [12.5, 9.0, 10.0], '2025-06-03')
+    triggered, rows = find_triggers(alerts, prices)
+    assert alerts['id'][triggered].tolist() == ['recrossed', 'moved']
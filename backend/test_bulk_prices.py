@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from bulk_prices import LineTooLong, clean_price_row, ingest_price_stream, iter_lines
+
+async def stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+def collect(chunks, **kwargs):
+    async def run():
+        return [line async for line in iter_lines(stream(*chunks), **kwargs)]
+    return asyncio.run(run())
+
+def test_iter_lines_joins_lines_split_across_chunks():
+    assert collect([b'a,b\nc', b'd\ne', b'f']) == [b'a,b', b'cd', b'ef']
+
+def test_iter_lines_rejects_overlong_lines():
+    assert collect([b'abcd\nab', b'cd'], max_line_bytes=4) == [b'abcd', b'abcd']
+    with pytest.raises(LineTooLong):
+        collect([b'ab', b'cde'], max_line_bytes=4)
+    with pytest.raises(LineTooLong):
+        collect([b'abcde\nab'], max_line_bytes=4)
+
+def test_clean_price_row_validates_and_normalizes():
+    now = datetime(2025, 6, 1)
+    row = clean_price_row({'card_id': 1, 'vendor_id': 'ebay', 'price': '2.345', 'currency': 'USD',
+                           'recorded_at': '2025-05-31T10:00:00', 'condition': ''}, now)
+    assert row['card_id'] == '1'
+    assert row['price'] == 2.35
+    assert row['condition'] is None
+    assert row['id']
+    for price in ('abc', 'nan', 'inf', '-inf', '100000000', '-1'):
+        with pytest.raises(ValueError):
+            clean_price_row({'card_id': '1', 'vendor_id': 'ebay', 'price': price, 'currency': 'USD',
+                             'recorded_at': '2025-05-31'}, now)
+    assert clean_price_row({'card_id': '1', 'vendor_id': 'ebay', 'price': '99999999.99', 'currency': 'USD',
+                            'recorded_at': '2025-05-31'}, now)['price'] == 99999999.99
+
+def test_clean_price_row_converts_offsets_to_local_time():
+    now = datetime(2025, 6, 1)
+    row = clean_price_row({'card_id': '1', 'vendor_id': 'ebay', 'price': '1', 'currency': 'USD',
+                           'recorded_at': '2024-01-01T10:00:00+05:00'}, now)
+    assert row['recorded_at'] == datetime(2024, 1, 1, 5, 0, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    assert row['recorded_at'].tzinfo is None
+
+def test_ingest_price_stream_batches_csv_and_reports_rejects():
+    body = (b'card_id,vendor_id,price,currency,recorded_at\n'
+            b'1,ebay,1.00,USD,2025-05-01\n'
+            b'2,ebay,oops,USD,2025-05-01\n'
+            b'3,ebay,3.00,USD,2025-05-01\n'
+            b'4,ebay,4.00,USD\n')
+    batches = []
+
+    async def write(rows):
+        batches.append([line for line, _ in rows])
+        return len(rows), []
+
+    summary = asyncio.run(ingest_price_stream(stream(body[:50], body[50:]), 'text/csv', write, batch_size=2))
+    assert summary['accepted'] == 2
+    assert summary['rejected'] == 2
+    assert batches == [[2], [4]]
+    assert [error['line'] for batch in summary['batches'] for error in batch['errors']] == [3, 5]
+
+def test_write_prices_returns_a_repeated_id_once():
+    import uuid
+    from sqlalchemy import text
+    from database import SessionLocal
+    from prices import write_prices
+
+    db = SessionLocal()
+    try:
+        card_id = db.execute(text("SELECT id FROM cards LIMIT 1")).scalar()
+        row = {'id': str(uuid.uuid4()), 'card_id': card_id, 'vendor_id': 'ebay', 'price': 1.0,
+               'currency': 'USD', 'condition': 'NM', 'recorded_at': datetime(2002, 3, 4), 'created_at': datetime.now()}
+        again = dict(row, condition='LP')
+        # The primary key is (id, recorded_at), so a later tick may reuse the id
+        later = dict(row, recorded_at=datetime(2002, 3, 5))
+        written = write_prices(db, [row, again, later])
+        assert written == [row, later]
+    finally:
+        db.rollback()
+        db.close()
@@ -0,0 +1,54 @@
+import threading
+import time
+
+from cache import TTLCache, catalog_cache, invalidate_catalog
+
+def test_lru_eviction_and_ttl():
+    cache = TTLCache(maxsize=2, ttl=0.05)
+    computed = []
+
+    def lookup(key):
+        return cache.get_or_set(key, lambda: computed.append(key) or key.upper())
+
+    assert [lookup(key) for key in ("a", "b", "a", "c")] == ["A", "B", "A", "C"]
+    # b was the least recently used entry when c came in
+    assert lookup("a") == "A"
+    assert lookup("b") == "B"
+    assert computed == ["a", "b", "c", "b"]
+    time.sleep(0.06)
+    lookup("a")
+    assert computed == ["a", "b", "c", "b", "a"]
+
+def test_get_or_set_coalesces_concurrent_misses():
+    cache = TTLCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_set("k", compute))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] + stats["coalesced"] == 7
+
+def test_invalidate_catalog_drops_entries_and_discards_stale_computes():
+    cache = catalog_cache("test")
+
+    def compute():
+        invalidate_catalog()  # catalog changes while the value is being computed
+        return "stale"
+
+    assert cache.get_or_set("k", compute) == "stale"
+    assert cache.get_or_set("k", lambda: "fresh") == "fresh"
+    assert cache.get_or_set("k", lambda: "unused") == "fresh"
+    invalidate_catalog()
+    assert cache.get_or_set("k", lambda: "recomputed") == "recomputed"
@@ -0,0 +1,28 @@
+from types import SimpleNamespace
+
+from decks import deck_card_rows
+
+def test_deck_card_rows_sums_repeated_entries_per_zone():
+    decklist = SimpleNamespace(
+        id="d1",
+        tournamentId="t1",
+        mainDeck=[{"cardId": "14558127", "quantity": 2}, {"cardId": "14558127", "quantity": 1}],
+        extraDeck=[],
+        sideDeck=[{"cardId": "14558127", "quantity": 1}, {"cardId": None, "quantity": 3}],
+    )
+    rows = sorted(deck_card_rows(decklist), key=lambda row: row["zone"])
+    assert [(row["zone"], row["card_id"], row["quantity"]) for row in rows] == [
+        ("main", "14558127", 3),
+        ("side", "14558127", 1),
+    ]
+    assert all(row["tournament_id"] == "t1" for row in rows)
+
+def test_deck_card_rows_skips_zero_quantities_and_defaults_missing_ones():
+    decklist = SimpleNamespace(
+        id="d1",
+        tournamentId="t1",
+        mainDeck=[{"cardId": "14558127", "quantity": 0}, {"cardId": "89631139"}, {"cardId": "23434538", "quantity": -1}],
+        extraDeck=[],
+        sideDeck=[],
+    )
+    assert [(row["card_id"], row["quantity"]) for row in deck_card_rows(decklist)] == [("89631139", 1)]
@@ -0,0 +1,27 @@
+import numpy as np
+
+from downsample import lttb_indices, lttb_select
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x = np.arange(1000, dtype=float)
+    y = np.zeros(1000)
+    y[500] = 100.0
+    y[250] = -50.0
+    idx = lttb_indices(x, y, 20)
+    assert len(idx) == 20
+    assert idx[0] == 0 and idx[-1] == 999
+    assert 500 in idx and 250 in idx
+    assert list(idx) == sorted(idx)
+
+def test_lttb_returns_everything_when_short():
+    assert list(lttb_indices([1, 2, 3], [1, 2, 3], 10)) == [0, 1, 2]
+
+def test_lttb_select_downsamples_each_series_and_keeps_order():
+    # Two vendors interleaved, most recent first as the API returns them
+    series = ['a', 'b'] * 50
+    x = [100 - i // 2 for i in range(100)]
+    y = [i % 7 for i in range(100)]
+    keep = lttb_select(series, x, y, 10)
+    assert keep == sorted(keep)
+    assert sum(series[i] == 'a' for i in keep) == 10
+    assert sum(series[i] == 'b' for i in keep) == 10
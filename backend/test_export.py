@@ -0,0 +1,36 @@
+import io
+from datetime import datetime
+from decimal import Decimal
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from export import EXPORT_COLUMNS, export_price_history
+
+BATCHES = [
+    [('a', '1', 'ebay', Decimal('1.50'), 'USD', 'NM', 'Rare', 'LOB-001', datetime(2025, 6, 1, 12))],
+    [],
+    [('b', '2', 'tcgplayer', Decimal('2.00'), 'USD', None, None, None, datetime(2025, 6, 2))],
+]
+
+def test_csv_export_yields_header_and_rows():
+    data = b''.join(export_price_history('csv', iter(BATCHES))).decode().splitlines()
+    assert data[0] == ','.join(EXPORT_COLUMNS)
+    assert data[1] == 'a,1,ebay,1.50,USD,NM,Rare,LOB-001,2025-06-01T12:00:00'
+    assert data[2] == 'b,2,tcgplayer,2.00,USD,,,,2025-06-02T00:00:00'
+
+def test_parquet_export_round_trips():
+    table = pq.read_table(io.BytesIO(b''.join(export_price_history('parquet', iter(BATCHES)))))
+    assert table.column_names == list(EXPORT_COLUMNS)
+    assert table.column('price').to_pylist() == [Decimal('1.50'), Decimal('2.00')]
+
+def test_arrow_export_streams_one_chunk_per_batch():
+    chunks = list(export_price_history('arrow', iter(BATCHES)))
+    assert len(chunks) > 2
+    table = pa.ipc.open_stream(b''.join(chunks)).read_all()
+    assert table.column('id').to_pylist() == ['a', 'b']
+
+def test_empty_export_still_has_schema():
+    table = pa.ipc.open_stream(b''.join(export_price_history('arrow', iter([])))).read_all()
+    assert table.num_rows == 0
+    assert table.column_names == list(EXPORT_COLUMNS)
@@ -0,0 +1,61 @@
+import json
+from ingestion import iter_json_array, build_rows, card_fingerprint, map_card
+
+YGOCARD = {
+    "id": 89631139,
+    "name": "Blue-Eyes White Dragon",
+    "type": "Normal Monster",
+    "desc": "This legendary dragon is a powerful engine of destruction.",
+    "card_images": [{"image_url": "https://images.ygoprodeck.com/images/cards/89631139.jpg"}],
+    "card_sets": [
+        {"set_name": "Legend of Blue Eyes White Dragon", "set_code": "LOB-001", "set_rarity": "Ultra Rare"},
+        {"set_name": "OCG Structure Deck", "set_code": "SD-001", "set_rarity": "Common"},
+    ],
+    "card_prices": [{"tcgplayer_price": "1.25", "ebay_price": "0.00", "cardmarket_price": "0.90"}],
+}
+
+def chunked(text, size):
+    return (text[i:i + size] for i in range(0, len(text), size))
+
+def test_iter_json_array_across_chunk_boundaries():
+    cards = [dict(YGOCARD, id=YGOCARD["id"] + i) for i in range(25)]
+    payload = json.dumps({"data": cards})
+    for size in (1, 7, 64, len(payload)):
+        assert list(iter_json_array(chunked(payload, size))) == cards
+
+def test_build_rows_skips_ocg_only_cards_and_zero_prices():
+    ocg_only = dict(YGOCARD, id=1, card_sets=[{"set_name": "OCG Exclusive", "set_code": "OCG-1"}])
+    card_rows, set_rows, price_rows = build_rows([YGOCARD, ocg_only], None)
+    assert [row["id"] for row in card_rows] == ["89631139"]
+    assert [(row["set_code"], row["rarity"]) for row in set_rows] == [("LOB-001", "Ultra Rare"), ("SD-001", "Common")]
+    assert sorted(row["vendor_id"] for row in price_rows) == ["cardmarket", "tcgplayer"]
+    assert {row["rarity"] for row in price_rows} == {"Ultra Rare"}
+
+def test_fingerprint_ignores_bookkeeping_fields_and_prices():
+    card_data = map_card(YGOCARD)
+    fingerprint = card_fingerprint(card_data)
+    assert card_fingerprint(dict(card_data, updatedAt="2026-01-01", tcgplayer_price="9.99")) == fingerprint
+    assert card_fingerprint(dict(card_data, name="Blue-Eyes Alternative White Dragon")) != fingerprint
+    assert card_fingerprint(dict(card_data, card_sets=card_data["card_sets"][:1])) != fingerprint
+    repriced = [dict(printing, set_price=123.45) for printing in card_data["card_sets"]]
+    assert card_fingerprint(dict(card_data, card_sets=repriced)) == fingerprint
+
+def test_card_sets_dedupe_null_rarity_and_refresh_set_prices():
+    from sqlalchemy import text
+    from database import SessionLocal
+    from ingestion import insert_card_sets, update_set_prices
+
+    db = SessionLocal()
+    try:
+        card_id = db.execute(text("SELECT id FROM cards LIMIT 1")).scalar()
+        printing = {'card_id': card_id, 'set_name': 'Test Set', 'set_code': 'TEST-000', 'rarity': None, 'set_price': 1.0}
+        insert_card_sets(db, [printing])
+        insert_card_sets(db, [printing])
+        stored = "SELECT set_price FROM card_sets WHERE set_code = 'TEST-000'"
+        assert db.execute(text(stored)).scalars().all() == [1]
+        assert update_set_prices(db, [dict(printing, set_price=2.5)]) == 1
+        assert update_set_prices(db, [dict(printing, set_price=2.5)]) == 0
+        assert db.execute(text(stored)).scalars().all() == [2.5]
+    finally:
+        db.rollback()
+        db.close()
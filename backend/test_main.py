@@ -1,6 +1,7 @@
 import pytest
 from fastapi.testclient import TestClient
 from main import app
+from pagination import encode_cursor
 
 client = TestClient(app)
 
@@ -24,4 +25,217 @@ def test_get_tournaments():
     response = client.get("/tournaments")
     assert response.status_code == 200
     data = response.json()
-    assert isinstance(data, list) 
\ No newline at end of file
+    assert isinstance(data, list) 
+
+
+def test_health_and_ready():
+    response = client.get("/health")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ok"
+    assert "state" in data["bootstrap"]
+    ready_resp = client.get("/ready")
+    assert ready_resp.status_code in (200, 503)
+    assert ready_resp.json()["ready"] == (ready_resp.status_code == 200)
+
+def test_search_cards():
+    response = client.get("/cards?search=dragon&limit=5")
+    assert response.status_code == 200
+    data = response.json()
+    assert isinstance(data["cards"], list)
+    assert isinstance(data["total"], int)
+    bad_mode = client.get("/cards?search=dragon&search_mode=regex")
+    assert bad_mode.status_code == 400
+
+def test_autocomplete_cards():
+    response = client.get("/cards/autocomplete?q=dra&limit=5")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["query"] == "dra"
+    assert isinstance(data["results"], list)
+    assert len(data["results"]) <= 5
+
+def test_get_cards_cursor_pagination():
+    first = client.get("/cards?limit=2").json()
+    assert "next_cursor" in first
+    if first["next_cursor"]:
+        second = client.get(f"/cards?limit=2&cursor={first['next_cursor']}").json()
+        assert second["total"] is None
+        first_ids = {card["id"] for card in first["cards"]}
+        assert not first_ids & {card["id"] for card in second["cards"]}
+    assert client.get("/cards?cursor=not-a-cursor").status_code == 400
+    # A well-formed cursor whose values do not match the (name, id) sort key
+    assert client.get(f"/cards?cursor={encode_cursor([1, None])}").status_code == 400
+    assert len(client.get("/cards?limit=100000").json()["cards"]) <= 100
+
+def test_card_facets():
+    response = client.get("/cards/facets?card_type=all")
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data["facets"]) == {"type", "attribute", "race", "rarity"}
+    assert data["total"] == sum(item["count"] for item in data["facets"]["type"])
+
+def test_get_cards_batch():
+    listing = client.get("/cards?limit=3").json()
+    ids = [card["id"] for card in listing["cards"]][::-1] + ["does-not-exist"]
+    response = client.post("/cards/batch", json={"ids": ids, "fields": ["name"]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [card["id"] for card in data["cards"]] == ids[:-1]
+    assert all(set(card) == {"id", "name"} for card in data["cards"])
+    assert data["missing"] == ["does-not-exist"]
+    assert client.post("/cards/batch", json={"ids": ids, "fields": ["password"]}).status_code == 400
+
+def test_card_usage():
+    response = client.get("/cards/does-not-exist/usage")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["decks"] == 0
+    assert data["avg_copies"] == 0.0
+    assert set(data["copies_by_zone"]) == {"main", "extra", "side"}
+
+def test_get_tournaments_query_count_is_constant():
+    from sqlalchemy import event
+    from database import engine
+
+    statements = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        response = client.get("/tournaments?limit=50")
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+    assert response.status_code == 200
+    data = response.json()
+    assert all("decklistCount" in t and "decklists" not in t for t in data)
+    assert len(statements) <= 2
+
+def test_card_prices_resolution():
+    card_id = client.get("/cards?limit=1").json()["cards"][0]["id"]
+    for resolution in ("raw", "1d", "1w"):
+        response = client.get(f"/cards/{card_id}/prices?days=365&resolution={resolution}")
+        assert response.status_code == 200
+        points = response.json()
+        assert all(point["resolution"] == resolution for point in points)
+        if resolution != "raw":
+            assert all(point["low"] <= point["price"] <= point["high"] for point in points)
+    assert client.get(f"/cards/{card_id}/prices?resolution=5m").status_code == 400
+
+def test_card_prices_max_points():
+    card_id = client.get("/cards?limit=1").json()["cards"][0]["id"]
+    response = client.get(f"/cards/{card_id}/prices?days=365&resolution=raw&max_points=3")
+    assert response.status_code == 200
+    points = response.json()
+    for vendor in {point["vendor_id"] for point in points}:
+        assert sum(point["vendor_id"] == vendor for point in points) <= 3
+    assert client.get(f"/cards/{card_id}/prices?max_points=2").status_code == 400
+
+def test_price_summary_batch_matches_single():
+    card_ids = [card["id"] for card in client.get("/cards?limit=3").json()["cards"]]
+    response = client.post("/price-summary/batch", json={"card_ids": card_ids + [card_ids[0], "missing-card"]})
+    assert response.status_code == 200
+    summaries = response.json()["summaries"]
+    assert [summary["card_id"] for summary in summaries] == card_ids + ["missing-card"]
+    assert summaries[-1]["prices"] == []
+    for summary in summaries[:-1]:
+        single = client.get(f"/cards/{summary['card_id']}/price-summary").json()
+        assert single == summary
+
+def test_decklist_value():
+    import uuid
+    assert client.get("/tournaments/t1/decklists/does-not-exist/value").status_code == 404
+    tournament_id = f"test-{uuid.uuid4().hex[:8]}"
+    tournament = {"id": tournament_id, "name": "Value test", "date": "2025-06-19", "location": "Online",
+                  "format": tournament_id, "size": 8, "region": "NA", "topCut": 4, "decklists": []}
+    assert client.post("/tournaments", json=tournament).status_code == 200
+    try:
+        decklist = {"id": f"{tournament_id}-0", "tournamentId": tournament_id, "player": "p", "placement": 1,
+                    "mainDeck": [], "extraDeck": [], "sideDeck": [], "deckType": "Empty"}
+        assert client.post(f"/tournaments/{tournament_id}/decklists", json=decklist).status_code == 200
+        response = client.get(f"/tournaments/{tournament_id}/decklists/{tournament_id}-0/value")
+        assert response.status_code == 200
+        assert (response.json()["total_quantity"], response.json()["vendors"]) == (0, [])
+    finally:
+        client.delete(f"/tournaments/{tournament_id}")
+
+def test_create_price_record_is_idempotent_on_natural_key():
+    import uuid
+    from sqlalchemy.orm import Session
+    from database import engine
+    from main import get_db
+
+    conn = engine.connect()
+    outer = conn.begin()
+    # The endpoint's commit becomes a savepoint, so nothing outlives the test
+    def get_test_db():
+        db = Session(bind=conn, join_transaction_mode='create_savepoint')
+        try:
+            yield db
+        finally:
+            db.close()
+    app.dependency_overrides[get_db] = get_test_db
+    try:
+        card_id = client.get("/cards?limit=1").json()["cards"][0]["id"]
+        record = {"card_id": card_id, "vendor_id": "ebay", "price": 1.0, "currency": "USD",
+                  "condition": "NM", "recorded_at": "2001-01-01T00:00:00"}
+        first = client.post("/price-history", json=dict(record, id=str(uuid.uuid4())))
+        assert first.status_code in (200, 409)
+        again = client.post("/price-history", json=dict(record, id=str(uuid.uuid4())))
+        assert again.status_code == 409
+    finally:
+        app.dependency_overrides.pop(get_db)
+        outer.rollback()
+        conn.close()
+
+def test_market_movers(monkeypatch):
+    import movers
+    # Requests never build the snapshot; until the refresh thread has one, they get a 503
+    monkeypatch.setattr(movers, '_snapshot', None)
+    assert client.get("/market/movers").status_code == 503
+    movers.refresh_snapshot()
+    response = client.get("/market/movers?window=7d&limit=5")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["window"] == "7d"
+    assert len(data["movers"]) <= 5
+    assert all(mover["change"] > 0 for mover in data["movers"])
+    assert client.get("/market/movers?window=1y").status_code == 400
+
+def test_export_price_history():
+    response = client.get("/export/price-history?vendor_id=ebay&start=2001-01-01T00:00:00&end=2001-01-02T00:00:00")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.splitlines()
+    assert lines[0] == "id,card_id,vendor_id,price,currency,condition,rarity,set_code,recorded_at"
+    assert all(",ebay," in line for line in lines[1:])
+    assert client.get("/export/price-history?format=xlsx").status_code == 400
+
+def test_meta_tracks_decklist_changes():
+    import uuid
+    fmt = f"test-{uuid.uuid4().hex[:8]}"
+    tournament = {"id": fmt, "name": "Meta test", "date": "2025-06-19", "location": "Online", "format": fmt,
+                  "size": 16, "region": "NA", "topCut": 4, "decklists": []}
+    assert client.post("/tournaments", json=tournament).status_code == 200
+    try:
+        for i, (deck_type, placement) in enumerate([("Kashtira", 1), ("Kashtira", 9), ("Branded", 3)]):
+            decklist = {"id": f"{fmt}-{i}", "tournamentId": fmt, "player": "p", "placement": placement,
+                        "mainDeck": [], "extraDeck": [], "sideDeck": [], "deckType": deck_type}
+            assert client.post(f"/tournaments/{fmt}/decklists", json=decklist).status_code == 200
+        data = client.get(f"/meta?format={fmt}").json()
+        assert data["total_decklists"] == 3
+        top = data["archetypes"][0]
+        assert (top["archetype"], top["decklists"], top["top_cut"], top["top_cut_rate"]) == ("Kashtira", 2, 1, 50.0)
+
+        decklist.update(deckType="Kashtira")
+        assert client.put(f"/tournaments/{fmt}/decklists/{fmt}-2", json=decklist).status_code == 200
+        assert client.delete(f"/tournaments/{fmt}/decklists/{fmt}-0").status_code == 200
+        data = client.get(f"/meta?format={fmt}").json()
+        assert [(a["archetype"], a["decklists"], a["top_cut"]) for a in data["archetypes"]] == [("Kashtira", 2, 1)]
+
+        trends = client.get(f"/meta/trends?format={fmt}").json()
+        assert trends["weeks"] == [{"week": "2025-06-16", "decklists": 2, "shares": {"Kashtira": 100.0}}]
+    finally:
+        client.delete(f"/tournaments/{fmt}")
+    assert client.get(f"/meta?format={fmt}").json()["archetypes"] == []
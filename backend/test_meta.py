@@ -0,0 +1,25 @@
+from types import SimpleNamespace
+
+from meta import UNKNOWN_ARCHETYPE, meta_entry, tally, week_of
+
+def test_week_of_returns_monday_or_blank():
+    assert week_of("2025-06-19") == "2025-06-16"
+    assert week_of("2025-06-16T10:00:00") == "2025-06-16"
+    assert week_of("June 2025") == ""
+    assert week_of(None) == ""
+
+def test_meta_entry_top_cut_conversion():
+    key, counts = meta_entry(" Kashtira ", 3, "Advanced", "NA", "2025-06-19", 8)
+    assert key == ("Advanced", "NA", "2025-06-16", "Kashtira")
+    assert counts == (1, 1, 1)
+    assert meta_entry("Kashtira", 9, "Advanced", "NA", "2025-06-19", 8)[1] == (1, 1, 0)
+    # Without a top cut the decklist counts for usage only
+    assert meta_entry("", 1, None, None, None, None) == (("", "", "", UNKNOWN_ARCHETYPE), (1, 0, 0))
+
+def test_tally_nets_out_an_update():
+    tournament = SimpleNamespace(format="Advanced", region="EU", date="2025-06-19", topCut=8)
+    decklist = SimpleNamespace(deckType="Branded", archetype=None, placement=12)
+    deltas = tally([(decklist, tournament)], -1)
+    decklist.placement = 4
+    tally([(decklist, tournament)], 1, deltas)
+    assert deltas == {("Advanced", "EU", "2025-06-16", "Branded"): [0, 0, 1]}
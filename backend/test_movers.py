@@ -0,0 +1,51 @@
+from movers import WindowMovers
+
+ROWS = [
+    ('c1', 'Dark Magician', 'tcgplayer', 'USD', 10.0, 15.0),
+    ('c2', 'Blue-Eyes', 'tcgplayer', 'USD', 100.0, 120.0),
+    ('c3', 'Kuriboh', 'tcgplayer', 'USD', 4.0, 2.0),
+    ('c1', 'Dark Magician', 'cardmarket', 'EUR', 10.0, 10.0),
+]
+RARITIES = {'Ultra Rare': {'c2', 'c3'}, 'Common': {'c1'}}
+
+def card_ids(movers):
+    return [mover['card_id'] for mover in movers]
+
+def test_top_gainers_by_pct_and_abs():
+    window = WindowMovers(ROWS, RARITIES)
+    assert card_ids(window.top(10)) == ['c1', 'c2']
+    assert card_ids(window.top(10, sort='abs')) == ['c2', 'c1']
+    assert window.top(1)[0]['change_pct'] == 50.0
+
+def test_top_losers_and_filters():
+    window = WindowMovers(ROWS, RARITIES)
+    assert card_ids(window.top(10, direction='losers')) == ['c3']
+    assert card_ids(window.top(10, rarity='Ultra Rare')) == ['c2']
+    assert window.top(10, vendor_id='cardmarket') == []
+    assert window.top(10, rarity='Secret Rare') == []
+
+def test_empty_window():
+    assert WindowMovers([], {}).top(5) == []
+
+def test_load_window_baseline_ignores_other_conditions():
+    import uuid
+    from datetime import datetime, timedelta
+    from sqlalchemy import text
+    from database import SessionLocal
+    from movers import load_window
+    from prices import write_prices
+
+    db = SessionLocal()
+    try:
+        card_id = db.execute(text("SELECT card_id FROM card_latest_price WHERE vendor_id = 'ebay' LIMIT 1")).scalar()
+        since = datetime.now() + timedelta(days=3)
+        write_prices(db, [
+            {'id': str(uuid.uuid4()), 'card_id': card_id, 'vendor_id': 'ebay', 'price': price, 'currency': 'USD',
+             'condition': condition, 'recorded_at': since - timedelta(minutes=minutes), 'created_at': datetime.now()}
+            for condition, price, minutes in [('NM', 10.0, 60), ('LP', 4.0, 30)]
+        ])
+        baselines = {(row[0], row[2]): row[4] for row in load_window(db, since)}
+        assert baselines[(card_id, 'ebay')] == 10.0
+    finally:
+        db.rollback()
+        db.close()
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from partitions import month_start, add_months, partition_name
+
+def test_month_start():
+    assert month_start(datetime(2025, 6, 17, 13, 45, 2, 99)) == datetime(2025, 6, 1)
+
+def test_add_months_across_years():
+    assert add_months(datetime(2025, 11, 1), 1) == datetime(2025, 12, 1)
+    assert add_months(datetime(2025, 12, 1), 1) == datetime(2026, 1, 1)
+    assert add_months(datetime(2025, 1, 1), -1) == datetime(2024, 12, 1)
+    assert add_months(datetime(2025, 6, 1), 15) == datetime(2026, 9, 1)
+
+def test_partition_name():
+    assert partition_name(datetime(2025, 3, 1)) == 'price_history_y2025m03'
+
+def test_late_tick_into_dropped_month_merges_into_compacted_day():
+    import uuid
+    from sqlalchemy import text
+    from database import SessionLocal
+    from partitions import apply_retention, create_partition, rebuild_price_rollups
+    from prices import write_prices
+
+    db = SessionLocal()
+    try:
+        card_id = db.execute(text("SELECT id FROM cards LIMIT 1")).scalar()
+        def tick(hour, price):
+            return {'id': str(uuid.uuid4()), 'card_id': card_id, 'vendor_id': 'ebay', 'price': price,
+                    'currency': 'USD', 'condition': 'NM', 'rarity': None, 'set_code': None,
+                    'recorded_at': datetime(2003, 5, 10, hour), 'created_at': datetime.now()}
+        def day():
+            return db.execute(text(
+                "SELECT open, high, low, close, volume FROM price_rollups_daily "
+                "WHERE card_id = :card_id AND vendor_id = 'ebay' AND bucket = '2003-05-10'"
+            ), {'card_id': card_id}).one()
+
+        create_partition(db, datetime(2003, 5, 1))
+        write_prices(db, [tick(9, 5), tick(12, 7)])
+        assert 'price_history_y2003m05' in apply_retention(db, now=datetime(2005, 1, 1))
+        # The month is gone, so this tick lands in the default partition
+        write_prices(db, [tick(15, 4)])
+        apply_retention(db, now=datetime(2005, 1, 1))
+        assert tuple(map(float, day())) == (5, 7, 4, 4, 3)
+        rebuild_price_rollups(db)
+        assert tuple(map(float, day())) == (5, 7, 4, 4, 3)
+    finally:
+        db.rollback()
+        db.close()
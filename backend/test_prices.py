@@ -0,0 +1,86 @@
+from datetime import datetime
+
+from prices import newest_per_vendor
+
+def test_newest_per_vendor_keeps_latest_tick_per_card_and_vendor():
+    rows = [
+        {'id': '1', 'card_id': 'c1', 'vendor_id': 'v1', 'price': 2.0, 'currency': 'USD', 'recorded_at': datetime(2025, 6, 2)},
+        {'id': '2', 'card_id': 'c1', 'vendor_id': 'v1', 'price': 3.0, 'currency': 'USD', 'recorded_at': datetime(2025, 6, 3)},
+        {'id': '3', 'card_id': 'c1', 'vendor_id': 'v1', 'price': 1.0, 'currency': 'USD', 'recorded_at': datetime(2025, 6, 1)},
+        {'id': '4', 'card_id': 'c1', 'vendor_id': 'v2', 'price': 9.0, 'currency': 'EUR', 'recorded_at': datetime(2025, 6, 1)},
+    ]
+    latest = {(row['card_id'], row['vendor_id']): row for row in newest_per_vendor(rows)}
+    assert latest[('c1', 'v1')]['price'] == 3.0
+    assert latest[('c1', 'v2')]['currency'] == 'EUR'
+    # Only card_latest_price columns are passed through
+    assert 'id' not in latest[('c1', 'v1')]
+    assert latest[('c1', 'v1')]['condition'] is None
+
+def test_write_prices_keeps_latest_price_near_mint():
+    import uuid
+    from datetime import timedelta
+    from sqlalchemy import text
+    from database import SessionLocal
+    from prices import write_prices
+
+    db = SessionLocal()
+    try:
+        card_id = db.execute(text("SELECT id FROM cards LIMIT 1")).scalar()
+        recorded_at = datetime.now() + timedelta(days=2)
+        write_prices(db, [
+            {'id': str(uuid.uuid4()), 'card_id': card_id, 'vendor_id': 'ebay', 'price': price, 'currency': 'USD',
+             'condition': condition, 'recorded_at': recorded_at + timedelta(minutes=minutes), 'created_at': datetime.now()}
+            for condition, price, minutes in [('NM', 12.0, 0), ('LP', 7.0, 1), ('MP', 5.0, 2)]
+        ])
+        latest = db.execute(text(
+            "SELECT condition, price FROM card_latest_price WHERE card_id = :card_id AND vendor_id = 'ebay'"
+        ), {'card_id': card_id}).one()
+        assert (latest.condition, float(latest.price)) == ('NM', 12.0)
+    finally:
+        db.rollback()
+        db.close()
+
+def test_newest_per_vendor_keeps_the_tick_before_the_newest():
+    rows = [
+        {'card_id': 'c1', 'vendor_id': 'v1', 'price': 2.0, 'currency': 'USD', 'recorded_at': datetime(2025, 6, 2)},
+        {'card_id': 'c1', 'vendor_id': 'v1', 'price': 3.0, 'currency': 'USD', 'recorded_at': datetime(2025, 6, 3)},
+        {'card_id': 'c1', 'vendor_id': 'v1', 'price': 1.0, 'currency': 'USD', 'recorded_at': datetime(2025, 6, 1)},
+        {'card_id': 'c1', 'vendor_id': 'v2', 'price': 9.0, 'currency': 'EUR', 'recorded_at': datetime(2025, 6, 1)},
+    ]
+    latest = {(row['card_id'], row['vendor_id']): row for row in newest_per_vendor(rows)}
+    assert (latest[('c1', 'v1')]['previous_price'], latest[('c1', 'v1')]['previous_recorded_at']) == (2.0, datetime(2025, 6, 2))
+    assert latest[('c1', 'v2')]['previous_price'] is None
+
+def test_upsert_latest_prices_moves_the_stored_price_to_previous():
+    import uuid
+    from datetime import timedelta
+    from sqlalchemy import text
+    from database import SessionLocal
+    from prices import write_prices
+
+    db = SessionLocal()
+    try:
+        card_id = db.execute(text("SELECT id FROM cards LIMIT 1")).scalar()
+        recorded_at = datetime.now() + timedelta(days=4)
+
+        def tick(price, minutes):
+            return {'id': str(uuid.uuid4()), 'card_id': card_id, 'vendor_id': 'ebay', 'price': price, 'currency': 'USD',
+                    'condition': 'NM', 'recorded_at': recorded_at + timedelta(minutes=minutes), 'created_at': datetime.now()}
+
+        def latest():
+            return db.execute(text(
+                "SELECT price, previous_price FROM card_latest_price WHERE card_id = :card_id AND vendor_id = 'ebay'"
+            ), {'card_id': card_id}).one()
+
+        write_prices(db, [tick(10.0, 0)])
+        write_prices(db, [tick(11.0, 1)])
+        assert tuple(map(float, latest())) == (11.0, 10.0)
+        # Within one batch the batch's own earlier tick is the previous one
+        write_prices(db, [tick(13.0, 3), tick(12.0, 2)])
+        assert tuple(map(float, latest())) == (13.0, 12.0)
+        # A late tick moves neither
+        write_prices(db, [tick(1.0, -5)])
+        assert tuple(map(float, latest())) == (13.0, 12.0)
+    finally:
+        db.rollback()
+        db.close()
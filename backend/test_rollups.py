@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from rollups import aggregate_ticks, bucket_start, pick_resolution
+
+def test_bucket_start_truncates_to_day_and_monday():
+    ts = datetime(2025, 6, 12, 15, 30)  # a Thursday
+    assert bucket_start(ts, '1d') == datetime(2025, 6, 12)
+    assert bucket_start(ts, '1w') == datetime(2025, 6, 9)
+
+def test_aggregate_ticks_builds_ohlc_regardless_of_input_order():
+    rows = [
+        {'card_id': 'c1', 'vendor_id': 'v1', 'price': 5.0, 'currency': 'USD', 'recorded_at': datetime(2025, 6, 12, 18)},
+        {'card_id': 'c1', 'vendor_id': 'v1', 'price': 4.0, 'currency': 'USD', 'recorded_at': datetime(2025, 6, 12, 9)},
+        {'card_id': 'c1', 'vendor_id': 'v1', 'price': 7.0, 'currency': 'USD', 'recorded_at': datetime(2025, 6, 12, 12)},
+        {'card_id': 'c1', 'vendor_id': 'v1', 'price': 6.0, 'currency': 'USD', 'recorded_at': datetime(2025, 6, 13, 9)},
+    ]
+    daily = sorted(aggregate_ticks(rows, '1d'), key=lambda row: row['bucket'])
+    assert [(r['open'], r['high'], r['low'], r['close'], r['volume']) for r in daily] == [
+        (4.0, 7.0, 4.0, 5.0, 3),
+        (6.0, 6.0, 6.0, 6.0, 1),
+    ]
+    weekly = aggregate_ticks(rows, '1w')
+    assert len(weekly) == 1
+    assert (weekly[0]['open'], weekly[0]['close'], weekly[0]['volume']) == (4.0, 6.0, 4)
+
+def test_pick_resolution():
+    assert pick_resolution(7) == 'raw'
+    assert pick_resolution(30) == '1d'
+    assert pick_resolution(365) == '1w'
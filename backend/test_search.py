@@ -0,0 +1,5 @@
+from search import contains_pattern
+
+def test_contains_pattern_escapes_wildcards():
+    assert contains_pattern("dragon") == "%dragon%"
+    assert contains_pattern("100%_\\") == "%100\\%\\_\\\\%"